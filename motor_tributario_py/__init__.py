@@ -1,6 +1,46 @@
 """motor_tributario_py package.
 
 Expose package version and basic metadata.
+
+The main entry points are importable from the package itself; they are
+loaded on first access (PEP 562), so ``import motor_tributario_py`` does not
+load the calculators, the rule tables or ``bkflow_dmn``.
 """
+import importlib
 
 __version__ = "0.1.0"
+
+# Public name -> module defining it, imported on first access
+_LAZY = {
+    "FacadeCalculadoraTributacao": "motor_tributario_py.facade",
+    "ResultadoTributacao": "motor_tributario_py.facade",
+    "calcula_tributacao_lote": "motor_tributario_py.facade",
+    "Tributavel": "motor_tributario_py.models",
+    "TributavelCompacto": "motor_tributario_py.models",
+    "TributavelEsparso": "motor_tributario_py.models",
+    "TributavelLinha": "motor_tributario_py.models",
+    "PerfilTributario": "motor_tributario_py.models",
+    "REGISTRO_PERFIS": "motor_tributario_py.models",
+    "calcula_tributacao_perfil": "motor_tributario_py.perfil",
+    "ResultCache": "motor_tributario_py.cache",
+    "PersistentResultCache": "motor_tributario_py.cache",
+    "calculadora_perfil": "motor_tributario_py.perfil",
+    "ExecutorParalelo": "motor_tributario_py.paralelo",
+    "calcula_tributacao_paralelo": "motor_tributario_py.paralelo",
+}
+
+__all__ = ["__version__", *_LAZY]
+
+
+def __getattr__(name: str):
+    try:
+        modulo = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    valor = getattr(importlib.import_module(modulo), name)
+    globals()[name] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
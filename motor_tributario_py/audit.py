@@ -8,6 +8,8 @@ from decimal import Decimal
 import json
 
 from bkflow_dmn.audit import start_audit, stop_audit, AuditTrail, DecisionTrace
+from motor_tributario_py.engine import reference_interpreter
+from motor_tributario_py.models import dados_tributavel
 
 
 @dataclass
@@ -174,7 +176,7 @@ class AuditManager:
         """
         # Capture inputs
         inputs = {
-            'tributavel': facade_instance.tributavel.__dict__.copy(),
+            'tributavel': dados_tributavel(facade_instance.tributavel),
             'args': args,
             'kwargs': kwargs
         }
@@ -183,9 +185,11 @@ class AuditManager:
         start_audit()
         
         try:
-            # Execute method
+            # Execute method (traces are recorded by the bkflow_dmn interpreter,
+            # so compiled rules are bypassed while auditing)
             method = getattr(facade_instance, method_name)
-            result = method(*args, **kwargs)
+            with reference_interpreter():
+                result = method(*args, **kwargs)
             
             # Stop audit and collect trail
             trail = stop_audit()
@@ -0,0 +1,286 @@
+"""
+Caches of calculation results (in memory and on disk).
+
+Catalog and quote flows price the same item (same values and rates) over
+and over.  :class:`ResultCache` memoizes ``calcula_tributacao`` and the
+individual ``calcula_*`` methods of ``FacadeCalculadoraTributacao`` keyed
+by a fingerprint of the ``Tributavel``: the profile (``perfil.chave_perfil``)
+plus the value of every field the calculation reads for that profile, as
+recorded by the profile-specialized calculator (:mod:`.perfil`).  Fields a
+calculation does not read (e.g. the IBS/CBS rates for ``saidas=("icms",)``)
+do not split the cache.  Profiles that are not specialized, and methods
+outside the calculation graph, are keyed by every field.
+
+Entries are evicted least recently used beyond ``maxsize`` and, with a
+``ttl``, after ``ttl`` seconds.  Results are copied in and out, so callers
+may modify what they get back.
+
+Example:
+    >>> cache = ResultCache(maxsize=100_000, ttl=3600)
+    >>> resultado = cache.calcula_tributacao(produto)
+    >>> icms = cache.calcula(produto, "calcula_icms")
+    >>> cache.info()
+    ResultCacheInfo(hits=..., misses=..., expired=..., maxsize=100000, currsize=...)
+
+:class:`PersistentResultCache` keeps ``calcula_tributacao`` results in a
+SQLite file across runs, keyed by the same fingerprint and by
+:func:`results_version` (the rule tables, the engine and the calculators),
+so a catalog repricing run only calculates the items whose inputs changed::
+
+    with PersistentResultCache("precos.sqlite") as cache:
+        resultados = cache.calcula_tributacao_lote(itens)
+
+Entries of another version are never read; ``prune()`` deletes them.  The
+file holds pickled results: only open caches you wrote.
+"""
+import copy
+import hashlib
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from dataclasses import is_dataclass
+from decimal import Decimal
+from operator import attrgetter
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+from motor_tributario_py.facade import FacadeCalculadoraTributacao, ResultadoTributacao
+from motor_tributario_py.grafo import GRAFO_TRIBUTACAO, SAIDAS_PADRAO, ordem_calculo
+from motor_tributario_py.models import CAMPOS_TRIBUTAVEL, Tributavel
+from motor_tributario_py.perfil import calculadora_perfil, chave_perfil
+
+
+class ResultCacheInfo(namedtuple("ResultCacheInfo", ["hits", "misses", "expired", "maxsize", "currsize"])):
+
+    @property
+    def hit_rate(self) -> float:
+        consultas = self.hits + self.misses
+        return self.hits / consultas if consultas else 0.0
+
+
+# Facade method -> calculation graph node
+_NOS_POR_METODO = {no.metodo: nome for nome, no in GRAFO_TRIBUTACAO.items()}
+_leitores: Dict[Tuple[str, ...], Callable[[Any], tuple]] = {}
+
+
+def _leitor(campos: Tuple[str, ...]) -> Callable[[Any], tuple]:
+    """Tuple of the values of ``campos`` (attrgetter returns a bare value for one field)."""
+    try:
+        return _leitores[campos]
+    except KeyError:
+        if not campos:
+            leitor = lambda tributavel: ()  # noqa: E731
+        elif len(campos) == 1:
+            unico = attrgetter(campos[0])
+            leitor = lambda tributavel: (unico(tributavel),)  # noqa: E731
+        else:
+            leitor = attrgetter(*campos)
+        return _leitores.setdefault(campos, leitor)
+
+
+def _canonico(valores: Iterable[Any]) -> tuple:
+    # Decimal('1.0') == Decimal('1.00') but results keep the exponent
+    return tuple(str(valor) if type(valor) is Decimal else valor for valor in valores)
+
+
+def fingerprint(tributavel: Tributavel, saidas: Iterable[str]) -> tuple:
+    """Key of ``tributavel`` for the outputs ``saidas``: equal keys give equal results."""
+    ordem = ordem_calculo(saidas)
+    calculadora = calculadora_perfil(tributavel, ordem)
+    if calculadora.campos is None:
+        return ordem, None, _canonico(_leitor(CAMPOS_TRIBUTAVEL)(tributavel))
+    return ordem, chave_perfil(tributavel), _canonico(_leitor(calculadora.campos)(tributavel))
+
+
+def copia_resultado(resultado: Any) -> Any:
+    """Copy of a result and of the results nested in it (their values are immutable)."""
+    if not is_dataclass(resultado) or isinstance(resultado, type):
+        return resultado
+    copia = copy.copy(resultado)
+    for nome, valor in vars(copia).items():
+        if is_dataclass(valor):
+            setattr(copia, nome, copia_resultado(valor))
+    return copia
+
+
+class ResultCache:
+    """Thread-safe, size-bounded (LRU) cache of calculation results with optional TTL."""
+
+    def __init__(self, maxsize: int = 4096, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._clock = clock
+        # key -> (expiry or None, result)
+        self._results: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, calcula: Callable[[], Any]) -> Any:
+        """Copy of the result cached under ``key``, calculated by ``calcula`` on a miss."""
+        with self._lock:
+            entrada = self._results.get(key)
+            if entrada is not None:
+                expira, resultado = entrada
+                if expira is None or self._clock() < expira:
+                    self._results.move_to_end(key)
+                    self.hits += 1
+                    return copia_resultado(resultado)
+                del self._results[key]
+                self.expired += 1
+            self.misses += 1
+        # Calculate outside the lock; a concurrent miss just calculates twice
+        resultado = calcula()
+        expira = None if self.ttl is None else self._clock() + self.ttl
+        with self._lock:
+            self._results[key] = (expira, copia_resultado(resultado))
+            self._results.move_to_end(key)
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return resultado
+
+    def calcula_tributacao(self, tributavel: Tributavel,
+                           saidas: Optional[Iterable[str]] = None) -> ResultadoTributacao:
+        """``FacadeCalculadoraTributacao(tributavel).calcula_tributacao(saidas)``, cached."""
+        saidas = SAIDAS_PADRAO if saidas is None else saidas
+        chave = ("calcula_tributacao",) + fingerprint(tributavel, saidas)
+        return self.get(chave, lambda: calculadora_perfil(tributavel, saidas)(tributavel))
+
+    def calcula(self, tributavel: Tributavel, metodo: str, **argumentos) -> Any:
+        """``FacadeCalculadoraTributacao(tributavel).<metodo>(**argumentos)``, cached."""
+        calcula = getattr(FacadeCalculadoraTributacao, metodo)
+        no = _NOS_POR_METODO.get(metodo)
+        if no is None:
+            impressao = _canonico(_leitor(CAMPOS_TRIBUTAVEL)(tributavel))
+        else:
+            impressao = fingerprint(tributavel, (no,))
+        chave = (metodo, tuple(sorted(argumentos.items())), impressao)
+        return self.get(chave, lambda: calcula(FacadeCalculadoraTributacao(tributavel), **argumentos))
+
+    def info(self) -> ResultCacheInfo:
+        with self._lock:
+            return ResultCacheInfo(self.hits, self.misses, self.expired, self.maxsize, len(self._results))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+def results_version() -> str:
+    """Hash of everything results depend on besides the item: rule tables, engine, calculators."""
+    from motor_tributario_py.engine.snapshot import rules_hash
+
+    digest = hashlib.sha256(rules_hash().encode())
+    pacote = Path(__file__).parent
+    for source in sorted([*pacote.glob("*.py"), *(pacote / "taxes").glob("*.py")]):
+        digest.update(source.name.encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def _chave_persistente(tributavel: Tributavel, saidas: Iterable[str]) -> bytes:
+    # The fingerprint holds str, int, bool and None only: its repr is stable
+    return hashlib.sha256(repr(fingerprint(tributavel, saidas)).encode()).digest()
+
+
+class PersistentResultCache:
+    """``calcula_tributacao`` results stored in a SQLite file, valid for one :func:`results_version`."""
+
+    # Bound parameters per SELECT (SQLite's historical limit is 999)
+    LOTE_LEITURA = 500
+
+    def __init__(self, path: Union[str, Path], version: Optional[str] = None):
+        self.path = Path(path)
+        self.version = results_version() if version is None else version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conexao:
+            self._conexao.execute(
+                "CREATE TABLE IF NOT EXISTS resultados ("
+                " versao TEXT NOT NULL, chave BLOB NOT NULL, resultado BLOB NOT NULL,"
+                " PRIMARY KEY (versao, chave)) WITHOUT ROWID"
+            )
+
+    def calcula_tributacao(self, tributavel: Tributavel,
+                           saidas: Optional[Iterable[str]] = None) -> ResultadoTributacao:
+        """``FacadeCalculadoraTributacao(tributavel).calcula_tributacao(saidas)``, cached on disk."""
+        return self.calcula_tributacao_lote([tributavel], saidas)[0]
+
+    def calcula_tributacao_lote(self, itens: Iterable[Tributavel],
+                                saidas: Optional[Iterable[str]] = None) -> List[ResultadoTributacao]:
+        """``calcula_tributacao`` for every item, in input order.
+
+        Stored results are read in bulk; only the items without one are
+        calculated (once per distinct fingerprint) and then stored.
+        """
+        saidas = ordem_calculo(SAIDAS_PADRAO if saidas is None else saidas)
+        itens = list(itens)
+        chaves = [_chave_persistente(tributavel, saidas) for tributavel in itens]
+        armazenados = self._le(set(chaves))
+
+        novos: Dict[bytes, bytes] = {}
+        for tributavel, chave in zip(itens, chaves):
+            if chave not in armazenados and chave not in novos:
+                novos[chave] = pickle.dumps(calculadora_perfil(tributavel, saidas)(tributavel),
+                                            protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self.hits += len(itens) - len(novos)
+            self.misses += len(novos)
+            with self._conexao:
+                self._conexao.executemany(
+                    "INSERT OR REPLACE INTO resultados (versao, chave, resultado) VALUES (?, ?, ?)",
+                    [(self.version, chave, dados) for chave, dados in novos.items()],
+                )
+        armazenados.update(novos)
+        return [pickle.loads(armazenados[chave]) for chave in chaves]
+
+    def _le(self, chaves: set) -> Dict[bytes, bytes]:
+        chaves = list(chaves)
+        encontrados = {}
+        with self._lock:
+            for inicio in range(0, len(chaves), self.LOTE_LEITURA):
+                lote = chaves[inicio:inicio + self.LOTE_LEITURA]
+                encontrados.update(self._conexao.execute(
+                    f"SELECT chave, resultado FROM resultados WHERE versao = ? AND chave IN ({', '.join('?' * len(lote))})",
+                    [self.version, *lote],
+                ))
+        return encontrados
+
+    def prune(self) -> int:
+        """Delete the entries of other versions; returns how many were deleted."""
+        with self._lock, self._conexao:
+            return self._conexao.execute("DELETE FROM resultados WHERE versao != ?", (self.version,)).rowcount
+
+    def info(self) -> ResultCacheInfo:
+        with self._lock:
+            (tamanho,) = self._conexao.execute(
+                "SELECT COUNT(*) FROM resultados WHERE versao = ?", (self.version,)).fetchone()
+            return ResultCacheInfo(self.hits, self.misses, 0, None, tamanho)
+
+    def clear(self) -> None:
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM resultados")
+            self.hits = self.misses = 0
+
+    def close(self) -> None:
+        self._conexao.close()
+
+    def __enter__(self) -> "PersistentResultCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,373 @@
+"""
+Columnar (vectorized) engine for ICMS, IPI, PIS, COFINS, FCP and DIFAL.
+
+Evaluates the formulas of ``ICMS_CALC_RULE``, ``IPI_CALC_RULE``,
+``PIS_COFINS_CALC_RULE``, ``FCP_CALC_RULE`` and ``DIFAL_CALC_RULE`` over
+struct-of-arrays inputs (one array per ``Tributavel`` field), selecting the
+rule row of each item with boolean masks.  Requires numpy
+(``pip install motor_tributario_py[colunar]``).
+
+Numbers are exact scaled integers (:class:`Coluna`, ``valores / 10**escala``),
+so every result is the exact rational the Decimal path computes, rounded
+once to cents with ROUND_HALF_EVEN, i.e. bit-exact with
+``valor.quantize(Decimal('0.01'))`` of the calculators.  The Decimal path
+is only inexact when an intermediate needs more digits than the decimal
+context precision (28); items where that can happen are detected and
+recalculated with the calculators themselves.
+
+Scope: the rule tables only.  CST/CSOSN post-processing (diferimento,
+efetivo, ST, crédito) is not applied, ``valor_ipi`` is an input (as in
+``CalculadoraIcms``) and the ICMS deducted from PIS/COFINS is the ICMS
+calculated here.
+
+Example:
+    >>> resultado = calcula_colunar({
+    ...     "valor_produto": [Decimal("100.00"), Decimal("59.90")],
+    ...     "percentual_icms": Decimal("18"),
+    ... })
+    >>> resultado.valor_icms.decimais()
+    [Decimal('18.00'), Decimal('10.78')]
+"""
+from dataclasses import dataclass, fields
+from decimal import Decimal, ROUND_HALF_EVEN, getcontext
+from typing import Any, Dict, List, Mapping, Optional
+
+import numpy as np
+
+from motor_tributario_py.fixo import CONTEXTO_EXATO, divide_arredondando
+from motor_tributario_py.models import Tributavel
+
+_INT64_MAX = int(np.iinfo(np.int64).max)
+
+_NUMERICOS = (
+    "valor_produto", "quantidade_produto", "frete", "seguro", "outras_despesas",
+    "desconto", "valor_ipi", "percentual_icms", "percentual_reducao", "percentual_ipi",
+    "percentual_pis", "percentual_reducao_pis", "percentual_cofins",
+    "percentual_reducao_cofins", "percentual_fcp", "percentual_difal_interna",
+    "percentual_difal_interestadual",
+)
+_FLAGS = ("is_ativo_imobilizado_ou_uso_consumo", "deduz_icms_da_base_de_pis_cofins")
+CAMPOS_COLUNARES = _NUMERICOS + _FLAGS + ("tipo_desconto",)
+
+_PADROES = {f.name: f.default for f in fields(Tributavel) if f.name in CAMPOS_COLUNARES}
+
+
+def _maximo(valores: np.ndarray) -> int:
+    if not len(valores):
+        return 0
+    return int(np.max(np.abs(valores)))
+
+
+def _compativeis(a: np.ndarray, b: np.ndarray, limite: int):
+    """Promote to Python ints (object arrays) when ``limite`` does not fit int64."""
+    if limite > _INT64_MAX and (a.dtype != object or b.dtype != object):
+        return a.astype(object), b.astype(object)
+    return a, b
+
+
+class Coluna:
+    """Exact decimal column: ``valores / 10**escala``.
+
+    ``valores`` is an int64 array, promoted to Python ints when a result would
+    not fit.  ``excede`` marks items where some intermediate has more digits
+    than the decimal context precision (so Decimal would have rounded).
+    """
+    __slots__ = ("valores", "escala", "excede")
+
+    def __init__(self, valores, escala: int = 0, excede: Optional[np.ndarray] = None):
+        self.valores = np.asarray(valores)
+        if self.valores.dtype.kind not in "iuO":
+            raise TypeError(f"Coluna needs integer values, got {self.valores.dtype}")
+        self.escala = escala
+        self.excede = excede
+
+    @classmethod
+    def de_decimais(cls, valores) -> 'Coluna':
+        """Build a column from Decimal / int / str values (floats are rejected)."""
+        decimais = []
+        for valor in valores:
+            if isinstance(valor, float):
+                raise TypeError("float values are not exact, use Decimal or str")
+            valor = valor if isinstance(valor, Decimal) else Decimal(valor)
+            if not valor.is_finite():
+                raise ValueError(f"Invalid value: {valor}")
+            decimais.append(valor)
+
+        escala = max([-d.as_tuple().exponent for d in decimais] + [0])
+        inteiros = [int(d.scaleb(escala, context=CONTEXTO_EXATO)) for d in decimais]
+        try:
+            return cls(np.array(inteiros, dtype=np.int64), escala)
+        except OverflowError:
+            return cls(np.array(inteiros, dtype=object), escala)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def _na_escala(self, escala: int) -> np.ndarray:
+        if escala == self.escala:
+            return self.valores
+        fator = 10 ** (escala - self.escala)
+        valores = self.valores
+        if _maximo(valores) * fator > _INT64_MAX and valores.dtype != object:
+            valores = valores.astype(object)
+        return valores * fator
+
+    def _resultado(self, valores: np.ndarray, escala: int, *operandos: 'Coluna') -> 'Coluna':
+        excede = None
+        for operando in operandos:
+            if operando.excede is not None:
+                excede = operando.excede if excede is None else excede | operando.excede
+        limite = 10 ** getcontext().prec
+        if valores.dtype == object or limite <= _INT64_MAX:
+            fora = (np.abs(valores) >= limite).astype(bool)
+            if fora.any():
+                excede = fora if excede is None else excede | fora
+        return Coluna(valores, escala, excede)
+
+    def _soma(self, outra: 'Coluna', sinal: int) -> 'Coluna':
+        escala = max(self.escala, outra.escala)
+        a, b = self._na_escala(escala), outra._na_escala(escala)
+        a, b = _compativeis(a, b, _maximo(a) + _maximo(b))
+        return self._resultado(a + b if sinal > 0 else a - b, escala, self, outra)
+
+    def __add__(self, outra: 'Coluna') -> 'Coluna':
+        return self._soma(outra, 1)
+
+    def __sub__(self, outra: 'Coluna') -> 'Coluna':
+        return self._soma(outra, -1)
+
+    def __mul__(self, outra: 'Coluna') -> 'Coluna':
+        a, b = _compativeis(self.valores, outra.valores, _maximo(self.valores) * _maximo(outra.valores))
+        return self._resultado(a * b, self.escala + outra.escala, self, outra)
+
+    def divide_pot10(self, casas: int) -> 'Coluna':
+        """Exact division by ``10**casas`` (FEEL ``x / decimal(100)``)."""
+        return Coluna(self.valores, self.escala + casas, self.excede)
+
+    @staticmethod
+    def onde(mascara: np.ndarray, sim: 'Coluna', nao: 'Coluna') -> 'Coluna':
+        """Per item: ``sim`` where ``mascara`` is set, ``nao`` elsewhere."""
+        escala = max(sim.escala, nao.escala)
+        a, b = sim._na_escala(escala), nao._na_escala(escala)
+        if a.dtype != b.dtype:
+            a, b = a.astype(object), b.astype(object)
+        excede = None
+        if sim.excede is not None or nao.excede is not None:
+            falso = np.zeros(len(mascara), dtype=bool)
+            excede = np.where(
+                mascara,
+                falso if sim.excede is None else sim.excede,
+                falso if nao.excede is None else nao.excede
+            )
+        return Coluna(np.where(mascara, a, b), escala, excede)
+
+    def quantiza(self, casas: int = 2, arredondamento: str = ROUND_HALF_EVEN) -> 'Coluna':
+        """Round to ``casas`` decimal places (ROUND_HALF_EVEN, as the calculators)."""
+        if self.escala <= casas:
+            return Coluna(self._na_escala(casas).copy(), casas, self.excede)
+        divisor = 10 ** (self.escala - casas)
+        valores = self.valores
+        if divisor * 2 > _INT64_MAX and valores.dtype != object:
+            valores = valores.astype(object)
+        return Coluna(divide_arredondando(valores, divisor, arredondamento), casas, self.excede)
+
+    def decimais(self) -> List[Decimal]:
+        return [Decimal(f"{int(v)}E-{self.escala}") for v in self.valores]
+
+
+@dataclass
+class ResultadoColunar:
+    """Results per item, in cents (``Coluna`` with ``escala == 2``)."""
+    base_calculo_icms: Coluna
+    valor_icms: Coluna
+    base_calculo_ipi: Coluna
+    valor_ipi: Coluna
+    base_calculo_pis: Coluna
+    valor_pis: Coluna
+    base_calculo_cofins: Coluna
+    valor_cofins: Coluna
+    valor_fcp: Coluna
+    base_calculo_difal: Coluna
+    fcp_difal: Coluna
+    valor_difal: Coluna
+    valor_icms_destino: Coluna
+    valor_icms_origem: Coluna
+
+
+def _prepara(colunas: Mapping[str, Any]) -> Dict[str, Any]:
+    desconhecidos = set(colunas) - set(CAMPOS_COLUNARES)
+    if desconhecidos:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(desconhecidos))}")
+
+    def escalar(valor):
+        return isinstance(valor, (Decimal, int, str, bool))
+
+    tamanhos = {len(v) for v in colunas.values() if not escalar(v)}
+    if len(tamanhos) != 1:
+        raise ValueError("Columns must be non-scalar sequences of the same length")
+    n = tamanhos.pop()
+
+    entrada = {}
+    for nome in CAMPOS_COLUNARES:
+        valor = colunas.get(nome, _PADROES[nome])
+        if nome in _NUMERICOS:
+            if isinstance(valor, Coluna):
+                entrada[nome] = valor
+            elif isinstance(valor, np.ndarray) and valor.dtype.kind in "iu":
+                entrada[nome] = Coluna(valor.astype(np.int64))
+            elif escalar(valor):
+                unico = Coluna.de_decimais([valor])
+                entrada[nome] = Coluna(np.full(n, unico.valores[0], dtype=unico.valores.dtype), unico.escala)
+            else:
+                entrada[nome] = Coluna.de_decimais(valor)
+        elif nome in _FLAGS:
+            entrada[nome] = np.full(n, valor, dtype=bool) if escalar(valor) else np.asarray(valor, dtype=bool)
+        else:
+            entrada[nome] = np.full(n, valor, dtype=object) if escalar(valor) else np.asarray(valor, dtype=object)
+    entrada["n"] = n
+    return entrada
+
+
+def calcula_colunar(colunas: Mapping[str, Any]) -> ResultadoColunar:
+    """
+    Calculate ICMS, IPI, PIS, COFINS, FCP and DIFAL for every item at once.
+
+    Args:
+        colunas: Tributavel field name -> sequence of values (Decimal, int or
+            str), int numpy array, :class:`Coluna` or a scalar applied to all
+            items.  Missing fields take the Tributavel default.  Accepted
+            fields are listed in ``CAMPOS_COLUNARES``.
+
+    Returns:
+        ResultadoColunar with the results of each item rounded to cents
+    """
+    e = _prepara(colunas)
+    n = e["n"]
+
+    condicional = e["tipo_desconto"] == "Condicional"
+    if not (condicional | (e["tipo_desconto"] == "Incondicional")).all():
+        raise ValueError("No matching rule found for inputs: invalid tipo_desconto.")
+    ativo = e["is_ativo_imobilizado_ou_uso_consumo"]
+    deduz = e["deduz_icms_da_base_de_pis_cofins"]
+    um = Coluna(np.ones(n, dtype=np.int64))
+
+    def com_desconto(base):
+        # Condicional adds the discount, Incondicional subtracts it
+        return Coluna.onde(condicional, base + e["desconto"], base - e["desconto"])
+
+    def fator_reducao(percentual):
+        # (decimal(1) - (percentual / decimal(100)))
+        return um - percentual.divide_pot10(2)
+
+    def percentual_de(base, percentual):
+        return (base * percentual).divide_pot10(2)
+
+    # ( ( ( (valor_produto * quantidade_produto) + frete) + seguro) + outras_despesas)
+    bruto = (((e["valor_produto"] * e["quantidade_produto"]) + e["frete"]) + e["seguro"]) + e["outras_despesas"]
+    bruto_ipi = Coluna.onde(ativo, bruto + e["valor_ipi"], bruto)
+
+    # ICMS_CALC_RULE
+    base_icms = com_desconto(bruto_ipi) * fator_reducao(e["percentual_reducao"])
+    valor_icms = percentual_de(base_icms, e["percentual_icms"])
+
+    # IPI_CALC_RULE
+    base_ipi = com_desconto(bruto)
+    valor_ipi = percentual_de(base_ipi, e["percentual_ipi"])
+
+    # PIS_COFINS_CALC_RULE (ICMS deducted already rounded, as in CalculadoraPis)
+    icms_deduzido = valor_icms.quantiza(2)
+    bruto_pis_cofins = Coluna.onde(deduz, bruto_ipi - icms_deduzido, bruto_ipi)
+    base_pis = com_desconto(bruto_pis_cofins * fator_reducao(e["percentual_reducao_pis"]))
+    valor_pis = percentual_de(base_pis, e["percentual_pis"])
+    base_cofins = com_desconto(bruto_pis_cofins * fator_reducao(e["percentual_reducao_cofins"]))
+    valor_cofins = percentual_de(base_cofins, e["percentual_cofins"])
+
+    # FCP_CALC_RULE over the ICMS base
+    valor_fcp = percentual_de(base_icms, e["percentual_fcp"])
+
+    # DIFAL_CALC_RULE
+    base_difal = com_desconto(bruto_ipi)
+    fcp_difal = percentual_de(base_difal, e["percentual_fcp"])
+    valor_difal = percentual_de(base_difal, e["percentual_difal_interna"] - e["percentual_difal_interestadual"])
+    valor_icms_origem = Coluna(np.zeros(n, dtype=np.int64))
+
+    resultados = {
+        "base_calculo_icms": base_icms,
+        "valor_icms": valor_icms,
+        "base_calculo_ipi": base_ipi,
+        "valor_ipi": valor_ipi,
+        "base_calculo_pis": base_pis,
+        "valor_pis": valor_pis,
+        "base_calculo_cofins": base_cofins,
+        "valor_cofins": valor_cofins,
+        "valor_fcp": valor_fcp,
+        "base_calculo_difal": base_difal,
+        "fcp_difal": fcp_difal,
+        "valor_difal": valor_difal,
+        "valor_icms_destino": valor_difal,
+        "valor_icms_origem": valor_icms_origem,
+    }
+
+    inexatos = np.zeros(n, dtype=bool)
+    for coluna in resultados.values():
+        if coluna.excede is not None:
+            inexatos |= coluna.excede
+
+    resultados = {nome: coluna.quantiza(2) for nome, coluna in resultados.items()}
+    for indice in np.flatnonzero(inexatos):
+        _recalcula_decimal(e, int(indice), resultados)
+    return ResultadoColunar(**resultados)
+
+
+def _recalcula_decimal(e: Dict[str, Any], indice: int, resultados: Dict[str, Coluna]):
+    """Recalculate item ``indice`` with the Decimal calculators (Decimal would round)."""
+    from motor_tributario_py.taxes.icms import CalculadoraIcms
+    from motor_tributario_py.taxes.ipi import CalculadoraIpi
+    from motor_tributario_py.taxes.pis import CalculadoraPis
+    from motor_tributario_py.taxes.cofins import CalculadoraCofins
+    from motor_tributario_py.taxes.fcp import CalculadoraFcp
+    from motor_tributario_py.taxes.difal import CalculadoraDifal
+    from motor_tributario_py.utils.functions import register_feel_functions
+
+    register_feel_functions()
+    valores = {}
+    for nome in CAMPOS_COLUNARES:
+        if nome in _NUMERICOS:
+            coluna = e[nome]
+            valores[nome] = Decimal(f"{int(coluna.valores[indice])}E-{coluna.escala}")
+        elif nome in _FLAGS:
+            valores[nome] = bool(e[nome][indice])
+        else:
+            valores[nome] = e[nome][indice]
+    tributavel = Tributavel(**valores)
+
+    res_icms = CalculadoraIcms(tributavel).calcula()
+    res_ipi = CalculadoraIpi(tributavel).calcula()
+    valor_icms = res_icms.valor.quantize(Decimal('0.01')) if tributavel.deduz_icms_da_base_de_pis_cofins else None
+    res_pis = CalculadoraPis(tributavel).calcula(valor_icms=valor_icms)
+    res_cofins = CalculadoraCofins(tributavel).calcula(valor_icms=valor_icms)
+    res_fcp = CalculadoraFcp(tributavel).calcula(base_calculo_icms=res_icms.base_calculo)
+    res_difal = CalculadoraDifal(tributavel).calcula()
+
+    decimais = {
+        "base_calculo_icms": res_icms.base_calculo,
+        "valor_icms": res_icms.valor,
+        "base_calculo_ipi": res_ipi.base_calculo,
+        "valor_ipi": res_ipi.valor,
+        "base_calculo_pis": res_pis.base_calculo,
+        "valor_pis": res_pis.valor,
+        "base_calculo_cofins": res_cofins.base_calculo,
+        "valor_cofins": res_cofins.valor,
+        "valor_fcp": res_fcp.valor_fcp,
+        "base_calculo_difal": res_difal.base_calculo,
+        "fcp_difal": res_difal.fcp,
+        "valor_difal": res_difal.difal,
+        "valor_icms_destino": res_difal.valor_icms_destino,
+        "valor_icms_origem": res_difal.valor_icms_origem,
+    }
+    for nome, valor in decimais.items():
+        centavos = int(valor.quantize(Decimal('0.01')).scaleb(2))
+        coluna = resultados[nome]
+        if coluna.valores.dtype != object and abs(centavos) > _INT64_MAX:
+            coluna.valores = coluna.valores.astype(object)
+        coluna.valores[indice] = centavos
@@ -0,0 +1,136 @@
+"""
+Per-facade calculation context.
+
+Several calculations share the same intermediates: ICMS (base and value) is
+needed by FCP, Desonerado, PIS/COFINS (when ICMS is deducted) and ICMS ST,
+which also needs IPI.  ``ContextoCalculo`` memoizes those intermediates for
+the current state of the ``Tributavel``; any field change made by the
+caller invalidates the memo automatically (calculators never modify it).
+
+When the item has IPI but no ``valor_ipi``, ICMS ST calculates the IPI for
+its base, and some calculations see that value as ``valor_ipi`` (see
+:mod:`.grafo`).  :meth:`ContextoCalculo.visao` sets the ``valor_ipi`` a
+calculation sees; :meth:`ContextoCalculo.tributavel_calculo` hands the
+calculators a copy of the item with it, so the caller's ``Tributavel`` is
+left untouched.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional
+
+from motor_tributario_py.fixo import arredonda
+from motor_tributario_py.models import Tributavel, estado_tributavel
+
+if TYPE_CHECKING:
+    from motor_tributario_py.taxes.icms import ResultadoCalculoIcms
+    from motor_tributario_py.taxes.icms_st import ResultadoCalculoIcmsSt
+    from motor_tributario_py.taxes.ipi import ResultadoCalculoIpi
+
+
+class ContextoCalculo:
+    """Memoizes intermediate results for one ``Tributavel``.
+
+    Values handed out are shared with the memo; callers that modify a result
+    must copy it first.
+    """
+
+    def __init__(self, tributavel: Tributavel):
+        self.tributavel = tributavel
+        self._estado = None
+        self._memo: Dict[Hashable, Any] = {}
+        # valor_ipi seen by the calculation being evaluated (None: the informed one)
+        self._valor_ipi: Optional[Decimal] = None
+        self._visao_ativa = False
+        # (state, valor_ipi, copy of the Tributavel with it)
+        self._copia: Optional[tuple] = None
+
+    @contextmanager
+    def visao(self, valor_ipi: Callable[[], Optional[Decimal]]):
+        """Calculate with ``valor_ipi()`` as ``valor_ipi`` (None: the informed one).
+
+        Nested calculations keep the ``valor_ipi`` of the outermost one.
+        """
+        if self._visao_ativa:
+            yield
+            return
+        self._valor_ipi = valor_ipi()
+        self._visao_ativa = True
+        try:
+            yield
+        finally:
+            self._valor_ipi = None
+            self._visao_ativa = False
+
+    def tributavel_calculo(self) -> Tributavel:
+        """The Tributavel calculations see: the caller's, or a copy with the ``valor_ipi`` of the view."""
+        if self._valor_ipi is None:
+            return self.tributavel
+        estado = estado_tributavel(self.tributavel)
+        if self._copia is None or self._copia[0] != estado or self._copia[1] != self._valor_ipi:
+            self._copia = (estado, self._valor_ipi, self.tributavel.substitui(valor_ipi=self._valor_ipi))
+        return self._copia[2]
+
+    def memoriza(self, chave: Hashable, calcula: Callable[[], Any]) -> Any:
+        """Return the memoized value for ``chave`` in the current view, calculating it if needed."""
+        estado = estado_tributavel(self.tributavel)
+        if estado != self._estado:
+            self._memo = {}
+            self._estado = estado
+        chave = (chave, self._valor_ipi)
+        try:
+            return self._memo[chave]
+        except KeyError:
+            pass
+
+        valor = calcula()
+        self._memo[chave] = valor
+        return valor
+
+    def invalida(self):
+        self._estado = None
+        self._memo = {}
+        self._copia = None
+
+    def ipi(self) -> ResultadoCalculoIpi:
+        from motor_tributario_py.taxes.ipi import CalculadoraIpi
+
+        return self.memoriza("ipi", lambda: CalculadoraIpi(self.tributavel_calculo()).calcula())
+
+    def icms(self, ignore_ipi: bool = False) -> ResultadoCalculoIcms:
+        from motor_tributario_py.taxes.icms import CalculadoraIcms
+
+        # IPI only enters the ICMS base for ativo imobilizado / uso e consumo,
+        # so otherwise both variants are the same calculation.
+        ignore_ipi = ignore_ipi or self.tributavel.is_ativo_imobilizado_ou_uso_consumo is False
+        return self.memoriza(
+            ("icms", ignore_ipi),
+            lambda: CalculadoraIcms(self.tributavel_calculo()).calcula(ignore_ipi=ignore_ipi)
+        )
+
+    def valor_icms(self) -> Decimal:
+        """ICMS value rounded as used by the PIS/COFINS deduction."""
+        return arredonda(self.icms().valor)
+
+    def valor_ipi_st(self) -> Optional[Decimal]:
+        """``valor_ipi`` ICMS ST calculates for its base, None when it uses the informed one."""
+        from motor_tributario_py.taxes import icms_st
+
+        if self.tributavel.percentual_ipi > 0 and self.tributavel.valor_ipi == 0:
+            return icms_st.valor_ipi_st(self.tributavel, self.ipi())
+        return None
+
+    def icms_st(self) -> ResultadoCalculoIcmsSt:
+        from motor_tributario_py.taxes.icms_st import CalculadoraIcmsSt
+
+        def calcula():
+            tributavel = self.tributavel_calculo()
+            res_ipi = None
+            if tributavel.percentual_ipi > 0 and tributavel.valor_ipi == 0:
+                res_ipi = self.ipi()
+            return CalculadoraIcmsSt(tributavel).calcula(
+                res_ipi=res_ipi,
+                res_icms_proprio=self.icms(ignore_ipi=True)
+            )
+        return self.memoriza("icms_st", calcula)
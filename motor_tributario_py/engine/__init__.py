@@ -0,0 +1,225 @@
+"""
+Rule evaluation engine for motor_tributario_py.
+
+Every calculator evaluates its DMN tables through :func:`decide_single_table`,
+a drop-in replacement for ``bkflow_dmn.api.decide_single_table``.  By default
+tables are interpreted (with ``bkflow_dmn`` semantics, over FEEL parse trees
+cached by :mod:`.parse_cache`); :func:`set_compiled_rules` switches
+the calculators to the ahead-of-time compiled form (see :mod:`.compiler`).
+In both modes, tables whose inputs are only equalities with literals (the
+CST/CSOSN dispatch tables) are matched through a hash index (see :mod:`.index`)
+and single-row tables gated on ``dummy`` are folded (see :mod:`.folding`).
+:func:`set_zero_rules` skips their output columns that are provably zero for
+zero rates (see :mod:`.zeros`).  :func:`set_linear_rules` additionally
+evaluates the outputs that are affine in the line values (``valor_produto``,
+``frete``, ...) from coefficients derived once per profile (see :mod:`.linear`).
+
+The FEEL functions the rules call (``decimal``, ``apply_threshold``, ...)
+are registered once, on first evaluation; :func:`engine_ready` reports it.
+Prepared tables can be persisted and restored across processes with
+:func:`write_snapshot` / :func:`load_snapshot` (see :mod:`.snapshot`).
+
+Example:
+    >>> from motor_tributario_py import engine
+    >>> engine.set_compiled_rules(True)
+"""
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from bkflow_dmn.api import decide_single_table as _reference
+from motor_tributario_py.engine.analysis import TableAnalysis, analyze_rules, analyze_table
+from motor_tributario_py.engine.compiler import CompiledTable, CompileError, compile_table
+from motor_tributario_py.engine.folding import FoldedTable, fold_table
+from motor_tributario_py.engine.index import IndexedTable, index_table
+from motor_tributario_py.engine.interpreter import interpret as _interpret
+from motor_tributario_py.engine.linear import LINE_FACTS, AffineForm, LinearTable, affine_form, linear_table
+from motor_tributario_py.engine.parse_cache import PARSE_CACHE, ParseCache, parse_cache_info
+from motor_tributario_py.engine.snapshot import load_snapshot, rules_hash, write_snapshot
+from motor_tributario_py.engine.zeros import zero_factors, zero_guards
+from motor_tributario_py.utils.functions import FEEL_BOOTSTRAP, register_feel_functions
+
+_compiled_enabled = False
+_linear_enabled = False
+_zeros_enabled = False
+_fixed_point_enabled = False
+_local = threading.local()
+# id(table) -> (table, CompiledTable or None when the table is not compilable)
+_compiled_tables: Dict[int, tuple] = {}
+# id(table) -> (table, FoldedTable, IndexedTable or None when the table is not indexable)
+_indexed_tables: Dict[int, tuple] = {}
+# id(table) -> (table, LinearTable or None when no output is affine in the line facts)
+_linear_tables: Dict[int, tuple] = {}
+
+
+def set_compiled_rules(enabled: bool = True) -> None:
+    """Switch calculators between compiled (True) and interpreted (False) rules."""
+    global _compiled_enabled
+    _compiled_enabled = bool(enabled)
+
+
+def compiled_rules_enabled() -> bool:
+    return _compiled_enabled
+
+
+def set_linear_rules(enabled: bool = True) -> None:
+    """Evaluate outputs affine in the line values from per-profile coefficients (True) or not (False)."""
+    global _linear_enabled
+    _linear_enabled = bool(enabled)
+
+
+def linear_rules_enabled() -> bool:
+    return _linear_enabled
+
+
+def set_zero_rules(enabled: bool = True) -> None:
+    """Skip output columns that are provably zero for the facts (True) or evaluate them (False)."""
+    global _zeros_enabled
+    _zeros_enabled = bool(enabled)
+
+
+def zero_rules_enabled() -> bool:
+    return _zeros_enabled
+
+
+def set_fixed_point_rounding(enabled: bool = True) -> None:
+    """Round the calculators' values with scaled integers (``fixo.quantiza``, True) or ``Decimal.quantize``."""
+    global _fixed_point_enabled
+    _fixed_point_enabled = bool(enabled)
+
+
+def fixed_point_rounding_enabled() -> bool:
+    return _fixed_point_enabled
+
+
+@contextmanager
+def reference_interpreter():
+    """Force ``bkflow_dmn`` interpretation in the current thread (used by audits)."""
+    previous = getattr(_local, "reference", False)
+    _local.reference = True
+    try:
+        yield
+    finally:
+        _local.reference = previous
+
+
+def engine_ready() -> bool:
+    """True once the FEEL functions the rules call are registered (on first evaluation)."""
+    return FEEL_BOOTSTRAP.ready
+
+
+def get_compiled(table: Dict[str, Any]):
+    """Return the cached :class:`CompiledTable` for ``table`` (None if not compilable)."""
+    entry = _compiled_tables.get(id(table))
+    if entry is None or entry[0] is not table:
+        register_feel_functions()
+        try:
+            compiled = compile_table(table, certified=analyze_table(table).certified)
+        except CompileError:
+            compiled = None
+        # Keep a reference to the table so its id() is never reused
+        entry = (table, compiled)
+        _compiled_tables[id(table)] = entry
+    return entry[1]
+
+
+def get_indexed(table: Dict[str, Any]):
+    """Return the cached :class:`FoldedTable` or :class:`IndexedTable` for ``table`` (None if not indexable)."""
+    entry = _indexed_tables.get(id(table))
+    if entry is None or entry[0] is not table:
+        register_feel_functions()
+        try:
+            indexed = index_table(table)
+        except CompileError:
+            indexed = None
+        if indexed is not None:
+            indexed = fold_table(indexed) or indexed
+        entry = (table, indexed)
+        _indexed_tables[id(table)] = entry
+    return entry[1]
+
+
+def get_linear(table: Dict[str, Any]):
+    """LinearTable for ``table``, or None when it is not indexed or reads no line value linearly."""
+    entry = _linear_tables.get(id(table))
+    if entry is None or entry[0] is not table:
+        indexed = get_indexed(table)
+        linear = linear_table(indexed) if indexed is not None else None
+        entry = (table, linear)
+        _linear_tables[id(table)] = entry
+    return entry[1]
+
+
+def install_prepared(table: Dict[str, Any], indexed, compiled) -> None:
+    """Use already prepared forms of ``table`` (e.g. restored by :func:`load_snapshot`)."""
+    _indexed_tables[id(table)] = (table, indexed)
+    _compiled_tables[id(table)] = (table, compiled)
+    _linear_tables.pop(id(table), None)
+
+
+def decide_single_table(decision_table: Dict[str, Any], facts: Dict[str, Any], strict_mode: bool = True) -> List[Dict[str, Any]]:
+    """Evaluate a decision table, compiled or interpreted depending on the engine mode."""
+    if not FEEL_BOOTSTRAP.ready:
+        FEEL_BOOTSTRAP.ensure()
+    if getattr(_local, "reference", False):
+        return _reference(decision_table, facts, strict_mode=strict_mode)
+    if _linear_enabled:
+        linear = get_linear(decision_table)
+        if linear is not None:
+            result = linear(facts)
+            if result is not None:
+                return result
+    indexed = get_indexed(decision_table)
+    if indexed is not None:
+        result = indexed(facts, strict_mode, _compiled_enabled, _zeros_enabled)
+        if result is not None:
+            return result
+        # A fact of another type than the table's literals: the interpreter reports it
+        return _interpret(decision_table, facts, strict_mode=strict_mode)
+    if _compiled_enabled:
+        compiled = get_compiled(decision_table)
+        if compiled is not None:
+            return compiled(facts, strict_mode)
+    return _interpret(decision_table, facts, strict_mode=strict_mode)
+
+
+__all__ = [
+    "AffineForm",
+    "CompiledTable",
+    "CompileError",
+    "FoldedTable",
+    "IndexedTable",
+    "LINE_FACTS",
+    "LinearTable",
+    "PARSE_CACHE",
+    "ParseCache",
+    "TableAnalysis",
+    "affine_form",
+    "analyze_rules",
+    "analyze_table",
+    "compile_table",
+    "compiled_rules_enabled",
+    "decide_single_table",
+    "engine_ready",
+    "fixed_point_rounding_enabled",
+    "fold_table",
+    "get_compiled",
+    "get_indexed",
+    "get_linear",
+    "index_table",
+    "install_prepared",
+    "linear_rules_enabled",
+    "linear_table",
+    "load_snapshot",
+    "parse_cache_info",
+    "reference_interpreter",
+    "rules_hash",
+    "set_compiled_rules",
+    "set_fixed_point_rounding",
+    "set_linear_rules",
+    "set_zero_rules",
+    "write_snapshot",
+    "zero_rules_enabled",
+    "zero_factors",
+    "zero_guards",
+]
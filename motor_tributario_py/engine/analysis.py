@@ -0,0 +1,209 @@
+"""
+Load-time static analysis of decision tables.
+
+:func:`analyze_table` splits the domain of each input column into atoms
+(the literals a column is compared with, or the intervals between the
+constants of its comparisons) and checks every combination of atoms against
+the rows:
+
+- **overlaps**: pairs of rows that can match the same facts;
+- **gaps**: combinations no row matches (the table is not complete);
+- **unreachable** rows: rows that can never match (for ``First``, also rows
+  entirely shadowed by earlier rows).
+
+String and number columns compared with literals have an open domain (any
+other value, :data:`OTHER`, matches no row) unless listed in
+:data:`DOMAINS`; boolean columns are ``true``/``false``.
+
+A ``Unique`` table without overlaps is *certified*: at most one row can
+match, so the interpreter and the compiler evaluate it in first-match mode,
+without counting matches on every call.  Tables using tests the analyzer
+does not understand are simply not certified.
+"""
+import importlib
+import pkgutil
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import product
+from typing import Any, Dict, List, Tuple
+
+from bkflow_dmn.data_model import SingleDecisionTable, TableUnitHandler
+from bkflow_feel import parsers as feel_ast
+
+from motor_tributario_py.engine.compiler import parse_feel
+from motor_tributario_py.engine.index import equality_literals, has_variables
+from motor_tributario_py.utils.functions import register_feel_functions
+
+# Closed domains of string columns, as documented in Tributavel
+DOMAINS: Dict[str, Tuple[Any, ...]] = {
+    "tipo_desconto": ("Condicional", "Incondicional"),
+}
+# Larger input spaces are not analyzed
+MAX_COMBINATIONS = 4096
+
+_COMPARISONS = ("equal", "less_than", "greater_than", "less_than_or_equal", "greater_than_or_equal")
+
+
+class _Other:
+    def __repr__(self):
+        return "<other>"
+
+
+# Any value of an open-domain column not listed in the table
+OTHER = _Other()
+
+
+class _Unanalyzable(Exception):
+    pass
+
+
+@dataclass
+class TableAnalysis:
+    """Result of :func:`analyze_table`; row numbers are 0-based."""
+    title: str
+    hit_policy: str
+    analyzable: bool
+    reason: str = ""
+    overlaps: List[Tuple[int, int]] = field(default_factory=list)
+    gaps: List[Dict[str, Any]] = field(default_factory=list)
+    unreachable: List[int] = field(default_factory=list)
+
+    @property
+    def non_overlapping(self) -> bool:
+        return self.analyzable and not self.overlaps
+
+    @property
+    def complete(self) -> bool:
+        return self.analyzable and not self.gaps
+
+    @property
+    def certified(self) -> bool:
+        """True for ``Unique`` tables proven to have at most one matching row."""
+        return self.hit_policy == "Unique" and self.non_overlapping
+
+
+def _comparison_bound(node, col_id: str):
+    """Constant compared with ``col_id`` in ``col_id <op> constant``, else raise."""
+    if isinstance(node, feel_ast.Expr):
+        return _comparison_bound(node.value, col_id)
+    if (
+        isinstance(node, feel_ast.SameTypeBinaryOperator)
+        and node.operation in _COMPARISONS
+        and isinstance(node.left, feel_ast.Variable)
+        and node.left.name == col_id
+        and not has_variables(node.right)
+    ):
+        bound = node.right.evaluate({})
+        if isinstance(bound, (int, Decimal)) and not isinstance(bound, bool):
+            return Decimal(bound)
+    raise _Unanalyzable(f"unsupported input test on {col_id!r}")
+
+
+def _column_atoms(col_id: str, tests: List[Any]) -> Tuple[List[Any], List[set]]:
+    """Atoms of a column's domain and, per row, the indices of the atoms its test matches."""
+    every = [test for test in tests if test is not None]
+    literals = [equality_literals(test, col_id) for test in every]
+
+    if all(values is not None for values in literals):
+        seen = [value for values in literals for value in values]
+        if col_id in DOMAINS:
+            atoms = list(DOMAINS[col_id]) + [value for value in seen if value not in DOMAINS[col_id]]
+        elif seen and all(isinstance(value, bool) for value in seen):
+            atoms = [True, False]
+        else:
+            atoms = list(dict.fromkeys(seen)) + [OTHER]
+        matched = []
+        for test in tests:
+            if test is None:
+                matched.append(set(range(len(atoms))))
+            else:
+                values = equality_literals(test, col_id)
+                matched.append({i for i, atom in enumerate(atoms) if atom is not OTHER and atom in values})
+        return atoms, matched
+
+    # Numeric comparisons: one atom per constant and per interval between them
+    bounds = sorted(set(_comparison_bound(test, col_id) for test in every))
+    atoms = [bounds[0] - 1]
+    for lower, upper in zip(bounds, bounds[1:]):
+        atoms += [lower, (lower + upper) / 2]
+    atoms += [bounds[-1], bounds[-1] + 1]
+    matched = []
+    for test in tests:
+        if test is None:
+            matched.append(set(range(len(atoms))))
+        else:
+            matched.append({i for i, atom in enumerate(atoms) if test.evaluate({col_id: atom}) is True})
+    return atoms, matched
+
+
+def analyze_table(table: Dict[str, Any]) -> TableAnalysis:
+    """Check a DMN table dict (as found in ``rules/``) for overlaps, gaps and unreachable rows."""
+    model = SingleDecisionTable(**table)
+    analysis = TableAnalysis(model.title, model.hit_policy_value, analyzable=False)
+    col_ids = model.inputs.col_ids
+    rows = model.inputs.rows
+    if any(isinstance(row, str) or len(row) != len(col_ids) for row in rows):
+        analysis.reason = "rows are not one test per input column"
+        return analysis
+
+    register_feel_functions()
+    try:
+        columns = []
+        for position, col_id in enumerate(col_ids):
+            tests = []
+            for row in rows:
+                unit = row[position].strip()
+                expanded = TableUnitHandler(unit_exp=unit, col_id=col_id).get_handled_exp() if unit else None
+                tests.append(parse_feel(expanded) if expanded else None)
+            columns.append(_column_atoms(col_id, tests))
+    except _Unanalyzable as e:
+        analysis.reason = str(e)
+        return analysis
+    except Exception as e:  # invalid FEEL, a comparison raising on a sample value, ...
+        analysis.reason = f"input tests could not be evaluated: {e}"
+        return analysis
+
+    total = 1
+    for atoms, _ in columns:
+        total *= len(atoms)
+    if total > MAX_COMBINATIONS:
+        analysis.reason = f"{total} input combinations"
+        return analysis
+
+    analysis.analyzable = True
+    regions = [[matched[row] for _, matched in columns] for row in range(len(rows))]
+    for first in range(len(rows)):
+        for second in range(first + 1, len(rows)):
+            if all(a & b for a, b in zip(regions[first], regions[second])):
+                analysis.overlaps.append((first, second))
+
+    covered = set()
+    for row, region in enumerate(regions):
+        combinations = set(product(*region))
+        if not combinations or (analysis.hit_policy == "First" and combinations <= covered):
+            analysis.unreachable.append(row)
+        covered |= combinations
+    for combination in product(*(range(len(atoms)) for atoms, _ in columns)):
+        if combination not in covered:
+            analysis.gaps.append({
+                col_id: atoms[index] for col_id, (atoms, _), index in zip(col_ids, columns, combination)
+            })
+    return analysis
+
+
+def rule_tables() -> Dict[str, Dict[str, Any]]:
+    """Every table of the ``motor_tributario_py.rules`` modules, keyed by ``module.NAME``."""
+    from motor_tributario_py import rules
+
+    result = {}
+    for module_info in pkgutil.iter_modules(rules.__path__):
+        module = importlib.import_module(f"{rules.__name__}.{module_info.name}")
+        for name, value in vars(module).items():
+            if isinstance(value, dict) and "hit_policy" in value and "inputs" in value:
+                result[f"{module_info.name}.{name}"] = value
+    return result
+
+
+def analyze_rules() -> Dict[str, TableAnalysis]:
+    """Analyze every table of the ``motor_tributario_py.rules`` modules, keyed by ``module.NAME``."""
+    return {key: analyze_table(table) for key, table in rule_tables().items()}
@@ -0,0 +1,314 @@
+"""
+Ahead-of-time compiler for the DMN decision tables in ``rules/``.
+
+``bkflow_dmn.api.decide_single_table`` parses every FEEL string of a table
+(inputs and outputs of *all* rows) on each call.  The compiler translates a
+table once into plain Python source, so evaluating it becomes a regular
+function call over the facts dict.
+
+The generated function keeps the contract of ``decide_single_table``:
+
+- input units are expanded exactly like ``SingleDecisionTable`` does
+  (``'"Condicional"'`` -> ``tipo_desconto="Condicional"``, empty cell = any);
+- the hit policy (and ``strict_mode`` checks) produce the same result list
+  and raise the same ``HitPolicyMatchError``;
+- FEEL functions registered in ``FEELFunctionsManager`` (``decimal``,
+  ``apply_threshold``, ``check_threshold``) are bound once at compile time.
+
+Only the matched row's outputs are evaluated, and subexpressions repeated
+across its output columns are computed once (see :mod:`.dag`).  Tables using FEEL constructs
+the compiler does not translate raise :class:`CompileError`; the engine then
+keeps evaluating them with the reference interpreter.
+"""
+import re
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bkflow_dmn.data_model import SingleDecisionTable
+from bkflow_dmn.exception import HitPolicyMatchError
+from bkflow_dmn.hit_policy import get_hit_policy
+from bkflow_feel import parsers as feel_ast
+from bkflow_feel.utils import FEELFunctionsManager
+
+from motor_tributario_py.engine.dag import node_key, repeated_subexpressions
+from motor_tributario_py.engine.parse_cache import PARSE_CACHE
+
+
+class CompileError(Exception):
+    """Raised when a decision table cannot be translated to Python."""
+
+
+_BINARY_OPERATORS = {
+    "add": "+",
+    "subtract": "-",
+    "multiply": "*",
+    "divide": "/",
+    "power": "**",
+    "equal": "==",
+    "less_than": "<",
+    "greater_than": ">",
+    "less_than_or_equal": "<=",
+    "greater_than_or_equal": ">=",
+}
+
+
+def parse_feel(source: str) -> feel_ast.Expression:
+    """Parse a FEEL string into the ``bkflow_feel`` expression tree (cached, do not modify it)."""
+    node = PARSE_CACHE.get(source)
+    if not isinstance(node, feel_ast.Expression):
+        raise CompileError(f"Invalid FEEL expression: {source}")
+    return node
+
+
+class _ExpressionTranslator:
+    """Translates FEEL expression trees into Python expressions.
+
+    Collects the facts (variables) and FEEL functions referenced so the
+    table compiler can bind them once per call / once per table.
+    """
+
+    def __init__(self, prefix: str = ""):
+        # Prepended to every generated local, so several translations can share a function
+        self.prefix = prefix
+        self.variables: Dict[str, str] = {}
+        self.functions: Dict[str, str] = {}
+        # Shared subexpression key -> local (None until assigned), see translate_row
+        self._shared: Dict[tuple, Optional[str]] = {}
+        self._assignments: List[str] = []
+
+    def translate(self, source: str) -> str:
+        return self.visit(parse_feel(source))
+
+    def translate_row(self, sources: List[str]) -> Tuple[List[str], List[str]]:
+        """Translate the outputs of a row, computing repeated subexpressions once.
+
+        Returns the ``local = expression`` assignments to run first and the
+        output expressions.
+        """
+        trees = [parse_feel(source) for source in sources]
+        self._shared = dict.fromkeys(repeated_subexpressions(trees))
+        self._assignments = []
+        try:
+            expressions = [self.visit(tree) for tree in trees]
+            return self._assignments, expressions
+        finally:
+            self._shared = {}
+
+    def visit(self, node) -> str:
+        if self._shared and not isinstance(node, feel_ast.Expr):
+            key = node_key(node)
+            if key in self._shared:
+                if self._shared[key] is None:
+                    expression = self._visit(node)
+                    local = f"{self.prefix}t_{len(self._assignments)}"
+                    self._assignments.append(f"{local} = {expression}")
+                    self._shared[key] = local
+                return self._shared[key]
+        return self._visit(node)
+
+    def _visit(self, node) -> str:
+        # Order matters: several node types share CommonExpression
+        if isinstance(node, feel_ast.Expr):
+            return self.visit(node.value)
+        if isinstance(node, (feel_ast.Number, feel_ast.String, feel_ast.Boolean)):
+            return repr(node.value)
+        if isinstance(node, feel_ast.Null):
+            return "None"
+        if isinstance(node, feel_ast.Variable):
+            return self._variable(node.name)
+        if isinstance(node, feel_ast.SameTypeBinaryOperator):
+            operator = _BINARY_OPERATORS.get(node.operation)
+            if operator is None:
+                raise CompileError(f"Unsupported FEEL operation: {node.operation}")
+            return f"({self.visit(node.left)} {operator} {self.visit(node.right)})"
+        if isinstance(node, feel_ast.NotEqual):
+            return f"({self.visit(node.left)} != {self.visit(node.right)})"
+        if isinstance(node, feel_ast.And):
+            return f"({self.visit(node.left)} and {self.visit(node.right)})"
+        if isinstance(node, feel_ast.Or):
+            return f"({self.visit(node.left)} or {self.visit(node.right)})"
+        if isinstance(node, feel_ast.Not):
+            return f"(not {self.visit(node.value)})"
+        if isinstance(node, feel_ast.FuncInvocation):
+            return self._invocation(node)
+        raise CompileError(f"Unsupported FEEL construct: {type(node).__name__}")
+
+    def _variable(self, name: str) -> str:
+        if name not in self.variables:
+            local = self.prefix + "v_" + re.sub(r"\W", "_", name)
+            if local in self.variables.values():
+                local = f"{local}_{len(self.variables)}"
+            self.variables[name] = local
+        return self.variables[name]
+
+    def _invocation(self, node) -> str:
+        if node.func_name not in self.functions:
+            self.functions[node.func_name] = f"{self.prefix}f_{len(self.functions)}"
+        func = self.functions[node.func_name]
+        if node.args:
+            args = ", ".join(self.visit(arg) for arg in node.args)
+        else:
+            args = ", ".join(f"{key}={self.visit(arg)}" for key, arg in node.named_args.items())
+        return f"{func}({args})"
+
+
+class CompiledTable:
+    """A decision table translated to a Python function.
+
+    Calling it is equivalent to ``decide_single_table(table, facts, strict_mode)``.
+    Pickling keeps the source and the FEEL functions it calls (local -> FEEL
+    name); unpickling executes the source again.
+    """
+
+    def __init__(self, title: str, hit_policy: str, source: str, functions: Dict[str, str]):
+        self.title = title
+        self.hit_policy = hit_policy
+        self.source = source
+        self.functions = functions
+        namespace = {
+            "Decimal": Decimal,
+            "HitPolicyMatchError": HitPolicyMatchError,
+            "finish": _finish,
+        }
+        for local, name in functions.items():
+            namespace[local] = _resolve_function(name)
+        exec(compile(source, f"<rule {title}>", "exec"), namespace)
+        self._function = namespace["decide"]
+
+    def __getstate__(self):
+        return {"title": self.title, "hit_policy": self.hit_policy, "source": self.source, "functions": self.functions}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __call__(self, facts: Dict[str, Any], strict_mode: bool = True) -> List[Dict[str, Any]]:
+        return self._function(facts, strict_mode)
+
+    def __repr__(self):
+        return f"<CompiledTable {self.title!r} ({self.hit_policy})>"
+
+
+def _finish(hit_policy: str, strict_mode: bool, col_ids, matches, outputs):
+    """Generic hit-policy tail, mirrors ``SingleDecisionTable.decide``."""
+    policy = get_hit_policy(hit_policy, strict_mode=strict_mode)
+    result = policy(list(matches), outputs)
+    if policy.multiple_output():
+        return [dict(zip(col_ids, row)) for row in result]
+    if result:
+        return [dict(zip(col_ids, result))]
+    return []
+
+
+def _row_output(col_ids, expressions) -> str:
+    return "{" + ", ".join(f"{col!r}: {expr}" for col, expr in zip(col_ids, expressions)) + "}"
+
+
+def _resolve_function(name: str) -> Callable:
+    try:
+        return FEELFunctionsManager.get_func(name)
+    except Exception as e:
+        raise CompileError(f"FEEL function {name!r} is not registered") from e
+
+
+def compile_expressions(col_ids: List[str], sources: List[str], name: str = "outputs") -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Compile one row of output expressions into ``f(facts) -> {col: value}``."""
+    translator = _ExpressionTranslator()
+    assignments, expressions = translator.translate_row(sources)
+    lines = ["def evaluate(facts):", "    get = facts.get"]
+    for variable, local in translator.variables.items():
+        lines.append(f"    {local} = get({variable!r})")
+    lines += [f"    {assignment}" for assignment in assignments]
+    lines.append(f"    return {_row_output(col_ids, expressions)}")
+
+    namespace = {"Decimal": Decimal}
+    for function, local in translator.functions.items():
+        namespace[local] = _resolve_function(function)
+    exec(compile("\n".join(lines) + "\n", f"<{name}>", "exec"), namespace)
+    return namespace["evaluate"]
+
+
+def inline_expressions(sources: List[str], prefix: str) -> Tuple[Dict[str, str], Dict[str, Callable], List[str], List[str]]:
+    """Translate a row of output expressions for inlining into generated code.
+
+    Returns the facts to bind (fact name -> local), the FEEL functions
+    (local -> function), the ``local = expression`` assignments of the shared
+    subexpressions and the output expressions.  Every local starts with
+    ``prefix``.
+    """
+    translator = _ExpressionTranslator(prefix)
+    assignments, expressions = translator.translate_row(sources)
+    functions = {local: _resolve_function(function) for function, local in translator.functions.items()}
+    return dict(translator.variables), functions, assignments, expressions
+
+
+def compile_table(table: Dict[str, Any], certified: bool = False) -> CompiledTable:
+    """Compile a DMN table dict (as found in ``rules/``) into a :class:`CompiledTable`.
+
+    ``certified`` (see :func:`.analysis.analyze_table`) promises that no two
+    rows of a ``Unique`` table can match the same facts: the function then
+    returns at the first matching row instead of counting matches.
+    """
+    model = SingleDecisionTable(**table)
+    col_ids = model.outputs.col_ids
+    hit_policy = model.hit_policy_value
+    translator = _ExpressionTranslator()
+
+    conditions = []
+    for row in model.feel_exp_of_inputs:
+        tests = [translator.translate(unit) for unit in row]
+        conditions.append(f"bool({' and '.join(tests)})" if tests else "True")
+
+    rows = []
+    for row in model.outputs.rows:
+        if isinstance(row, str):
+            row = [row]
+        if hit_policy in ("Unique", "First"):
+            rows.append(translator.translate_row(row))
+        else:
+            rows.append(([], [translator.translate(unit) for unit in row]))
+
+    lines = ["def decide(facts, strict_mode=True):", "    get = facts.get"]
+    for name, local in translator.variables.items():
+        lines.append(f"    {local} = get({name!r})")
+
+    if certified and hit_policy == "Unique":
+        for condition, (assignments, expressions) in zip(conditions, rows):
+            lines.append(f"    if {condition}:")
+            lines += [f"        {assignment}" for assignment in assignments]
+            lines.append(f"        return [{_row_output(col_ids, expressions)}]")
+        lines += [
+            "    if strict_mode:",
+            "        raise HitPolicyMatchError('Unique Hit Policy requires exactly one True result')",
+            "    return []",
+        ]
+    elif hit_policy in ("Unique", "First"):
+        lines.append(f"    matches = ({', '.join(conditions)},)")
+        if hit_policy == "Unique":
+            lines += [
+                "    if strict_mode and matches.count(True) != 1:",
+                "        raise HitPolicyMatchError('Unique Hit Policy requires exactly one True result')",
+            ]
+        else:
+            lines += [
+                "    if strict_mode and True not in matches:",
+                "        raise HitPolicyMatchError('First Hit Policy requires at least one True result')",
+            ]
+        for idx, (assignments, expressions) in enumerate(rows):
+            lines.append(f"    if matches[{idx}]:")
+            lines += [f"        {assignment}" for assignment in assignments]
+            lines.append(f"        return [{_row_output(col_ids, expressions)}]")
+        lines.append("    return []")
+    else:
+        lines.append(f"    matches = ({', '.join(conditions)},)")
+        outputs = ", ".join(
+            f"([{', '.join(expressions)}] if matches[{idx}] else None)"
+            for idx, (_, expressions) in enumerate(rows)
+        )
+        lines += [
+            f"    outputs = [{outputs}]",
+            f"    return finish({hit_policy!r}, strict_mode, {col_ids!r}, matches, outputs)",
+        ]
+
+    source = "\n".join(lines) + "\n"
+    functions = {local: name for name, local in translator.functions.items()}
+    return CompiledTable(model.title, hit_policy, source, functions)
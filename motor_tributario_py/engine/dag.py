@@ -0,0 +1,139 @@
+"""
+Common-subexpression elimination across the output columns of a rule row.
+
+The calculation tables re-derive the same base in every output column, e.g.
+each of the five ``DIFAL_CALC_RULE`` outputs starts from
+``((valor_produto * quantidade_produto) + frete + seguro + ...)``.  Subtrees
+that appear more than once in a row (compared structurally with
+:func:`node_key`) are evaluated once per call and reused:
+
+* :class:`RowDag` evaluates a row with the ``bkflow_feel`` expression nodes
+  (interpreted mode);
+* the compiler hoists the same subtrees into locals (compiled mode, see
+  :meth:`.compiler._ExpressionTranslator.translate_row`).
+
+Operands of ``and``/``or`` are never shared, since they may not be evaluated.
+"""
+import copy
+from collections import Counter
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Set
+
+from bkflow_feel import parsers as feel_ast
+
+_LEAVES = (feel_ast.Variable, feel_ast.Number, feel_ast.String, feel_ast.Boolean, feel_ast.Null)
+_SHORT_CIRCUIT = (feel_ast.And, feel_ast.Or)
+
+
+def _key_of(value):
+    if isinstance(value, feel_ast.Expression):
+        return node_key(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_of(item) for item in value)
+    if isinstance(value, dict):
+        return tuple((name, _key_of(item)) for name, item in value.items())
+    if isinstance(value, Decimal):
+        # Decimal("1") == Decimal("1.0") but they are different literals
+        return ("Decimal", str(value))
+    return (type(value).__name__, value)
+
+
+def node_key(node: feel_ast.Expression) -> tuple:
+    """Hashable structural key: equal keys mean the same FEEL expression."""
+    if isinstance(node, feel_ast.Expr):
+        return node_key(node.value)
+    return (type(node).__name__,) + tuple((name, _key_of(value)) for name, value in sorted(vars(node).items()))
+
+
+def _children(node) -> Iterable[feel_ast.Expression]:
+    for value in vars(node).values():
+        if isinstance(value, feel_ast.Expression):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            yield from (item for item in value if isinstance(item, feel_ast.Expression))
+        elif isinstance(value, dict):
+            yield from (item for item in value.values() if isinstance(item, feel_ast.Expression))
+
+
+def repeated_subexpressions(trees: Iterable[feel_ast.Expression]) -> Set[tuple]:
+    """Keys of the non-trivial subtrees that appear more than once in ``trees``."""
+    counts = Counter()
+
+    def count(node):
+        if isinstance(node, feel_ast.Expr):
+            return count(node.value)
+        if isinstance(node, _LEAVES):
+            return
+        key = node_key(node)
+        counts[key] += 1
+        # The parts of a repeated subtree are shared along with it
+        if counts[key] > 1 or isinstance(node, _SHORT_CIRCUIT):
+            return
+        for child in _children(node):
+            count(child)
+
+    for tree in trees:
+        count(tree)
+    return {key for key, total in counts.items() if total > 1}
+
+
+class SharedValue(feel_ast.Expression):
+    """Placeholder for a subtree evaluated once per row (see :class:`RowDag`)."""
+
+    def __init__(self, slot: int):
+        self.slot = slot
+
+    def evaluate(self, context):
+        return context.shared[self.slot]
+
+
+class _RowContext(dict):
+    """The facts plus the values of the shared subtrees."""
+    __slots__ = ("shared",)
+
+
+class RowDag:
+    """The output expressions of a row, with repeated subtrees evaluated once.
+
+    Calling it returns ``{col: value}`` like evaluating every output with
+    ``bkflow_feel.api.parse_expression``.
+    """
+
+    def __init__(self, col_ids: List[str], trees: List[feel_ast.Expression]):
+        self.col_ids = col_ids
+        self._repeated = repeated_subexpressions(trees)
+        self._slots: Dict[tuple, int] = {}
+        # Shared subtrees in evaluation order (inner ones first)
+        self.shared: List[feel_ast.Expression] = []
+        self.outputs = [self._rewrite(tree) for tree in trees]
+        del self._repeated, self._slots
+
+    def _rewrite(self, node):
+        if isinstance(node, feel_ast.Expr):
+            return self._rewrite(node.value)
+        if isinstance(node, _LEAVES) or not isinstance(node, feel_ast.Expression):
+            return node
+        key = node_key(node)
+        if key in self._slots:
+            return SharedValue(self._slots[key])
+        rebuilt = copy.copy(node)
+        if not isinstance(node, _SHORT_CIRCUIT):
+            for name, value in vars(node).items():
+                if isinstance(value, feel_ast.Expression):
+                    setattr(rebuilt, name, self._rewrite(value))
+                elif isinstance(value, (list, tuple)):
+                    setattr(rebuilt, name, type(value)(self._rewrite(item) for item in value))
+                elif isinstance(value, dict):
+                    setattr(rebuilt, name, {k: self._rewrite(item) for k, item in value.items()})
+        if key not in self._repeated:
+            return rebuilt
+        self._slots[key] = len(self.shared)
+        self.shared.append(rebuilt)
+        return SharedValue(self._slots[key])
+
+    def __call__(self, facts: Dict[str, Any]) -> Dict[str, Any]:
+        context = _RowContext(facts)
+        context.shared = values = []
+        for node in self.shared:
+            values.append(node.evaluate(context))
+        return {col: tree.evaluate(context) for col, tree in zip(self.col_ids, self.outputs)}
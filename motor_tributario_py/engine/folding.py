@@ -0,0 +1,59 @@
+"""
+Constant folding for single-row, always-true decision tables.
+
+Several tables have one row gated on the ``dummy`` input, which every
+calculator sets to ``1`` (``IBPT_CALC_RULE``, ``FCP_CALC_RULE``, the IBS/CBS
+tables, ...).  :func:`fold_table` recognizes them from their
+:class:`~.index.IndexedTable`: the match phase is skipped when the gate facts
+have their usual value, and outputs that read no fact (e.g.
+``CREDITO_ICMS_PREPROCESSING_RULE``, which has no real input at all) are
+evaluated once at load time and only copied per call.
+
+Any other gate value (or type, e.g. ``Decimal('1')``) goes through the
+index, so results and errors are the same as ``decide_single_table``.
+"""
+from typing import Any, Dict, List, Optional
+
+from motor_tributario_py.engine.index import IndexedTable
+
+# Input columns that only gate a table, with the value calculators pass
+GATE_COLUMNS: Dict[str, Any] = {"dummy": 1}
+
+
+class FoldedTable:
+    """A table whose only row always matches for the usual gate facts."""
+
+    def __init__(self, indexed: IndexedTable, gates: Dict[str, Any]):
+        self.indexed = indexed
+        self.title = indexed.title
+        self.gates = gates
+        outputs = indexed.outputs[0]
+        # Pre-evaluated outputs, None when they depend on facts
+        self.constant: Optional[Dict[str, Any]] = outputs if isinstance(outputs, dict) else None
+
+    def __call__(self, facts: Dict[str, Any], strict_mode: bool = True, compiled: bool = False,
+                 zeros: bool = False) -> Optional[List[Dict[str, Any]]]:
+        for col, value in self.gates.items():
+            fact = facts.get(col)
+            if fact != value or not isinstance(fact, type(value)):
+                return self.indexed(facts, strict_mode, compiled, zeros)
+        if self.constant is not None:
+            return [dict(self.constant)]
+        return [self.indexed.evaluate_row(0, facts, compiled, zeros)]
+
+    def __repr__(self):
+        kind = "constant" if self.constant is not None else "always-true"
+        return f"<FoldedTable {self.title!r} ({kind})>"
+
+
+def fold_table(indexed: IndexedTable) -> Optional[FoldedTable]:
+    """Build a :class:`FoldedTable` if ``indexed`` has one row, gated only on :data:`GATE_COLUMNS`."""
+    if len(indexed.outputs) != 1 or not all(col in GATE_COLUMNS for col in indexed.input_ids):
+        return None
+    gates = {col: GATE_COLUMNS[col] for col in indexed.input_ids}
+    if not all(isinstance(gates[col], literal_type)
+               for col, literal_type in zip(indexed.input_ids, indexed.literal_types)):
+        return None
+    if indexed.index.get(tuple(gates.values())) != [0]:
+        return None
+    return FoldedTable(indexed, gates)
@@ -0,0 +1,222 @@
+"""
+Hash-indexed dispatch for equality-only decision tables.
+
+Tables such as ``CST_DISPATCH_RULE`` or ``CSOSN_DISPATCH_RULE`` only compare
+their input columns with literals (``'"00"'`` -> ``cst="00"``, ``'101'`` ->
+``csosn=101``, ``'"02", "15"'`` -> ``cst="02" or cst="15"``).  For those
+tables :func:`index_table` builds a dict from the literal values to the
+matching rows, so matching becomes one lookup instead of one FEEL
+evaluation per row.  Constant outputs are evaluated once at load time;
+other outputs are evaluated for the matched row only, sharing the
+subexpressions repeated across its columns (see :mod:`.dag`) and skipping
+the columns that are provably zero for the facts (see :mod:`.zeros`).
+
+The interpreter rejects a fact that is not an instance of the literal's type
+(``cst=0`` against ``"00"``, ``csosn=Decimal('101')`` against ``101``,
+``1`` against ``true``) while Python equality would match it, so the lookup
+checks the fact types first and leaves mismatches to the interpreter.
+"""
+from itertools import product
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from bkflow_dmn.data_model import SingleDecisionTable, TableUnitHandler
+from bkflow_dmn.exception import HitPolicyMatchError
+from bkflow_feel import parsers as feel_ast
+
+from motor_tributario_py.engine.compiler import CompileError, compile_expressions, parse_feel
+from motor_tributario_py.engine.dag import RowDag
+from motor_tributario_py.engine.parse_cache import evaluate
+from motor_tributario_py.engine.zeros import ZERO, zero_columns, zero_guards
+
+_LITERALS = (feel_ast.String, feel_ast.Number, feel_ast.Boolean)
+
+
+def equality_literals(node, col_id: str) -> Optional[List[Any]]:
+    """Values of ``col=literal [or col=literal ...]``, None for any other test."""
+    if isinstance(node, feel_ast.Expr):
+        return equality_literals(node.value, col_id)
+    if isinstance(node, feel_ast.Or):
+        left, right = equality_literals(node.left, col_id), equality_literals(node.right, col_id)
+        return None if left is None or right is None else left + right
+    if (
+        isinstance(node, feel_ast.SameTypeBinaryOperator)
+        and node.operation == "equal"
+        and isinstance(node.left, feel_ast.Variable)
+        and node.left.name == col_id
+        and isinstance(node.right, _LITERALS)
+    ):
+        return [node.right.value]
+    return None
+
+
+def has_variables(node) -> bool:
+    """True if the FEEL expression tree reads any fact."""
+    if isinstance(node, feel_ast.Variable):
+        return True
+    if isinstance(node, (list, tuple)):
+        return any(has_variables(item) for item in node)
+    if isinstance(node, dict):
+        return any(has_variables(item) for item in node.values())
+    if isinstance(node, feel_ast.Expression):
+        return any(has_variables(value) for value in vars(node).values())
+    return False
+
+
+def prepare_outputs(model: SingleDecisionTable) -> List[Any]:
+    """Per output row: the evaluated outputs if they read no fact, else their sources."""
+    outputs = []
+    for row in model.outputs.rows:
+        sources = [row] if isinstance(row, str) else list(row)
+        if any(has_variables(parse_feel(source)) for source in sources):
+            outputs.append(sources)
+            continue
+        try:
+            outputs.append({col: evaluate(source, {}) for col, source in zip(model.outputs.col_ids, sources)})
+        except Exception:
+            outputs.append(sources)
+    return outputs
+
+
+class IndexedTable:
+    """An equality-only decision table matched through a dict.
+
+    Calling it is equivalent to ``decide_single_table(table, facts, strict_mode)``,
+    or returns None when a fact is not of its column's literal type (the
+    interpreter raises a type error, see :meth:`rows`).  Pickling keeps the index, the outputs and the zero guards; compiled and
+    interpreted rows are built again on first use.
+    """
+
+    def __init__(self, title: str, hit_policy: str, input_ids: List[str], output_ids: List[str],
+                 index: Dict[tuple, List[int]], outputs: List[Any], literal_types: Tuple[type, ...]):
+        self.title = title
+        self.hit_policy = hit_policy
+        self.input_ids = input_ids
+        self.output_ids = output_ids
+        self.index = index
+        # Per input column: the type of its literals
+        self.literal_types = literal_types
+        # Per row: dict of constant outputs, or the output sources
+        self.outputs = outputs
+        # Row -> {column: facts that make it zero} (see .zeros), built on first use
+        self._zero_guards: Dict[int, Dict[str, FrozenSet[str]]] = {}
+        # (row, zero columns) -> compiled outputs (None when not compilable), built on first use
+        self._compiled: Dict[Tuple[int, FrozenSet[str]], Optional[Callable]] = {}
+        # (row, zero columns) -> interpreted outputs with shared subexpressions, built on first use
+        self._dags: Dict[Tuple[int, FrozenSet[str]], RowDag] = {}
+
+    def rows(self, facts: Dict[str, Any]) -> Optional[List[int]]:
+        """Rows matched by ``facts``, None when a fact is not an instance of its column's literal type."""
+        get = facts.get
+        key = tuple(get(col) for col in self.input_ids)
+        for value, literal_type in zip(key, self.literal_types):
+            if not isinstance(value, literal_type):
+                return None
+        try:
+            return self.index.get(key, ())
+        except TypeError:  # unhashable fact: nothing to look up
+            return ()
+
+    def evaluate_row(self, row: int, facts: Dict[str, Any], compiled: bool, zeros: bool = False) -> Dict[str, Any]:
+        outputs = self.outputs[row]
+        if isinstance(outputs, dict):
+            return dict(outputs)
+        guards = self.guards(row) if zeros else None
+        zeros = zero_columns(guards, facts) if guards else frozenset()
+        if not zeros:
+            return self._evaluate(row, zeros, facts, compiled)
+        if len(zeros) == len(self.output_ids):
+            return dict.fromkeys(self.output_ids, ZERO)
+        values = self._evaluate(row, zeros, facts, compiled)
+        return {col: ZERO if col in zeros else values[col] for col in self.output_ids}
+
+    def guards(self, row: int) -> Dict[str, FrozenSet[str]]:
+        """Facts that make each output column of ``row`` zero (see :func:`.zeros.zero_guards`)."""
+        guards = self._zero_guards.get(row)
+        if guards is None:
+            outputs = self.outputs[row]
+            guards = {} if isinstance(outputs, dict) else zero_guards(self.output_ids, outputs)
+            self._zero_guards[row] = guards
+        return guards
+
+    def _evaluate(self, row: int, zeros: FrozenSet[str], facts: Dict[str, Any], compiled: bool) -> Dict[str, Any]:
+        """Outputs of ``row`` except the ``zeros`` columns."""
+        key = (row, zeros)
+        if compiled:
+            if key not in self._compiled:
+                col_ids, sources = self._columns(row, zeros)
+                try:
+                    self._compiled[key] = compile_expressions(col_ids, sources, f"rule {self.title} row {row + 1}")
+                except CompileError:
+                    self._compiled[key] = None
+            function = self._compiled[key]
+            if function is not None:
+                return function(facts)
+        dag = self._dags.get(key)
+        if dag is None:
+            col_ids, sources = self._columns(row, zeros)
+            dag = self._dags[key] = RowDag(col_ids, [parse_feel(source) for source in sources])
+        return dag(facts)
+
+    def _columns(self, row: int, zeros: FrozenSet[str]) -> Tuple[List[str], List[str]]:
+        pairs = [(col, source) for col, source in zip(self.output_ids, self.outputs[row]) if col not in zeros]
+        return [col for col, _ in pairs], [source for _, source in pairs]
+
+    def __call__(self, facts: Dict[str, Any], strict_mode: bool = True, compiled: bool = False,
+                 zeros: bool = False) -> Optional[List[Dict[str, Any]]]:
+        rows = self.rows(facts)
+        if rows is None:
+            return None
+
+        if self.hit_policy == "Unique":
+            if strict_mode and len(rows) != 1:
+                raise HitPolicyMatchError("Unique Hit Policy requires exactly one True result")
+        elif strict_mode and not rows:
+            raise HitPolicyMatchError("First Hit Policy requires at least one True result")
+        if not rows:
+            return []
+        return [self.evaluate_row(rows[0], facts, compiled, zeros)]
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["_compiled"] = {}
+        state["_dags"] = {}
+        return state
+
+    def __repr__(self):
+        return f"<IndexedTable {self.title!r} ({len(self.index)} keys)>"
+
+
+def index_table(table: Dict[str, Any]) -> Optional[IndexedTable]:
+    """Build an :class:`IndexedTable` if every input test of ``table`` is an equality with literals."""
+    model = SingleDecisionTable(**table)
+    hit_policy = model.hit_policy_value
+    if hit_policy not in ("Unique", "First"):
+        return None
+
+    input_ids = model.inputs.col_ids
+    literal_types: List[set] = [set() for _ in input_ids]
+    index: Dict[tuple, List[int]] = {}
+    for row_number, row in enumerate(model.inputs.rows):
+        if isinstance(row, str) or len(row) != len(input_ids):
+            return None
+        values = []
+        for col_id, unit in zip(input_ids, row):
+            if not unit.strip():  # empty cell matches anything
+                return None
+            expanded = TableUnitHandler(unit_exp=unit.strip(), col_id=col_id).get_handled_exp()
+            literals = equality_literals(parse_feel(expanded), col_id)
+            if literals is None:
+                return None
+            values.append(literals)
+        for types, literals in zip(literal_types, values):
+            types.update(type(literal) for literal in literals)
+        for key in product(*values):
+            rows = index.setdefault(key, [])
+            if row_number not in rows:
+                rows.append(row_number)
+
+    # A column compared with literals of several types raises for any fact
+    if any(len(types) != 1 for types in literal_types):
+        return None
+    return IndexedTable(model.title, hit_policy, input_ids, model.outputs.col_ids, index, prepare_outputs(model),
+                        tuple(types.pop() for types in literal_types))
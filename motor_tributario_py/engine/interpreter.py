@@ -0,0 +1,62 @@
+"""
+``decide_single_table`` over cached parse trees.
+
+Same evaluation as ``bkflow_dmn.api.decide_single_table`` (every row's input
+tests and outputs are evaluated, then the hit policy is applied), but the
+table model is validated and its input tests expanded once per table, and
+the FEEL strings are parsed through :data:`.parse_cache.PARSE_CACHE` instead
+of on every call.
+
+``Unique`` tables certified by :func:`.analysis.analyze_table` (no two rows
+can match the same facts) stop at the first matching row and only evaluate
+its outputs.
+"""
+import threading
+from typing import Any, Dict, List
+
+from bkflow_dmn.data_model import SingleDecisionTable
+from bkflow_dmn.exception import HitPolicyMatchError
+from bkflow_dmn.hit_policy import get_hit_policy
+
+from motor_tributario_py.engine.analysis import analyze_table
+from motor_tributario_py.engine.parse_cache import evaluate
+
+# id(table) -> (table, (title, hit_policy, output col ids, input sources, output sources, certified))
+_prepared: Dict[int, tuple] = {}
+_lock = threading.Lock()
+
+
+def _prepare(table: Dict[str, Any]) -> tuple:
+    entry = _prepared.get(id(table))
+    if entry is None or entry[0] is not table:
+        model = SingleDecisionTable(**table)
+        outputs = [[row] if isinstance(row, str) else list(row) for row in model.outputs.rows]
+        certified = analyze_table(table).certified
+        prepared = (model.title, model.hit_policy_value, model.outputs.col_ids, model.feel_exp_of_inputs, outputs, certified)
+        # Keep a reference to the table so its id() is never reused
+        entry = (table, prepared)
+        with _lock:
+            _prepared[id(table)] = entry
+    return entry[1]
+
+
+def interpret(decision_table: Dict[str, Any], facts: Dict[str, Any], strict_mode: bool = True) -> List[Dict[str, Any]]:
+    """Drop-in replacement for ``bkflow_dmn.api.decide_single_table``."""
+    _, hit_policy_value, col_ids, inputs, outputs, certified = _prepare(decision_table)
+    if certified:
+        for row, tests in enumerate(inputs):
+            if all([evaluate(source, facts) for source in tests]):
+                return [{col: evaluate(source, facts) for col, source in zip(col_ids, outputs[row])}]
+        if strict_mode:
+            raise HitPolicyMatchError("Unique Hit Policy requires exactly one True result")
+        return []
+
+    matches = [all([evaluate(source, facts) for source in row]) for row in inputs]
+    values = [[evaluate(source, facts) for source in row] for row in outputs]
+    hit_policy = get_hit_policy(hit_policy_value, strict_mode=strict_mode)
+    result = hit_policy(matches, values)
+    if hit_policy.multiple_output():
+        return [dict(zip(col_ids, row)) for row in result]
+    if result:
+        return [dict(zip(col_ids, result))]
+    return []
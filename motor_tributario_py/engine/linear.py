@@ -0,0 +1,275 @@
+"""
+Per-profile linear forms of the calculation tables.
+
+For a fixed profile -- the rates, flags and configuration an item shares
+with many others -- most calculation outputs are affine in the line
+values: ``(valor_produto * quantidade_produto)``, ``frete``, ``seguro``,
+``outras_despesas``, ``desconto``, ``valor_ipi`` and the intermediate values
+passed between calculators (:data:`LINE_FACTS`).  The IPI of
+``IPI_CALC_RULE``'s "Incondicional" row with ``percentual_ipi = 10`` is::
+
+    0.1*quantidade_produto*valor_produto + 0.1*frete + 0.1*seguro + 0.1*outras_despesas - 0.1*desconto
+
+:class:`LinearTable` derives those coefficients symbolically from the output
+expressions of the row the profile matches, once per profile (the facts
+the table reads that are not line facts), and evaluates the row as a few
+multiply-adds.  Rows with non-linear pieces -- ``apply_threshold`` /
+``check_threshold`` (ISSQN), divisions by a line value, products of sums --
+and profiles whose coefficients are not exact decimals (e.g. a division by
+3) are left to the general path.
+
+Coefficients are folded exactly (any rounding aborts the derivation), so
+for line values whose products fit the context precision the outputs have
+the same value as the general path, though not always the same exponent
+(``Decimal('18.0')`` rather than ``Decimal('18.000')``); the calculators'
+final rounding is applied to them as usual.
+"""
+import threading
+from collections import OrderedDict
+from decimal import (Context, Decimal, DivisionByZero, Inexact, InvalidOperation, Overflow, Rounded,
+                     getcontext, localcontext)
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from bkflow_feel import parsers as feel_ast
+
+from motor_tributario_py.engine.compiler import parse_feel
+
+# Facts that vary per line: the line values and the intermediates calculators pass on
+LINE_FACTS: FrozenSet[str] = frozenset({
+    "valor_produto", "quantidade_produto", "frete", "seguro", "outras_despesas", "desconto", "valor_ipi",
+    "base_calculo", "base_calculo_credito", "base_calculo_ibs_cbs", "base_calculo_icms", "base_calculo_efetivo",
+    "subtotal_produto", "valor_icms", "valor_icms_proprio", "ajuste_pis", "ajuste_cofins", "ajuste_icms", "ajuste_issqn",
+})
+
+# FEEL functions that return their (numeric) argument unchanged
+IDENTITY_FUNCTIONS = frozenset({"decimal"})
+
+# Monomial (sorted fact names, () for the constant term) -> coefficient
+Terms = Dict[Tuple[str, ...], Decimal]
+
+
+class NonLinear(Exception):
+    """The expression is not affine in the line facts (or not exactly)."""
+
+
+def variables(node) -> FrozenSet[str]:
+    """Names of the facts the FEEL expression tree reads."""
+    if isinstance(node, feel_ast.Variable):
+        return frozenset([node.name])
+    if isinstance(node, (list, tuple)):
+        return frozenset().union(*(variables(item) for item in node))
+    if isinstance(node, dict):
+        return frozenset().union(*(variables(item) for item in node.values()))
+    if isinstance(node, feel_ast.Expression):
+        return frozenset().union(*(variables(value) for value in vars(node).values()))
+    return frozenset()
+
+
+def _unwrap(node):
+    while True:
+        if isinstance(node, feel_ast.Expr):
+            node = node.value
+        elif (isinstance(node, feel_ast.FuncInvocation) and node.func_name in IDENTITY_FUNCTIONS
+              and len(node.args) == 1 and not node.named_args):
+            node = node.args[0]
+        else:
+            return node
+
+
+def degree(node, line_facts: FrozenSet[str] = LINE_FACTS) -> Optional[int]:
+    """Degree of ``node`` in the line facts (0 constant, 1 affine, 2 for ``a * b``), None if not polynomial."""
+    node = _unwrap(node)
+    if not variables(node) & line_facts:
+        return 0
+    if isinstance(node, feel_ast.Variable):
+        return 1
+    if not isinstance(node, feel_ast.SameTypeBinaryOperator):
+        return None
+    left, right = degree(node.left, line_facts), degree(node.right, line_facts)
+    if left is None or right is None:
+        return None
+    if node.operation in ("add", "subtract"):
+        return max(left, right)
+    if node.operation == "multiply":
+        if left and right:
+            # Only a product of two line facts, e.g. valor_produto * quantidade_produto
+            bare = isinstance(_unwrap(node.left), feel_ast.Variable) and isinstance(_unwrap(node.right), feel_ast.Variable)
+            return 2 if bare else None
+        return left + right
+    if node.operation == "divide":
+        return left if right == 0 else None
+    return None
+
+
+class AffineForm:
+    """``constant + sum(coefficient * product of line facts)``."""
+
+    __slots__ = ("constant", "terms")
+
+    def __init__(self, constant: Any, terms: Tuple[Tuple[Tuple[str, ...], Decimal], ...] = ()):
+        self.constant = constant
+        self.terms = terms
+
+    def evaluate(self, facts: Dict[str, Any]) -> Any:
+        total = self.constant
+        for names, coefficient in self.terms:
+            value = facts[names[0]]
+            for name in names[1:]:
+                value = value * facts[name]
+            total = total + coefficient * value
+        return total
+
+    def __eq__(self, other):
+        if not isinstance(other, AffineForm):
+            return NotImplemented
+        return self.constant == other.constant and self.terms == other.terms
+
+    def __repr__(self):
+        parts = [f"{coefficient}*{'*'.join(names)}" for names, coefficient in self.terms]
+        if self.constant != 0 or not parts:
+            parts.append(str(self.constant))
+        return f"<AffineForm {' + '.join(parts)}>"
+
+
+def _number(value: Any) -> Decimal:
+    if isinstance(value, bool) or not isinstance(value, (int, Decimal)):
+        raise NonLinear(f"non-numeric operand {value!r}")
+    return Decimal(value)
+
+
+def _terms(node, line_facts: FrozenSet[str], facts: Dict[str, Any]) -> Terms:
+    node = _unwrap(node)
+    if not variables(node) & line_facts:
+        # Constant for the profile: evaluated as the general path would
+        return {(): _number(node.evaluate(facts))}
+    if isinstance(node, feel_ast.Variable):
+        return {(node.name,): Decimal(1)}
+    if not isinstance(node, feel_ast.SameTypeBinaryOperator):
+        raise NonLinear(type(node).__name__)
+    left, right = _terms(node.left, line_facts, facts), _terms(node.right, line_facts, facts)
+    if node.operation in ("add", "subtract"):
+        sign = 1 if node.operation == "add" else -1
+        terms = dict(left)
+        for names, coefficient in right.items():
+            terms[names] = terms.get(names, Decimal(0)) + sign * coefficient
+        return terms
+    if node.operation == "multiply":
+        if set(left) == {()}:
+            left, right = right, left
+        if set(right) == {()}:
+            factor = right[()]
+            return {names: coefficient * factor for names, coefficient in left.items()}
+        if len(left) == len(right) == 1 and () not in left and () not in right:
+            (names_left, coefficient_left), = left.items()
+            (names_right, coefficient_right), = right.items()
+            return {tuple(sorted(names_left + names_right)): coefficient_left * coefficient_right}
+        raise NonLinear("product of line values")
+    if node.operation == "divide":
+        if set(right) != {()} or right[()] == 0:
+            raise NonLinear("division by a line value")
+        divisor = right[()]
+        return {names: coefficient / divisor for names, coefficient in left.items()}
+    raise NonLinear(node.operation)
+
+
+def affine_form(node, facts: Dict[str, Any], line_facts: FrozenSet[str] = LINE_FACTS) -> AffineForm:
+    """Affine form of the FEEL expression ``node`` in ``line_facts``, the other facts fixed to ``facts``.
+
+    Raises :class:`NonLinear` when the expression is not affine, or when a
+    coefficient would not be exact in the current decimal precision.
+    """
+    exact = Context(prec=getcontext().prec, traps=[Inexact, Rounded, InvalidOperation, DivisionByZero, Overflow])
+    try:
+        with localcontext(exact):
+            terms = _terms(node, line_facts, facts)
+    except (Inexact, Rounded, InvalidOperation, DivisionByZero, Overflow) as e:
+        raise NonLinear(f"inexact coefficient ({type(e).__name__})") from e
+    constant = terms.pop((), Decimal(0))
+    return AffineForm(constant, tuple((names, coefficient) for names, coefficient in terms.items() if coefficient))
+
+
+class LinearTable:
+    """Outputs of an :class:`~.index.IndexedTable` as affine forms, derived once per profile.
+
+    Calling it returns the outputs for ``facts``, or None when they are left
+    to the general path (non-linear or unmatched row, unhashable profile).
+    """
+
+    def __init__(self, indexed, line_facts: FrozenSet[str] = LINE_FACTS, maxsize: int = 1024):
+        self.indexed = indexed
+        self.title = indexed.title
+        self.line_facts = line_facts
+        self.maxsize = maxsize
+        # Rows whose every output has a degree (decided without facts)
+        self.linear_rows = frozenset(
+            row for row, outputs in enumerate(indexed.outputs)
+            if not isinstance(outputs, dict)
+            and all(degree(parse_feel(source), line_facts) is not None for source in outputs)
+        )
+        read = set()
+        for row in self.linear_rows:
+            for source in indexed.outputs[row]:
+                read |= variables(parse_feel(source))
+        # Facts that select the row and fix the coefficients
+        self.profile_ids = tuple(sorted((read - line_facts) | set(indexed.input_ids)))
+        # profile key -> {column: AffineForm}, or None for the general path
+        self._forms: "OrderedDict[tuple, Optional[Dict[str, AffineForm]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def forms(self, facts: Dict[str, Any]) -> Optional[Dict[str, AffineForm]]:
+        """Affine forms of the row matched by ``facts`` (None: general path)."""
+        get = facts.get
+        key = tuple(get(name) for name in self.profile_ids)
+        try:
+            with self._lock:
+                if key in self._forms:
+                    self._forms.move_to_end(key)
+                    return self._forms[key]
+        except TypeError:  # unhashable fact
+            return None
+        forms = self._derive(facts)
+        with self._lock:
+            self._forms[key] = forms
+            if len(self._forms) > self.maxsize:
+                self._forms.popitem(last=False)
+        return forms
+
+    def _derive(self, facts: Dict[str, Any]) -> Optional[Dict[str, AffineForm]]:
+        indexed = self.indexed
+        rows = indexed.rows(facts)
+        # Hit-policy and fact type errors are raised by the general path
+        if not rows or (indexed.hit_policy == "Unique" and len(rows) != 1) or rows[0] not in self.linear_rows:
+            return None
+        try:
+            return {col: affine_form(parse_feel(source), facts, self.line_facts)
+                    for col, source in zip(indexed.output_ids, indexed.outputs[rows[0]])}
+        except NonLinear:
+            return None
+        except Exception:  # evaluation error in a constant part: the general path reports it
+            return None
+
+    def __call__(self, facts: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+        forms = self.forms(facts)
+        if forms is None:
+            return None
+        try:
+            return [{col: form.evaluate(facts) for col, form in forms.items()}]
+        except Exception:  # e.g. a missing line fact: the general path raises as usual
+            return None
+
+    def __repr__(self):
+        return f"<LinearTable {self.title!r} ({len(self.linear_rows)} linear rows)>"
+
+
+def linear_table(indexed, line_facts: FrozenSet[str] = LINE_FACTS) -> Optional[LinearTable]:
+    """Build a :class:`LinearTable` if some row of ``indexed`` is affine in the line facts it reads.
+
+    ``indexed`` is an :class:`~.index.IndexedTable` or a :class:`~.folding.FoldedTable`.
+    """
+    indexed = getattr(indexed, "indexed", indexed)
+    linear = LinearTable(indexed, line_facts)
+    reads_line = any(
+        variables(parse_feel(source)) & line_facts
+        for row in linear.linear_rows for source in indexed.outputs[row]
+    )
+    return linear if reads_line else None
@@ -0,0 +1,93 @@
+"""
+Process-wide cache of parsed FEEL expressions.
+
+The rule tables are static, so each distinct FEEL string (an output
+expression, or an input test as expanded by ``SingleDecisionTable``) only
+needs to be tokenized and parsed once.  :data:`PARSE_CACHE` keeps the
+``bkflow_feel`` trees keyed by source string, evicting the least recently
+used entries beyond ``maxsize``; the compiler, the hash index and the
+interpreter all parse through it.
+
+Cached trees are shared: callers must not modify them.
+
+Example:
+    >>> from motor_tributario_py.engine import parse_cache_info
+    >>> parse_cache_info()
+    ParseCacheInfo(hits=..., misses=..., maxsize=4096, currsize=...)
+"""
+import threading
+from collections import OrderedDict, namedtuple
+from typing import Any, Dict
+
+from bkflow_feel import parser as feel_parser
+from bkflow_feel import transformer as feel_transformer
+from bkflow_feel.parsers import Expression
+
+ParseCacheInfo = namedtuple("ParseCacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class ParseCache:
+    """Thread-safe, size-bounded (LRU) map from FEEL source to its parse tree."""
+
+    def __init__(self, maxsize: int = 4096):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._trees: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source: str):
+        """Parse tree of ``source`` (what ``bkflow_feel`` evaluates)."""
+        with self._lock:
+            tree = self._trees.get(source)
+            if tree is not None:
+                self._trees.move_to_end(source)
+                self.hits += 1
+                return tree
+            self.misses += 1
+        # Parse outside the lock; a concurrent miss just parses twice
+        tree = feel_transformer.transform(feel_parser.parse(source))
+        with self._lock:
+            self._trees[source] = tree
+            if len(self._trees) > self.maxsize:
+                self._trees.popitem(last=False)
+        return tree
+
+    def trees(self) -> Dict[str, Any]:
+        """Copy of the cached source -> tree entries (e.g. to persist them)."""
+        with self._lock:
+            return dict(self._trees)
+
+    def preload(self, trees: Dict[str, Any]) -> None:
+        """Add already parsed trees (as returned by :meth:`trees`)."""
+        with self._lock:
+            self._trees.update(trees)
+            while len(self._trees) > self.maxsize:
+                self._trees.popitem(last=False)
+
+    def info(self) -> ParseCacheInfo:
+        with self._lock:
+            return ParseCacheInfo(self.hits, self.misses, self.maxsize, len(self._trees))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._trees.clear()
+            self.hits = self.misses = 0
+
+
+PARSE_CACHE = ParseCache()
+
+
+def parse_cache_info() -> ParseCacheInfo:
+    """Hit/miss counters of :data:`PARSE_CACHE`."""
+    return PARSE_CACHE.info()
+
+
+def evaluate(source: str, facts: Dict[str, Any]):
+    """``bkflow_feel.api.parse_expression(source, facts)`` with a cached parse."""
+    tree = PARSE_CACHE.get(source)
+    if not isinstance(tree, Expression):
+        raise ValueError(f"Invalid FEEL expression: {source}, ast: {tree}")
+    return tree.evaluate(facts or {})
@@ -0,0 +1,148 @@
+"""
+On-disk snapshot of the prepared rule tables.
+
+Preparing the tables of ``rules/`` (parsing their FEEL strings, building
+the hash indexes, folding, compiling) is repeated by every process.  A
+snapshot stores the result for every table -- the :class:`~.index.IndexedTable`
+/ :class:`~.folding.FoldedTable`, the :class:`~.compiler.CompiledTable`
+source and the FEEL parse trees -- so a short-lived worker restores it with
+one file read instead::
+
+    from motor_tributario_py import engine
+    engine.load_snapshot()            # False: not found or stale, tables are prepared on use
+
+The snapshot is keyed by :func:`rules_hash`, a content hash of the rule
+dicts, of the engine sources that prepared them and of the ``bkflow``
+versions; a snapshot with another hash is ignored.  ``load_snapshot(rebuild=True)``
+then prepares every table and writes a fresh one.
+
+Build it ahead of time (e.g. before building the wheel, which ships it as
+package data) with::
+
+    python scripts/build_snapshot.py [path]
+
+The file holds two pickles, a header (format and hash) and the prepared
+tables, which are only unpickled when the header matches.  Only load
+snapshots you built.
+"""
+import hashlib
+import io
+import json
+import os
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from motor_tributario_py.engine.analysis import rule_tables
+from motor_tributario_py.engine.parse_cache import PARSE_CACHE
+from motor_tributario_py.utils.functions import register_feel_functions
+
+# Bumped when the layout of the snapshot changes
+SNAPSHOT_FORMAT = 1
+# Shipped with the package when prebuilt; MOTOR_TRIBUTARIO_SNAPSHOT overrides it
+DEFAULT_PATH = Path(__file__).with_name("rules.snapshot")
+SNAPSHOT_ENV = "MOTOR_TRIBUTARIO_SNAPSHOT"
+
+
+def snapshot_path(path: Union[str, Path, None] = None) -> Path:
+    """``path``, else ``$MOTOR_TRIBUTARIO_SNAPSHOT``, else :data:`DEFAULT_PATH`."""
+    if path is not None:
+        return Path(path)
+    return Path(os.environ.get(SNAPSHOT_ENV) or DEFAULT_PATH)
+
+
+def _versions() -> Dict[str, str]:
+    from bkflow_dmn.__version__ import __version__ as dmn
+    from bkflow_feel.__version__ import __version__ as feel
+
+    return {"bkflow_dmn": dmn, "bkflow_feel": feel}
+
+
+def rules_hash(tables: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+    """Content hash a snapshot of ``tables`` (default: all of ``rules/``) is valid for."""
+    tables = rule_tables() if tables is None else tables
+    digest = hashlib.sha256()
+    digest.update(json.dumps(
+        {"format": SNAPSHOT_FORMAT, "versions": _versions(), "tables": tables},
+        sort_keys=True, default=str,
+    ).encode())
+    # Whatever prepares the tables: the engine and the FEEL functions it binds
+    sources = sorted(Path(__file__).parent.glob("*.py"))
+    sources.append(Path(__file__).parent.parent / "utils" / "functions.py")
+    for source in sources:
+        digest.update(source.name.encode())
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def build_snapshot() -> Dict[str, Any]:
+    """Prepare every table of ``rules/`` and return the snapshot contents."""
+    from motor_tributario_py import engine
+
+    tables = rule_tables()
+    prepared = {}
+    for key, table in tables.items():
+        indexed = engine.get_indexed(table)
+        if indexed is not None:
+            inner = getattr(indexed, "indexed", indexed)
+            for row in range(len(inner.outputs)):
+                inner.guards(row)
+        prepared[key] = (indexed, engine.get_compiled(table))
+    return {
+        "header": {"format": SNAPSHOT_FORMAT, "hash": rules_hash(tables)},
+        "tables": prepared,
+        "trees": PARSE_CACHE.trees(),
+    }
+
+
+def write_snapshot(path: Union[str, Path, None] = None) -> Path:
+    """Build the snapshot and write it (atomically) to ``path``; returns the path written."""
+    path = snapshot_path(path)
+    snapshot = build_snapshot()
+    buffer = io.BytesIO()
+    pickle.dump(snapshot.pop("header"), buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickle.dump(snapshot, buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    data = buffer.getvalue()
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_bytes(data)
+    os.replace(temporary, path)
+    return path
+
+
+def load_snapshot(path: Union[str, Path, None] = None, rebuild: bool = False) -> bool:
+    """Install the prepared tables of the snapshot at ``path`` into the engine.
+
+    Returns True when the snapshot was installed.  A missing, unreadable or
+    stale snapshot is ignored (tables are then prepared on first use); with
+    ``rebuild`` every table is prepared now and a fresh snapshot is written
+    (best effort: an unwritable location is not an error).
+    """
+    from motor_tributario_py import engine
+
+    path = snapshot_path(path)
+    tables = rule_tables()
+    # Compiled tables bind the FEEL functions when unpickled
+    register_feel_functions()
+    snapshot = None
+    try:
+        buffer = io.BytesIO(path.read_bytes())
+        header = pickle.load(buffer)
+        if header == {"format": SNAPSHOT_FORMAT, "hash": rules_hash(tables)}:
+            snapshot = pickle.load(buffer)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        pass
+    if snapshot is None:
+        if rebuild:
+            try:
+                write_snapshot(path)
+            except OSError:
+                pass
+        return False
+
+    PARSE_CACHE.preload(snapshot["trees"])
+    for key, (indexed, compiled) in snapshot["tables"].items():
+        table = tables.get(key)
+        if table is not None:
+            engine.install_prepared(table, indexed, compiled)
+    return True
+
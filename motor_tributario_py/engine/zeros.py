@@ -0,0 +1,133 @@
+"""
+Zero-rate short-circuit derived from the output expressions.
+
+Many items carry zero rates (``percentual_fcp``, ``percentual_ibs_municipal``,
+``percentual_difal_*``, ``percentual_ret_*``, ``aliquota_ad_rem_icms``, ...).
+:func:`zero_factors` finds the facts that make an output expression zero
+whatever the other facts are: the factors of a product, the numerator of a
+division by a non-zero constant, the facts shared by both sides of a sum,
+the value argument of ``decimal``/``apply_threshold``/``check_threshold``.
+For ``(base_calculo * percentual_fcp) / decimal(100)`` those are
+``base_calculo`` and ``percentual_fcp``.
+
+With ``engine.set_zero_rules(True)``, :class:`~.index.IndexedTable` (and so
+every calculator whose tables are indexed or folded) checks them before
+evaluating the matched row: columns that are provably zero for the facts at
+hand are not evaluated and get :data:`ZERO`, and a row whose columns are all
+zero is not evaluated at all.  :data:`ZERO` equals the value the expression
+would produce, though not its exponent (``Decimal('0')`` rather than e.g.
+``Decimal('0E-4')``), and the exponents of values calculated from it differ
+too; this is why the short-circuit is off by default.
+
+Expressions that divide by a fact have no zero factors: skipping them
+would also skip the division, so ``(a / b) * p`` with ``p = 0, b = 0``
+still raises (division by zero) instead of giving :data:`ZERO`.
+"""
+from decimal import Decimal
+from typing import Any, Dict, FrozenSet, List, Tuple
+
+from bkflow_feel import parsers as feel_ast
+
+from motor_tributario_py.engine.compiler import parse_feel
+
+# Value of the short-circuited columns
+ZERO = Decimal('0')
+
+# FEEL function -> position of the argument that makes it zero (utils.functions)
+ZERO_PRESERVING_FUNCTIONS: Dict[str, int] = {
+    "decimal": 0,
+    "apply_threshold": 0,
+    "check_threshold": 2,
+}
+
+_NOTHING: Tuple[bool, FrozenSet[str]] = (False, frozenset())
+
+
+def is_zero(value: Any) -> bool:
+    """True for a numeric zero fact (``False`` is not a rate)."""
+    return isinstance(value, (int, Decimal)) and not isinstance(value, bool) and value == 0
+
+
+def _constant(node):
+    """Value of a fact-free numeric expression, None otherwise."""
+    from motor_tributario_py.engine.index import has_variables
+    from motor_tributario_py.utils.functions import FEEL_BOOTSTRAP
+
+    if has_variables(node):
+        return None
+    # ``decimal(100)`` needs the FEEL functions
+    FEEL_BOOTSTRAP.ensure()
+    try:
+        value = node.evaluate({})
+    except Exception:
+        return None
+    return value if isinstance(value, (int, Decimal)) and not isinstance(value, bool) else None
+
+
+def _divides_by_fact(node) -> bool:
+    """True if the FEEL expression tree divides by anything but a non-zero constant."""
+    if isinstance(node, feel_ast.SameTypeBinaryOperator) and node.operation == "divide":
+        divisor = _constant(node.right)
+        if divisor is None or divisor == 0:
+            return True
+    if isinstance(node, (list, tuple)):
+        return any(_divides_by_fact(item) for item in node)
+    if isinstance(node, dict):
+        return any(_divides_by_fact(item) for item in node.values())
+    if isinstance(node, feel_ast.Expression):
+        return any(_divides_by_fact(value) for value in vars(node).values())
+    return False
+
+
+def _zeros(node) -> Tuple[bool, FrozenSet[str]]:
+    """(always zero, facts whose zero value makes ``node`` zero)."""
+    if isinstance(node, feel_ast.Expr):
+        return _zeros(node.value)
+    if isinstance(node, feel_ast.Variable):
+        return False, frozenset([node.name])
+    if isinstance(node, feel_ast.Number):
+        return node.value == 0, frozenset()
+    if isinstance(node, feel_ast.FuncInvocation):
+        position = ZERO_PRESERVING_FUNCTIONS.get(node.func_name)
+        if position is None or node.named_args or len(node.args) <= position:
+            return _NOTHING
+        return _zeros(node.args[position])
+    if isinstance(node, feel_ast.SameTypeBinaryOperator):
+        if node.operation == "multiply":
+            left, right = _zeros(node.left), _zeros(node.right)
+            return left[0] or right[0], left[1] | right[1]
+        if node.operation == "divide":
+            divisor = _constant(node.right)
+            return _zeros(node.left) if divisor is not None and divisor != 0 else _NOTHING
+        if node.operation in ("add", "subtract"):
+            left, right = _zeros(node.left), _zeros(node.right)
+            if left[0]:
+                return right
+            if right[0]:
+                return left
+            return False, left[1] & right[1]
+    return _NOTHING
+
+
+def zero_factors(node) -> FrozenSet[str]:
+    """Facts whose zero value makes the FEEL expression ``node`` zero."""
+    always, names = _zeros(node)
+    if always or _divides_by_fact(node):
+        return frozenset()
+    return names
+
+
+def zero_guards(col_ids: List[str], sources: List[str]) -> Dict[str, FrozenSet[str]]:
+    """Per output column of a row, the facts that make it zero (columns without any are left out)."""
+    guards = {}
+    for col, source in zip(col_ids, sources):
+        names = zero_factors(parse_feel(source))
+        if names:
+            guards[col] = names
+    return guards
+
+
+def zero_columns(guards: Dict[str, FrozenSet[str]], facts: Dict[str, Any]) -> FrozenSet[str]:
+    """Columns of ``guards`` that are zero for ``facts``."""
+    get = facts.get
+    return frozenset(col for col, names in guards.items() if any(is_zero(get(name)) for name in names))
@@ -1,48 +1,167 @@
+from __future__ import annotations
+
+import copy
+import importlib
 from decimal import Decimal
 from dataclasses import dataclass
-from typing import Optional
-from motor_tributario_py.models import Tributavel
-from motor_tributario_py.audit import AuditManager, ExecutionReport
-from motor_tributario_py.taxes.icms import CalculadoraIcms, ResultadoCalculoIcms
-from motor_tributario_py.taxes.icms_st import CalculadoraIcmsSt, ResultadoCalculoIcmsSt
-from motor_tributario_py.taxes.icms import CalculadoraIcms, ResultadoCalculoIcms
-from motor_tributario_py.taxes.icms_st import CalculadoraIcmsSt, ResultadoCalculoIcmsSt
-from motor_tributario_py.taxes.difal import CalculadoraDifal, ResultadoCalculoDifal
-from motor_tributario_py.taxes.issqn import CalculadoraIssqn, ResultadoCalculoIssqn
-from motor_tributario_py.taxes.ipi import CalculadoraIpi, ResultadoCalculoIpi
-from motor_tributario_py.taxes.pis import CalculadoraPis, ResultadoCalculoPis
-from motor_tributario_py.taxes.cofins import CalculadoraCofins, ResultadoCalculoCofins
-from motor_tributario_py.taxes.ibpt import CalculadoraIbpt, ResultadoCalculoIbpt
-from motor_tributario_py.taxes.fcp_st import CalculadoraFcpSt, ResultadoCalculoFcpSt, CalculadoraFcpStRetido, ResultadoCalculoFcpStRetido
-from motor_tributario_py.taxes.icms_desonerado import CalculadoraIcmsDesonerado, ResultadoCalculoIcmsDesonerado
-from motor_tributario_py.taxes.ibs_cbs import CalculadoraBaseIbsCbs, CalculadoraIbs, CalculadoraIbsMunicipal, CalculadoraCbs, ResultadoCalculoIbs, ResultadoCalculoCbs
-from motor_tributario_py.taxes.icms_efetivo import CalculadoraIcmsEfetivo, ResultadoCalculoIcmsEfetivo
-from motor_tributario_py.taxes.icms_monofasico import CalculadoraIcmsMonofasico, ResultadoCalculoIcmsMonofasico
-from motor_tributario_py.taxes.fcp import CalculadoraFcp, ResultadoCalculoFcp
-from motor_tributario_py.taxes.credito_icms import CalculadoraCreditoIcms, ResultadoCalculoCreditoIcms
-from motor_tributario_py.taxes.csosn import CalculadoraCsosn, ResultadoCalculoCsosn
-from motor_tributario_py.utils.functions import register_feel_functions
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Optional
+from motor_tributario_py.models import CAMPOS_TRIBUTAVEL, Tributavel
+from motor_tributario_py.contexto import ContextoCalculo
+from motor_tributario_py.fixo import arredonda
+from motor_tributario_py.grafo import GRAFO_TRIBUTACAO, SAIDAS_PADRAO, no_valor_ipi, ordem_calculo
+
+if TYPE_CHECKING:
+    from motor_tributario_py.audit import AuditManager, ExecutionReport
+    from motor_tributario_py.taxes.icms import CalculadoraIcms, ResultadoCalculoIcms
+    from motor_tributario_py.taxes.icms_st import CalculadoraIcmsSt, ResultadoCalculoIcmsSt
+    from motor_tributario_py.taxes.difal import CalculadoraDifal, ResultadoCalculoDifal
+    from motor_tributario_py.taxes.issqn import CalculadoraIssqn, ResultadoCalculoIssqn
+    from motor_tributario_py.taxes.ipi import CalculadoraIpi, ResultadoCalculoIpi
+    from motor_tributario_py.taxes.pis import CalculadoraPis, ResultadoCalculoPis
+    from motor_tributario_py.taxes.cofins import CalculadoraCofins, ResultadoCalculoCofins
+    from motor_tributario_py.taxes.ibpt import CalculadoraIbpt, ResultadoCalculoIbpt
+    from motor_tributario_py.taxes.fcp_st import CalculadoraFcpSt, ResultadoCalculoFcpSt, CalculadoraFcpStRetido, ResultadoCalculoFcpStRetido
+    from motor_tributario_py.taxes.icms_desonerado import CalculadoraIcmsDesonerado, ResultadoCalculoIcmsDesonerado
+    from motor_tributario_py.taxes.ibs_cbs import CalculadoraBaseIbsCbs, CalculadoraIbs, CalculadoraIbsMunicipal, CalculadoraCbs, CalculadoraIbsCbs, ResultadoCalculoIbs, ResultadoCalculoCbs, ResultadoCalculoIbsCbs
+    from motor_tributario_py.taxes.icms_efetivo import CalculadoraIcmsEfetivo, ResultadoCalculoIcmsEfetivo
+    from motor_tributario_py.taxes.icms_monofasico import CalculadoraIcmsMonofasico, ResultadoCalculoIcmsMonofasico
+    from motor_tributario_py.taxes.fcp import CalculadoraFcp, ResultadoCalculoFcp
+    from motor_tributario_py.taxes.credito_icms import CalculadoraCreditoIcms, ResultadoCalculoCreditoIcms
+    from motor_tributario_py.taxes.csosn import CalculadoraCsosn, ResultadoCalculoCsosn
+
+# Calculators, results and the audit manager are loaded on first use (they
+# pull in their rule tables and bkflow_dmn), so importing the facade is cheap
+# and a caller only loads the calculators it uses.  They stay importable
+# from this module.
+_LAZY = {
+    "AuditManager": "motor_tributario_py.audit",
+    "ExecutionReport": "motor_tributario_py.audit",
+    "CalculadoraIcms": "motor_tributario_py.taxes.icms",
+    "ResultadoCalculoIcms": "motor_tributario_py.taxes.icms",
+    "CalculadoraIcmsSt": "motor_tributario_py.taxes.icms_st",
+    "ResultadoCalculoIcmsSt": "motor_tributario_py.taxes.icms_st",
+    "CalculadoraDifal": "motor_tributario_py.taxes.difal",
+    "ResultadoCalculoDifal": "motor_tributario_py.taxes.difal",
+    "CalculadoraIssqn": "motor_tributario_py.taxes.issqn",
+    "ResultadoCalculoIssqn": "motor_tributario_py.taxes.issqn",
+    "CalculadoraIpi": "motor_tributario_py.taxes.ipi",
+    "ResultadoCalculoIpi": "motor_tributario_py.taxes.ipi",
+    "CalculadoraPis": "motor_tributario_py.taxes.pis",
+    "ResultadoCalculoPis": "motor_tributario_py.taxes.pis",
+    "CalculadoraCofins": "motor_tributario_py.taxes.cofins",
+    "ResultadoCalculoCofins": "motor_tributario_py.taxes.cofins",
+    "CalculadoraIbpt": "motor_tributario_py.taxes.ibpt",
+    "ResultadoCalculoIbpt": "motor_tributario_py.taxes.ibpt",
+    "CalculadoraFcpSt": "motor_tributario_py.taxes.fcp_st",
+    "ResultadoCalculoFcpSt": "motor_tributario_py.taxes.fcp_st",
+    "CalculadoraFcpStRetido": "motor_tributario_py.taxes.fcp_st",
+    "ResultadoCalculoFcpStRetido": "motor_tributario_py.taxes.fcp_st",
+    "CalculadoraIcmsDesonerado": "motor_tributario_py.taxes.icms_desonerado",
+    "ResultadoCalculoIcmsDesonerado": "motor_tributario_py.taxes.icms_desonerado",
+    "CalculadoraBaseIbsCbs": "motor_tributario_py.taxes.ibs_cbs",
+    "CalculadoraIbs": "motor_tributario_py.taxes.ibs_cbs",
+    "CalculadoraIbsMunicipal": "motor_tributario_py.taxes.ibs_cbs",
+    "CalculadoraCbs": "motor_tributario_py.taxes.ibs_cbs",
+    "CalculadoraIbsCbs": "motor_tributario_py.taxes.ibs_cbs",
+    "ResultadoCalculoIbs": "motor_tributario_py.taxes.ibs_cbs",
+    "ResultadoCalculoCbs": "motor_tributario_py.taxes.ibs_cbs",
+    "ResultadoCalculoIbsCbs": "motor_tributario_py.taxes.ibs_cbs",
+    "CalculadoraIcmsEfetivo": "motor_tributario_py.taxes.icms_efetivo",
+    "ResultadoCalculoIcmsEfetivo": "motor_tributario_py.taxes.icms_efetivo",
+    "CalculadoraIcmsMonofasico": "motor_tributario_py.taxes.icms_monofasico",
+    "ResultadoCalculoIcmsMonofasico": "motor_tributario_py.taxes.icms_monofasico",
+    "CalculadoraFcp": "motor_tributario_py.taxes.fcp",
+    "ResultadoCalculoFcp": "motor_tributario_py.taxes.fcp",
+    "CalculadoraCreditoIcms": "motor_tributario_py.taxes.credito_icms",
+    "ResultadoCalculoCreditoIcms": "motor_tributario_py.taxes.credito_icms",
+    "CalculadoraCsosn": "motor_tributario_py.taxes.csosn",
+    "ResultadoCalculoCsosn": "motor_tributario_py.taxes.csosn",
+}
+
+
+def __getattr__(name: str):
+    try:
+        modulo = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    valor = getattr(importlib.import_module(modulo), name)
+    globals()[name] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
 class FacadeCalculadoraTributacao:
     # ... existing init ...
     def __init__(self, tributavel: Tributavel, **kwargs):
-        register_feel_functions()
+        # FEEL functions are registered by the engine on first evaluation
+        # Overrides from kwargs (used in tests) apply to a copy: the caller's
+        # Tributavel is never modified
+        overrides = {key: value for key, value in kwargs.items() if key in CAMPOS_TRIBUTAVEL}
+        if overrides:
+            tributavel = tributavel.substitui(**overrides)
+        self._inicializa(tributavel)
+
+    def _inicializa(self, tributavel: Tributavel, decisoes_cst: Optional[dict] = None):
         self.tributavel = tributavel
-        # Handle overrides from kwargs (used in tests)
-        for key, value in kwargs.items():
-            if hasattr(self.tributavel, key):
-                setattr(self.tributavel, key, value)
+        # Memoized intermediates (ICMS, IPI, ICMS ST) shared by the calcula_* methods
+        self._contexto = ContextoCalculo(self.tributavel)
+        # CST_DISPATCH decisions by CST (shared by all items of a batch)
+        self._decisoes_cst = {} if decisoes_cst is None else decisoes_cst
+
+    def _decisao_cst(self, cst: str) -> list:
+        from motor_tributario_py.rules.cst_rules import CST_DISPATCH_RULE
+        from motor_tributario_py.engine import decide_single_table
+
+        try:
+            return self._decisoes_cst[cst]
+        except KeyError:
+            decision = decide_single_table(CST_DISPATCH_RULE, {"cst": cst}, strict_mode=False)
+            self._decisoes_cst[cst] = decision
+            return decision
     
+    def _visao(self, nome: str):
+        """Context where the calculation of graph node ``nome`` sees its ``valor_ipi``."""
+        no = no_valor_ipi(nome)
+        valor_ipi = getattr(self, GRAFO_TRIBUTACAO[no].metodo) if no is not None else lambda: None
+        return self._contexto.visao(valor_ipi)
+
+    def _icms_calcula_st(self) -> bool:
+        """True when ``calcula_icms`` also calculates ICMS ST (CST dispatch and ST rates)."""
+        if not self.tributavel.cst:
+            return False
+        decision = self._decisao_cst(str(self.tributavel.cst))
+        if not decision:
+            return False
+        calcular_st = decision[0].get("calcular_icms_st")
+        needs_st = calcular_st == 'true' or calcular_st is True
+        return bool(needs_st and self.tributavel.percentual_icms_st and self.tributavel.percentual_mva)
+
+    def calcula_valor_ipi_st(self) -> Optional[Decimal]:
+        """``valor_ipi`` ICMS ST calculates for its base (None when it uses the informed one)."""
+        return self._contexto.valor_ipi_st()
+
+    def calcula_valor_ipi_icms(self) -> Optional[Decimal]:
+        """``calcula_valor_ipi_st`` when ``calcula_icms`` calculates ICMS ST, else None."""
+        return self.calcula_valor_ipi_st() if self._icms_calcula_st() else None
+
     # ... existing methods ...
 
     # Helper to avoid code duplication for base
     def _calcula_base_ibs_cbs(self) -> Decimal:
-        pis_val = self.calcula_pis().valor.quantize(Decimal('0.01'))
-        cofins_val = self.calcula_cofins().valor.quantize(Decimal('0.01'))
-        icms_val = self.calcula_icms().valor.quantize(Decimal('0.01'))
-        issqn_val = self.calcula_issqn().valor.quantize(Decimal('0.01'))
+        # Shared by IBS, IBS Municipal and CBS: built once per Tributavel state
+        return self._contexto.memoriza("base_ibs_cbs", self._monta_base_ibs_cbs)
+
+    def _monta_base_ibs_cbs(self) -> Decimal:
+        from motor_tributario_py.taxes.ibs_cbs import CalculadoraBaseIbsCbs
+
+        pis_val = arredonda(self.calcula_pis().valor)
+        cofins_val = arredonda(self.calcula_cofins().valor)
+        icms_val = arredonda(self.calcula_icms().valor)
+        issqn_val = arredonda(self.calcula_issqn().valor)
         
-        return CalculadoraBaseIbsCbs(self.tributavel).calcula_base(
+        return CalculadoraBaseIbsCbs(self._contexto.tributavel_calculo()).calcula_base(
             valor_pis=pis_val,
             valor_cofins=cofins_val,
             valor_icms=icms_val,
@@ -50,55 +169,94 @@ class FacadeCalculadoraTributacao:
         )
 
     def calcula_credito_icms(self) -> ResultadoCalculoCreditoIcms:
+        from motor_tributario_py.taxes.credito_icms import CalculadoraCreditoIcms
+
         # Assuming _get_calculator is a placeholder for direct instantiation based on existing methods
         # and the user's instruction is to replace the previous complex logic with a simpler call.
-        return CalculadoraCreditoIcms(self.tributavel).calcula()
+        return CalculadoraCreditoIcms(self._contexto.tributavel_calculo()).calcula()
 
     def calcula_csosn(self) -> ResultadoCalculoCsosn:
+        from motor_tributario_py.taxes.csosn import CalculadoraCsosn
+
         # Assuming _get_calculator is a placeholder for direct instantiation based on existing methods
         # and the user's instruction had a typo.
-        return CalculadoraCsosn(self.tributavel).calcula()
+        return CalculadoraCsosn(self._contexto.tributavel_calculo()).calcula()
 
     def calcula_ibs(self) -> ResultadoCalculoIbs:
-        base = self._calcula_base_ibs_cbs()
-        return CalculadoraIbs(self.tributavel).calcula(base)
+        from motor_tributario_py.taxes.ibs_cbs import CalculadoraIbs
+
+        with self._visao("ibs_cbs"):
+            base = self._calcula_base_ibs_cbs()
+            return CalculadoraIbs(self._contexto.tributavel_calculo()).calcula(base)
 
     def calcula_ibs_municipal(self) -> ResultadoCalculoIbs:
-        base = self._calcula_base_ibs_cbs()
-        return CalculadoraIbsMunicipal(self.tributavel).calcula(base)
+        from motor_tributario_py.taxes.ibs_cbs import CalculadoraIbsMunicipal
+
+        with self._visao("ibs_cbs"):
+            base = self._calcula_base_ibs_cbs()
+            return CalculadoraIbsMunicipal(self._contexto.tributavel_calculo()).calcula(base)
 
     def calcula_cbs(self) -> ResultadoCalculoCbs:
-        base = self._calcula_base_ibs_cbs()
-        return CalculadoraCbs(self.tributavel).calcula(base)
+        from motor_tributario_py.taxes.ibs_cbs import CalculadoraCbs
+
+        with self._visao("ibs_cbs"):
+            base = self._calcula_base_ibs_cbs()
+            return CalculadoraCbs(self._contexto.tributavel_calculo()).calcula(base)
+
+    def calcula_ibs_cbs(self) -> ResultadoCalculoIbsCbs:
+        from motor_tributario_py.taxes.ibs_cbs import CalculadoraIbsCbs
+
+        # IBS UF, IBS Municipal and CBS in one pass over the shared base
+        with self._visao("ibs_cbs"):
+            base = self._calcula_base_ibs_cbs()
+            return CalculadoraIbsCbs(self._contexto.tributavel_calculo()).calcula(base)
 
     def calcula_ibpt(self) -> ResultadoCalculoIbpt:
-        return CalculadoraIbpt(self.tributavel).calcula()
+        from motor_tributario_py.taxes.ibpt import CalculadoraIbpt
+
+        return CalculadoraIbpt(self._contexto.tributavel_calculo()).calcula()
 
     def calcula_fcp_st(self) -> ResultadoCalculoFcpSt:
+        from motor_tributario_py.taxes.fcp_st import CalculadoraFcpSt
+
         # FCP ST depends on IPI for Base Calculation (same as ICMS ST)
-        ipi_result = self.calcula_ipi()
-        return CalculadoraFcpSt(self.tributavel).calcula(valor_ipi=ipi_result.valor)
+        ipi_result = self._contexto.ipi()
+        return CalculadoraFcpSt(self._contexto.tributavel_calculo()).calcula(valor_ipi=ipi_result.valor)
 
     def calcula_fcp_st_retido(self) -> ResultadoCalculoFcpStRetido:
-        return CalculadoraFcpStRetido(self.tributavel).calcula()
+        from motor_tributario_py.taxes.fcp_st import CalculadoraFcpStRetido
+
+        return CalculadoraFcpStRetido(self._contexto.tributavel_calculo()).calcula()
 
     def calcula_icms_desonerado(self) -> ResultadoCalculoIcmsDesonerado:
+        from motor_tributario_py.taxes.icms_desonerado import CalculadoraIcmsDesonerado
+
         # Depends on base calculation from ICMS logic for BaseSimples scenarios
-        icms_result = self.calcula_icms()
-        return CalculadoraIcmsDesonerado(self.tributavel).calcula(base_calculo_icms=icms_result.base_calculo)
+        with self._visao("icms_desonerado"):
+            icms_result = self.calcula_icms()
+            return CalculadoraIcmsDesonerado(self._contexto.tributavel_calculo()).calcula(base_calculo_icms=icms_result.base_calculo)
 
     def calcula_icms_efetivo(self) -> ResultadoCalculoIcmsEfetivo:
-        return CalculadoraIcmsEfetivo(self.tributavel).calcula()
+        from motor_tributario_py.taxes.icms_efetivo import CalculadoraIcmsEfetivo
+
+        return CalculadoraIcmsEfetivo(self._contexto.tributavel_calculo()).calcula()
 
     def calcula_icms_monofasico(self) -> ResultadoCalculoIcmsMonofasico:
-        return CalculadoraIcmsMonofasico(self.tributavel).calcula()
+        from motor_tributario_py.taxes.icms_monofasico import CalculadoraIcmsMonofasico
+
+        return CalculadoraIcmsMonofasico(self._contexto.tributavel_calculo()).calcula()
 
     def calcula_fcp(self) -> ResultadoCalculoFcp:
+        from motor_tributario_py.taxes.fcp import CalculadoraFcp
+
         # FCP uses ICMS Base
-        icms_res = self.calcula_icms()
-        return CalculadoraFcp(self.tributavel).calcula(base_calculo_icms=icms_res.base_calculo)
+        with self._visao("fcp"):
+            icms_res = self.calcula_icms()
+            return CalculadoraFcp(self._contexto.tributavel_calculo()).calcula(base_calculo_icms=icms_res.base_calculo)
 
     def calcula_credito_icms(self, icms_base_calculo: Optional[Decimal] = None) -> ResultadoCalculoCreditoIcms:
+        from motor_tributario_py.taxes.credito_icms import CalculadoraCreditoIcms
+
         # Logic from C#: Switch on Documento
         # CTe -> ValorIcmsSt is the base
         # Others -> BaseCalculoIcms is the base (passed as parameter to avoid recursion)
@@ -115,30 +273,24 @@ class FacadeCalculadoraTributacao:
                  base_to_use = icms_base_calculo
              else:
                  # Fallback: calculate ICMS if not provided (legacy behavior)
-                 icms_res = CalculadoraIcms(self.tributavel).calcula()
+                 icms_res = self._contexto.icms()
                  base_to_use = icms_res.base_calculo
              
-        return CalculadoraCreditoIcms(self.tributavel).calcula(base_calculo=base_to_use)
+        return CalculadoraCreditoIcms(self._contexto.tributavel_calculo()).calcula(base_calculo=base_to_use)
 
     def calcula_icms(self) -> ResultadoCalculoIcms:
-        from motor_tributario_py.rules.cst_rules import CST_DISPATCH_RULE
-        from bkflow_dmn.api import decide_single_table
-        
-        result = CalculadoraIcms(self.tributavel).calcula()
+        # Copy: the ST / credito merge below must not touch the memoized result
+        result = copy.copy(self._contexto.icms())
         
         # Use DMN rules to determine additional calculations needed
         if self.tributavel.cst:
-            facts = {"cst": str(self.tributavel.cst)}
-            decision = decide_single_table(CST_DISPATCH_RULE, facts, strict_mode=False)
+            decision = self._decisao_cst(str(self.tributavel.cst))
             
             if decision:
                 d = decision[0]
                 
                 # Check if ST calculation is needed
-                calcular_st = d.get("calcular_icms_st")
-                needs_st = calcular_st == 'true' or calcular_st is True
-                
-                if needs_st and self.tributavel.percentual_icms_st and self.tributavel.percentual_mva:
+                if self._icms_calcula_st():
                     # Calculate ICMS ST and merge into result
                     st_result = self.calcula_icms_st()
                     result.base_calculo_st = st_result.base_calculo_icms_st
@@ -157,30 +309,41 @@ class FacadeCalculadoraTributacao:
         return result
 
     def calcula_ipi(self) -> ResultadoCalculoIpi:
-        return CalculadoraIpi(self.tributavel).calcula()
+        return copy.copy(self._contexto.ipi())
     
     def calcula_pis(self) -> ResultadoCalculoPis:
+        from motor_tributario_py.taxes.pis import CalculadoraPis
+
         # PIS depends on ICMS value for deduction if configured
-        # Internal calculator handles dependency if needed
-        return CalculadoraPis(self.tributavel).calcula()
+        with self._visao("pis"):
+            valor_icms = self._contexto.valor_icms() if self.tributavel.deduz_icms_da_base_de_pis_cofins else None
+            return CalculadoraPis(self._contexto.tributavel_calculo()).calcula(valor_icms=valor_icms)
 
     def calcula_cofins(self) -> ResultadoCalculoCofins:
+        from motor_tributario_py.taxes.cofins import CalculadoraCofins
+
         # COFINS depends on ICMS value for deduction if configured
-        # Internal calculator handles dependency if needed
-        return CalculadoraCofins(self.tributavel).calcula()
+        with self._visao("cofins"):
+            valor_icms = self._contexto.valor_icms() if self.tributavel.deduz_icms_da_base_de_pis_cofins else None
+            return CalculadoraCofins(self._contexto.tributavel_calculo()).calcula(valor_icms=valor_icms)
 
     def calcula_icms_st(self) -> ResultadoCalculoIcmsSt:
-        # Internal calculator handles dependencies
-        return CalculadoraIcmsSt(self.tributavel).calcula()
+        # IPI and ICMS Proprio come from the context
+        return copy.copy(self._contexto.icms_st())
 
     def calcula_difal(self) -> ResultadoCalculoDifal:
+        from motor_tributario_py.taxes.difal import CalculadoraDifal
+
         # DIFAL depends on IPI and ICMS Proprio logic for base components
         # (Though current implementations re-calculate base internally or assume independent base flows)
         # For DIFAL, we use the specific calculator.
-        return CalculadoraDifal(self.tributavel).calcula()
+        with self._visao("difal"):
+            return CalculadoraDifal(self._contexto.tributavel_calculo()).calcula()
 
     def calcula_issqn(self, calcular_retencoes: bool = False) -> ResultadoCalculoIssqn:
-        return CalculadoraIssqn(self.tributavel).calcula(calcular_retencoes)
+        from motor_tributario_py.taxes.issqn import CalculadoraIssqn
+
+        return CalculadoraIssqn(self._contexto.tributavel_calculo()).calcula(calcular_retencoes)
     
     def debug_execution(self, method_name: str, *args, **kwargs) -> ExecutionReport:
         """
@@ -198,6 +361,8 @@ class FacadeCalculadoraTributacao:
             >>> report = facade.debug_execution('calcula_icms')
             >>> print(report.format_pretty())
         """
+        from motor_tributario_py.audit import AuditManager
+
         return AuditManager.debug_method(self, method_name, *args, **kwargs)
 
     # Aliases to match C# Facade structure for DDT
@@ -210,53 +375,93 @@ class FacadeCalculadoraTributacao:
         return self.calcula_credito_icms()
 
     def calcula_ibpt(self, *args, **kwargs) -> ResultadoCalculoIbpt:
-        return CalculadoraIbpt(self.tributavel).calcula()
-
-    def calcula_tributacao(self) -> 'ResultadoTributacao':
-        # Composite calculation to match C# ResultadoTributacao
-        res_icms = self.calcula_icms()
-        res_ipi = self.calcula_ipi()
-        res_pis = self.calcula_pis()
-        res_cofins = self.calcula_cofins()
-        res_issqn = self.calcula_issqn(calcular_retencoes=True)
-        res_fcp = self.calcula_fcp()
-        res_difal = self.calcula_difal()
-        res_icms_st = self.calcula_icms_st()
-        res_ibpt = self.calcula_ibpt()
-        res_icms_deson = self.calcula_icms_desonerado()
-        res_icms_mono = self.calcula_icms_monofasico()
-        
+        from motor_tributario_py.taxes.ibpt import CalculadoraIbpt
+
+        return CalculadoraIbpt(self._contexto.tributavel_calculo()).calcula()
+
+    def calcula_tributacao(self, saidas: Optional[Iterable[str]] = None) -> 'ResultadoTributacao':
+        """
+        Composite calculation to match C# ResultadoTributacao.
+
+        Args:
+            saidas: Outputs to calculate (node names of ``grafo.GRAFO_TRIBUTACAO``,
+                e.g. ``("icms", "pis", "cofins")`` for an NFC-e). Defaults to
+                ``grafo.SAIDAS_PADRAO``. Only the outputs requested and their
+                dependencies are evaluated; the others are left as None.
+        """
+        return self._executa(_passos_tributacao(SAIDAS_PADRAO if saidas is None else saidas))
+
+    def _executa(self, passos) -> 'ResultadoTributacao':
+        resultados = {}
+        for campo, metodo, argumentos in passos:
+            valor = getattr(self, metodo)(**argumentos)
+            if campo is not None:
+                resultados[campo] = valor
+
         # Determine strict returns for C# assertions (which expect Flat properties)
         # We map them dynamically in ResultadoTributacao class
-        return ResultadoTributacao(
-            res_icms=res_icms,
-            res_ipi=res_ipi,
-            res_pis=res_pis,
-            res_cofins=res_cofins,
-            res_issqn=res_issqn,
-            res_fcp=res_fcp,
-            res_difal=res_difal,
-            res_icms_st=res_icms_st,
-            res_ibpt=res_ibpt,
-            res_icms_desonerado=res_icms_deson,
-            res_icms_monofasico=res_icms_mono
-        )
+        return ResultadoTributacao(**resultados)
+
+
+def _passos_tributacao(saidas: Iterable[str]) -> list:
+    """(ResultadoTributacao field or None for internal nodes, facade method, kwargs) of each step, in order."""
+    return [
+        (None if GRAFO_TRIBUTACAO[nome].interno else "res_" + nome,
+         GRAFO_TRIBUTACAO[nome].metodo, dict(GRAFO_TRIBUTACAO[nome].argumentos))
+        for nome in ordem_calculo(saidas)
+    ]
+
+
+def calcula_tributacao_lote(itens: Iterable[Tributavel], saidas: Optional[Iterable[str]] = None,
+                            erros: Optional[Callable[[int, Exception], Any]] = None) -> List['ResultadoTributacao']:
+    """
+    ``calcula_tributacao`` for every item of a document (or cart).
+
+    FEEL function registration, the calculation plan and the CST dispatch
+    decisions are resolved once for the whole batch instead of once per item.
+
+    Args:
+        itens: Tributavel items (not modified, like with calcula_tributacao)
+        saidas: Outputs to calculate, see ``FacadeCalculadoraTributacao.calcula_tributacao``
+        erros: Called with (position, exception) when an item fails; its return
+            value takes the item's place and the batch goes on.  Without it
+            the first failure is raised.
+
+    Returns:
+        One ResultadoTributacao per item, in input order
+    """
+    passos = _passos_tributacao(SAIDAS_PADRAO if saidas is None else saidas)
+    decisoes_cst = {}
+
+    resultados = []
+    for posicao, tributavel in enumerate(itens):
+        facade = FacadeCalculadoraTributacao.__new__(FacadeCalculadoraTributacao)
+        try:
+            facade._inicializa(tributavel, decisoes_cst)
+            resultados.append(facade._executa(passos))
+        except Exception as e:
+            if erros is None:
+                raise
+            resultados.append(erros(posicao, e))
+    return resultados
 
 @dataclass
 class ResultadoTributacao:
     
     # Use res_ prefix to avoid name collision with properties (especially fcp)
-    res_icms: ResultadoCalculoIcms
-    res_ipi: ResultadoCalculoIpi
-    res_pis: ResultadoCalculoPis
-    res_cofins: ResultadoCalculoCofins
-    res_issqn: ResultadoCalculoIssqn
-    res_fcp: ResultadoCalculoFcp
-    res_difal: ResultadoCalculoDifal
-    res_icms_st: ResultadoCalculoIcmsSt
-    res_ibpt: ResultadoCalculoIbpt
-    res_icms_desonerado: ResultadoCalculoIcmsDesonerado
-    res_icms_monofasico: ResultadoCalculoIcmsMonofasico
+    # Outputs not requested from calcula_tributacao are None
+    res_icms: Optional[ResultadoCalculoIcms] = None
+    res_ipi: Optional[ResultadoCalculoIpi] = None
+    res_pis: Optional[ResultadoCalculoPis] = None
+    res_cofins: Optional[ResultadoCalculoCofins] = None
+    res_issqn: Optional[ResultadoCalculoIssqn] = None
+    res_fcp: Optional[ResultadoCalculoFcp] = None
+    res_difal: Optional[ResultadoCalculoDifal] = None
+    res_icms_st: Optional[ResultadoCalculoIcmsSt] = None
+    res_ibpt: Optional[ResultadoCalculoIbpt] = None
+    res_icms_desonerado: Optional[ResultadoCalculoIcmsDesonerado] = None
+    res_icms_monofasico: Optional[ResultadoCalculoIcmsMonofasico] = None
+    res_ibs_cbs: Optional[ResultadoCalculoIbsCbs] = None
     
     @property
     def valor_bc_icms(self): return self.res_icms.base_calculo
@@ -335,3 +540,13 @@ class ResultadoTributacao:
     def valor_icms_monofasico_diferido(self): return self.res_icms_monofasico.valor_icms_monofasico_diferido
     @property
     def valor_icms_monofasico_retido_anteriormente(self): return self.res_icms_monofasico.valor_icms_monofasico_retido_anteriormente
+
+    # IBS/CBS (only when requested)
+    @property
+    def base_calculo_ibs_cbs(self): return self.res_ibs_cbs.base_calculo
+    @property
+    def valor_ibs_uf(self): return self.res_ibs_cbs.ibs.valor
+    @property
+    def valor_ibs_municipal(self): return self.res_ibs_cbs.ibs_municipal.valor
+    @property
+    def valor_cbs(self): return self.res_ibs_cbs.cbs.valor
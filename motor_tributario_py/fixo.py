@@ -0,0 +1,79 @@
+"""
+Exact fixed-point (scaled-integer) arithmetic helpers.
+
+A value ``inteiro / 10**escala`` held as an integer is exact under sums,
+differences and products; rounding only happens where it is asked for, with
+an explicit rounding mode (the ``decimal`` module's ``ROUND_*`` constants).
+:func:`divide_arredondando` rounds like ``Decimal.quantize``, e.g. for
+``valor = Decimal(inteiro).scaleb(-4)``::
+
+    divide_arredondando(inteiro, 100) == valor.quantize(Decimal('0.01')).scaleb(2)
+
+It is written with operators only, so it works for Python ints and for numpy
+integer arrays alike; the columnar engine (:mod:`motor_tributario_py.colunar`)
+uses it for its array columns.
+
+:func:`quantiza` is ``Decimal.quantize`` on scaled integers (same value, sign
+and exponent).  The calculators round through :func:`arredonda`, which uses
+it when ``engine.set_fixed_point_rounding(True)`` is on.
+"""
+from decimal import (
+    Context, Decimal, MAX_EMAX, MAX_PREC, MIN_EMIN,
+    ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, ROUND_HALF_DOWN, ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_UP,
+)
+
+# Context that never rounds, used to convert Decimals
+CONTEXTO_EXATO = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+CENTAVO = Decimal('0.01')
+
+
+def divide_arredondando(numerador, divisor: int, arredondamento: str = ROUND_HALF_EVEN):
+    """``numerador / divisor`` rounded to an integer (``divisor`` > 0).
+
+    ``numerador`` may be an int or a numpy integer array.
+    """
+    quociente = numerador // divisor
+    resto = numerador - quociente * divisor  # 0 <= resto < divisor
+    if arredondamento == ROUND_FLOOR:
+        return quociente
+    if arredondamento == ROUND_CEILING:
+        return quociente + (resto != 0)
+    if arredondamento == ROUND_UP:
+        # Away from zero: the floor already is for negatives
+        return quociente + ((resto != 0) & (numerador > 0))
+    if arredondamento == ROUND_DOWN:
+        return quociente + ((resto != 0) & (numerador < 0))
+
+    dobro = resto * 2
+    if arredondamento == ROUND_HALF_EVEN:
+        return quociente + ((dobro > divisor) | ((dobro == divisor) & (quociente % 2 == 1)))
+    if arredondamento == ROUND_HALF_UP:
+        return quociente + ((dobro > divisor) | ((dobro == divisor) & (numerador > 0)))
+    if arredondamento == ROUND_HALF_DOWN:
+        return quociente + ((dobro > divisor) | ((dobro == divisor) & (numerador < 0)))
+    raise ValueError(f"Unsupported rounding mode: {arredondamento}")
+
+
+
+def quantiza(valor: Decimal, expoente: Decimal = CENTAVO, arredondamento: str = ROUND_HALF_EVEN) -> Decimal:
+    """``valor.quantize(expoente, rounding=arredondamento)`` through :func:`divide_arredondando`."""
+    if not valor.is_finite():
+        return valor.quantize(expoente, rounding=arredondamento)
+    sinal, digitos, expoente_valor = valor.as_tuple()
+    alvo = expoente.as_tuple().exponent
+    inteiro = int("".join(map(str, digitos)))
+    if expoente_valor >= alvo:
+        inteiro *= 10 ** (expoente_valor - alvo)
+    else:
+        inteiro = abs(divide_arredondando(-inteiro if sinal else inteiro, 10 ** (alvo - expoente_valor),
+                                          arredondamento))
+    return Decimal((sinal, tuple(map(int, str(inteiro))), alvo))
+
+
+def arredonda(valor: Decimal, expoente: Decimal = CENTAVO, arredondamento: str = ROUND_HALF_EVEN) -> Decimal:
+    """Rounding point of the calculators: :func:`quantiza` or ``Decimal.quantize``, see the engine switch."""
+    from motor_tributario_py import engine
+
+    if engine.fixed_point_rounding_enabled():
+        return quantiza(valor, expoente, arredondamento)
+    return valor.quantize(expoente, rounding=arredondamento)
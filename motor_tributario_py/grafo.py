@@ -0,0 +1,105 @@
+"""
+Dependency graph of the composite calculation (``calcula_tributacao``).
+
+Each node names a facade method and the nodes whose results it consumes.
+``ordem_calculo`` returns the subgraph needed for the requested outputs in
+topological order, so a caller that only needs e.g. ICMS + PIS + COFINS
+(NFC-e) does not pay for DIFAL, IBPT, monofásico or ISSQN retentions.
+
+When the item has IPI but no ``valor_ipi``, ICMS ST calculates the IPI for
+its base, and in the historical ``calcula_tributacao`` sequence the
+calculations after it saw that value as ``valor_ipi``.  Two internal nodes
+(not fields of ``ResultadoTributacao``) make this explicit:
+
+- ``valor_ipi_st``: the ``valor_ipi`` ICMS ST calculates (None when the
+  informed one is used), seen by the calculations that came after ICMS ST
+  (Desonerado);
+- ``valor_ipi_icms``: the same value when the CST makes ICMS calculate ST
+  (CST 10, 30, 70, ...), None otherwise; seen by the calculations that came
+  after ICMS (PIS, COFINS, FCP, DIFAL, IBS/CBS).
+
+Every calculation that reads ``valor_ipi`` depends on one of them (ICMS,
+IPI and ICMS ST use the informed one), so an output has the same value
+whatever the other requested outputs are.  Ties are broken by declaration
+order, the historical sequence.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class NoCalculo:
+    nome: str
+    metodo: str
+    dependencias: Tuple[str, ...] = ()
+    # (name, value) keyword arguments of ``metodo``
+    argumentos: Tuple[Tuple[str, Any], ...] = ()
+    # Intermediate value, not a field of ResultadoTributacao
+    interno: bool = False
+
+
+GRAFO_TRIBUTACAO: Dict[str, NoCalculo] = {no.nome: no for no in (
+    NoCalculo("icms", "calcula_icms"),
+    NoCalculo("ipi", "calcula_ipi"),
+    NoCalculo("valor_ipi_st", "calcula_valor_ipi_st", ("ipi",), interno=True),
+    NoCalculo("valor_ipi_icms", "calcula_valor_ipi_icms", ("valor_ipi_st",), interno=True),
+    NoCalculo("pis", "calcula_pis", ("icms", "valor_ipi_icms")),
+    NoCalculo("cofins", "calcula_cofins", ("icms", "valor_ipi_icms")),
+    NoCalculo("issqn", "calcula_issqn", argumentos=(("calcular_retencoes", True),)),
+    NoCalculo("fcp", "calcula_fcp", ("icms", "valor_ipi_icms")),
+    NoCalculo("difal", "calcula_difal", ("valor_ipi_icms",)),
+    NoCalculo("icms_st", "calcula_icms_st", ("icms", "ipi")),
+    NoCalculo("ibpt", "calcula_ibpt"),
+    NoCalculo("icms_desonerado", "calcula_icms_desonerado", ("icms", "valor_ipi_st")),
+    NoCalculo("icms_monofasico", "calcula_icms_monofasico"),
+    # ISSQN enters the base without retentions: not the ``issqn`` output
+    NoCalculo("ibs_cbs", "calcula_ibs_cbs", ("pis", "cofins", "icms", "valor_ipi_icms")),
+)}
+
+
+def no_valor_ipi(nome: str) -> Optional[str]:
+    """Internal node whose ``valor_ipi`` the node ``nome`` is calculated with (None: the informed one)."""
+    for dependencia in GRAFO_TRIBUTACAO[nome].dependencias:
+        if GRAFO_TRIBUTACAO[dependencia].interno:
+            return dependencia
+    return None
+
+
+# Outputs of calcula_tributacao() when none are requested
+SAIDAS_PADRAO = (
+    "icms", "ipi", "pis", "cofins", "issqn", "fcp", "difal",
+    "icms_st", "ibpt", "icms_desonerado", "icms_monofasico",
+)
+
+
+def ordem_calculo(saidas: Iterable[str]) -> Tuple[str, ...]:
+    """Nodes needed for ``saidas`` (dependencies included), in evaluation order."""
+    return _ordem_calculo(frozenset(saidas))
+
+
+@lru_cache(maxsize=None)
+def _ordem_calculo(saidas: frozenset) -> Tuple[str, ...]:
+    desconhecidas = saidas - GRAFO_TRIBUTACAO.keys()
+    if desconhecidas:
+        raise ValueError(f"Unknown outputs: {', '.join(sorted(desconhecidas))}")
+
+    # Depth-first walk: dependencies first, siblings in declaration order
+    declaracao = list(GRAFO_TRIBUTACAO)
+    ordem = []
+    visitando = set()
+
+    def visita(nome):
+        if nome in ordem:
+            return
+        if nome in visitando:
+            raise ValueError(f"Dependency cycle at {nome!r}")
+        visitando.add(nome)
+        for dependencia in sorted(GRAFO_TRIBUTACAO[nome].dependencias, key=declaracao.index):
+            visita(dependencia)
+        visitando.discard(nome)
+        ordem.append(nome)
+
+    for nome in sorted(saidas, key=declaracao.index):
+        visita(nome)
+    return tuple(ordem)
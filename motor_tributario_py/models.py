@@ -1,6 +1,9 @@
-from dataclasses import dataclass
+import threading
+import weakref
+from dataclasses import dataclass, fields, replace
 from decimal import Decimal
-from typing import Optional
+from operator import attrgetter
+from typing import Any, Callable, Dict, FrozenSet, Optional
 
 @dataclass
 class Tributavel:
@@ -16,7 +19,6 @@ class Tributavel:
     # Flags / Booleans
     is_servico: bool = False
     is_ativo_imobilizado_ou_uso_consumo: bool = False
-    is_ativo_imobilizado_ou_uso_consumo: bool = False
     tipo_desconto: str = "Incondicional"  # "Condicional" or "Incondicional"
     cst: str = "" # e.g. "20", "70", "30", "40"
     tipo_calculo_icms_desonerado: str = "" # "BaseSimples" or "BasePorDentro"
@@ -40,7 +42,7 @@ class Tributavel:
     percentual_mva: Decimal = Decimal('0.00')
     percentual_reducao_st: Decimal = Decimal('0.00')
 
-    # FCP / Credito
+    # FCP (Proprio) / Credito ICMS
     percentual_fcp: Decimal = Decimal('0.00')
     percentual_fcp_st: Decimal = Decimal('0.00')
     percentual_credito: Decimal = Decimal('0.00')
@@ -74,11 +76,7 @@ class Tributavel:
     percentual_reducao_ibs_municipal: Decimal = Decimal('0.00')
     percentual_reducao_cbs: Decimal = Decimal('0.00')
 
-    # FCP (Proprio)
-    percentual_fcp: Decimal = Decimal('0.00')
-    
-    # Credito ICMS
-    percentual_credito: Decimal = Decimal('0.00')
+    # Credito ICMS (percentual_credito is declared with FCP above)
     documento: str = "" # e.g. "NFe", "CTe", "MFe" 
     
     # ICMS Efetivo
@@ -108,3 +106,372 @@ class Tributavel:
     # PIS/COFINS Flags
     deduz_icms_da_base_de_pis_cofins: bool = False
 
+    def substitui(self, **alteracoes) -> "Tributavel":
+        """Copy with ``alteracoes`` applied (``dataclasses.replace``); every variant has it."""
+        return replace(self, **alteracoes)
+
+
+# Field names of Tributavel, in declaration order
+CAMPOS_TRIBUTAVEL = tuple(f.name for f in fields(Tributavel))
+_le_campos = attrgetter(*CAMPOS_TRIBUTAVEL)
+
+
+def estado_tributavel(tributavel: Tributavel) -> tuple:
+    """Snapshot of every field value, used to detect changes to a Tributavel."""
+    return _le_campos(tributavel)
+
+
+def dados_tributavel(tributavel) -> Dict[str, Any]:
+    """Field name -> value of any Tributavel variant."""
+    return dict(zip(CAMPOS_TRIBUTAVEL, _le_campos(tributavel)))
+
+
+# Compact variants
+# ----------------
+# ``Tributavel`` keeps a ``__dict__`` per instance.  The variants below store
+# the same fields in ``__slots__`` (defaults are shared, as in the dataclass)
+# and accept the same constructor arguments, so they can be passed anywhere a
+# Tributavel is expected.  ``TributavelEsparso`` also keeps the rarely used
+# groups below in a dict holding only the fields that differ from the
+# default, which is absent (None) for most items.
+
+GRUPOS_RAROS: Dict[str, tuple] = {
+    "monofasico": (
+        "quantidade_base_calculo_icms_monofasico", "aliquota_ad_rem_icms",
+        "percentual_reducao_aliquota_ad_rem_icms", "percentual_biodiesel", "percentual_originario_uf",
+        "quantidade_base_calculo_icms_monofasico_retido_anteriormente",
+        "aliquota_ad_rem_icms_retido_anteriormente",
+    ),
+    "ibs_cbs": (
+        "percentual_ibs_uf", "percentual_ibs_municipal", "percentual_cbs",
+        "percentual_reducao_ibs_uf", "percentual_reducao_ibs_municipal", "percentual_reducao_cbs",
+        "somar_pis_na_base_ibs_cbs", "somar_cofins_na_base_ibs_cbs",
+        "somar_icms_na_base_ibs_cbs", "somar_issqn_na_base_ibs_cbs",
+    ),
+    "retencoes_issqn": (
+        "percentual_ret_pis", "percentual_ret_cofins", "percentual_ret_csll",
+        "percentual_ret_irrf", "percentual_ret_inss",
+    ),
+}
+CAMPOS_RAROS: FrozenSet[str] = frozenset(campo for grupo in GRUPOS_RAROS.values() for campo in grupo)
+
+_PADROES = {f.name: f.default for f in fields(Tributavel)}
+
+
+def _e_padrao(valor: Any, padrao: Any) -> bool:
+    """True when ``valor`` can be replaced by ``padrao`` (same type, value and Decimal exponent)."""
+    if valor is padrao:
+        return True
+    if type(valor) is not type(padrao) or valor != padrao:
+        return False
+    return not isinstance(valor, Decimal) or valor.as_tuple() == padrao.as_tuple()
+
+
+class _TributavelSlots:
+    """Behaviour shared by the slotted variants (constructor, eq, repr, copies)."""
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        nome_classe = type(self).__name__
+        if len(args) > len(CAMPOS_TRIBUTAVEL):
+            raise TypeError(f"{nome_classe}() takes at most {len(CAMPOS_TRIBUTAVEL)} positional arguments")
+        valores = dict(_PADROES)
+        posicionais = CAMPOS_TRIBUTAVEL[:len(args)]
+        valores.update(zip(posicionais, args))
+        for nome, valor in kwargs.items():
+            if nome not in valores:
+                raise TypeError(f"{nome_classe}() got an unexpected keyword argument {nome!r}")
+            if nome in posicionais:
+                raise TypeError(f"{nome_classe}() got multiple values for argument {nome!r}")
+            valores[nome] = valor
+        self._inicializa(valores)
+
+    def _inicializa(self, valores: Dict[str, Any]) -> None:
+        for nome, valor in valores.items():
+            setattr(self, nome, valor)
+
+    @classmethod
+    def de_tributavel(cls, tributavel) -> "_TributavelSlots":
+        """Variant holding the fields of ``tributavel`` (any variant)."""
+        return cls(**dados_tributavel(tributavel))
+
+    def como_tributavel(self) -> Tributavel:
+        return Tributavel(**dados_tributavel(self))
+
+    def substitui(self, **alteracoes) -> "_TributavelSlots":
+        """Copy with ``alteracoes`` applied, like ``Tributavel.substitui``."""
+        return type(self)(**{**dados_tributavel(self), **alteracoes})
+
+    def __eq__(self, other):
+        if not isinstance(other, (Tributavel, _TributavelSlots)):
+            return NotImplemented
+        return estado_tributavel(self) == estado_tributavel(other)
+
+    __hash__ = None  # mutable, like the dataclass
+
+    def __repr__(self):
+        campos = ", ".join(f"{nome}={valor!r}" for nome, valor in dados_tributavel(self).items())
+        return f"{type(self).__name__}({campos})"
+
+    def __getstate__(self):
+        return estado_tributavel(self)
+
+    def __setstate__(self, estado):
+        self._inicializa(dict(zip(CAMPOS_TRIBUTAVEL, estado)))
+
+
+class TributavelCompacto(_TributavelSlots):
+    """``Tributavel`` with every field in ``__slots__``."""
+    __slots__ = CAMPOS_TRIBUTAVEL
+
+
+class TributavelEsparso(_TributavelSlots):
+    """``Tributavel`` with the common fields in ``__slots__`` and :data:`GRUPOS_RAROS` in a sparse dict."""
+    __slots__ = tuple(campo for campo in CAMPOS_TRIBUTAVEL if campo not in CAMPOS_RAROS) + ("_raros",)
+
+    def _inicializa(self, valores: Dict[str, Any]) -> None:
+        self._raros = None
+        super()._inicializa(valores)
+
+    def campos_preenchidos(self) -> FrozenSet[str]:
+        """Rare fields holding a non-default value."""
+        return frozenset(self._raros or ())
+
+
+def _campo_esparso(nome: str) -> property:
+    padrao = _PADROES[nome]
+
+    def le(self):
+        raros = self._raros
+        return padrao if raros is None else raros.get(nome, padrao)
+
+    def escreve(self, valor):
+        raros = self._raros
+        if _e_padrao(valor, padrao):
+            if raros and nome in raros:
+                del raros[nome]
+                if not raros:
+                    self._raros = None
+        elif raros is None:
+            self._raros = {nome: valor}
+        else:
+            raros[nome] = valor
+
+    return property(le, escreve)
+
+
+for _nome in CAMPOS_RAROS:
+    setattr(TributavelEsparso, _nome, _campo_esparso(_nome))
+del _nome
+
+
+# Interned profiles
+# -----------------
+# Items of a catalog or an invoice usually share their rates and flags and
+# only differ in the line values.  ``TributavelLinha`` holds the line values
+# (:data:`CAMPOS_LINHA`) and a reference to a ``PerfilTributario``: every
+# other field, immutable and interned by :data:`REGISTRO_PERFIS`, so equal
+# profiles are the same object and can be keyed on by identity.
+
+# Per-line values (the "Basic Values" of Tributavel)
+CAMPOS_LINHA = (
+    "valor_produto", "frete", "seguro", "outras_despesas", "desconto", "valor_ipi", "quantidade_produto",
+)
+# Rates, flags and configuration held by PerfilTributario
+CAMPOS_PERFIL_TRIBUTARIO = tuple(campo for campo in CAMPOS_TRIBUTAVEL if campo not in CAMPOS_LINHA)
+
+
+class PerfilTributario:
+    """Immutable, hashable :data:`CAMPOS_PERFIL_TRIBUTARIO` of a Tributavel.
+
+    Get instances from :data:`REGISTRO_PERFIS` (``perfil``, ``de_tributavel``,
+    ``substitui``), which returns one shared object per distinct profile.
+    """
+    __slots__ = ("_valores", "_chave", "_hash", "_derivados", "__weakref__")
+
+    def __init__(self, **campos):
+        desconhecidos = campos.keys() - _PADROES_PERFIL.keys()
+        if desconhecidos:
+            raise TypeError(f"PerfilTributario() got unexpected fields {sorted(desconhecidos)}")
+        valores = tuple(campos.get(nome, padrao) for nome, padrao in _PADROES_PERFIL.items())
+        chave = tuple(map(_canonico, valores))
+        object.__setattr__(self, "_valores", valores)
+        object.__setattr__(self, "_chave", chave)
+        object.__setattr__(self, "_hash", hash(chave))
+        object.__setattr__(self, "_derivados", {})
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError(f"PerfilTributario is immutable (use substitui to change {nome!r})")
+
+    __delattr__ = __setattr__
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, PerfilTributario):
+            return NotImplemented
+        return self._hash == other._hash and self._chave == other._chave
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        campos = ", ".join(f"{nome}={valor!r}" for nome, valor in self.dados().items()
+                           if not _e_padrao(valor, _PADROES_PERFIL[nome]))
+        return f"PerfilTributario({campos})"
+
+    def __reduce__(self):
+        # Unpickled profiles are interned in the receiving process
+        return (_perfil_interno, (self.dados(),))
+
+    def dados(self) -> Dict[str, Any]:
+        return dict(zip(CAMPOS_PERFIL_TRIBUTARIO, self._valores))
+
+    def substitui(self, **alteracoes) -> "PerfilTributario":
+        """Interned profile with ``alteracoes`` applied."""
+        return REGISTRO_PERFIS.perfil(**{**self.dados(), **alteracoes})
+
+    def linha(self, **valores) -> "TributavelLinha":
+        """Item of this profile with the line values ``valores`` (:data:`CAMPOS_LINHA`)."""
+        return TributavelLinha.de_perfil(self, **valores)
+
+    def derivado(self, chave: Any, calcula: Callable[[], Any]) -> Any:
+        """Value derived from the profile only, calculated once per profile (e.g. dispatch keys)."""
+        derivados = self._derivados
+        try:
+            return derivados[chave]
+        except KeyError:
+            return derivados.setdefault(chave, calcula())
+
+
+def _canonico(valor: Any) -> tuple:
+    # Decimal('18') == Decimal('18.00') and True == 1, but results keep the
+    # exponent and the type: profiles holding them are distinct
+    if type(valor) is Decimal:
+        return Decimal, str(valor)
+    return type(valor), valor
+
+
+_PADROES_PERFIL = {campo: _PADROES[campo] for campo in CAMPOS_PERFIL_TRIBUTARIO}
+_le_perfil_tributario = attrgetter(*CAMPOS_PERFIL_TRIBUTARIO)
+
+
+def _campo_perfil(posicao: int) -> property:
+    def le(self):
+        return self._valores[posicao]
+    return property(le)
+
+
+for _posicao, _nome in enumerate(CAMPOS_PERFIL_TRIBUTARIO):
+    setattr(PerfilTributario, _nome, _campo_perfil(_posicao))
+del _posicao, _nome
+
+
+class RegistroPerfis:
+    """Interns ``PerfilTributario`` instances: one object per distinct profile.
+
+    Profiles no longer referenced by any item are dropped (weak references),
+    so the registry does not grow with the number of runs.  Thread-safe.
+    """
+
+    def __init__(self):
+        self._perfis: "weakref.WeakValueDictionary[PerfilTributario, PerfilTributario]" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def interna(self, perfil: PerfilTributario) -> PerfilTributario:
+        """The shared instance equal to ``perfil``."""
+        existente = self._perfis.get(perfil)
+        if existente is not None:
+            return existente
+        with self._lock:
+            return self._perfis.setdefault(perfil, perfil)
+
+    def perfil(self, **campos) -> PerfilTributario:
+        return self.interna(PerfilTributario(**campos))
+
+    def de_tributavel(self, tributavel) -> PerfilTributario:
+        """Profile of ``tributavel`` (any variant)."""
+        if isinstance(tributavel, TributavelLinha):
+            return tributavel.perfil
+        return self.interna(PerfilTributario(**dict(zip(CAMPOS_PERFIL_TRIBUTARIO, _le_perfil_tributario(tributavel)))))
+
+    def __len__(self):
+        return len(self._perfis)
+
+    def __contains__(self, perfil):
+        return perfil in self._perfis
+
+
+REGISTRO_PERFIS = RegistroPerfis()
+
+
+def _perfil_interno(campos: Dict[str, Any]) -> PerfilTributario:
+    return REGISTRO_PERFIS.perfil(**campos)
+
+
+class TributavelLinha(_TributavelSlots):
+    """``Tributavel`` made of the line values and a shared, interned :class:`PerfilTributario`.
+
+    Profile fields read through to ``perfil``; assigning one replaces
+    ``perfil`` with the interned profile holding the new value.
+    """
+    __slots__ = CAMPOS_LINHA + ("perfil",)
+
+    def _inicializa(self, valores: Dict[str, Any]) -> None:
+        for nome in CAMPOS_LINHA:
+            setattr(self, nome, valores[nome])
+        self.perfil = REGISTRO_PERFIS.perfil(**{nome: valores[nome] for nome in CAMPOS_PERFIL_TRIBUTARIO})
+
+    @classmethod
+    def de_perfil(cls, perfil: PerfilTributario, **valores) -> "TributavelLinha":
+        """Item of ``perfil`` with the line values ``valores`` (others default)."""
+        desconhecidos = valores.keys() - _PADROES_LINHA.keys()
+        if desconhecidos:
+            raise TypeError(f"not line values: {sorted(desconhecidos)}")
+        linha = cls.__new__(cls)
+        for nome, padrao in _PADROES_LINHA.items():
+            setattr(linha, nome, valores.get(nome, padrao))
+        linha.perfil = REGISTRO_PERFIS.interna(perfil)
+        return linha
+
+    @classmethod
+    def de_tributavel(cls, tributavel) -> "TributavelLinha":
+        return cls.de_perfil(REGISTRO_PERFIS.de_tributavel(tributavel),
+                             **dict(zip(CAMPOS_LINHA, _le_linha(tributavel))))
+
+    def substitui(self, **alteracoes) -> "TributavelLinha":
+        """Copy with ``alteracoes`` applied; the profile is shared unless a profile field changes."""
+        linha = {nome: alteracoes.pop(nome, valor) for nome, valor in zip(CAMPOS_LINHA, _le_linha(self))}
+        perfil = self.perfil.substitui(**alteracoes) if alteracoes else self.perfil
+        return type(self).de_perfil(perfil, **linha)
+
+    def __getstate__(self):
+        # The profile pickles once per dump however many lines share it
+        return _le_linha(self), self.perfil
+
+    def __setstate__(self, estado):
+        valores, perfil = estado
+        for nome, valor in zip(CAMPOS_LINHA, valores):
+            setattr(self, nome, valor)
+        self.perfil = perfil
+
+
+_PADROES_LINHA = {campo: _PADROES[campo] for campo in CAMPOS_LINHA}
+_le_linha = attrgetter(*CAMPOS_LINHA)
+
+
+def _campo_do_perfil(nome: str) -> property:
+    le_perfil = attrgetter(nome)
+
+    def le(self):
+        return le_perfil(self.perfil)
+
+    def escreve(self, valor):
+        self.perfil = self.perfil.substitui(**{nome: valor})
+
+    return property(le, escreve)
+
+
+for _nome in CAMPOS_PERFIL_TRIBUTARIO:
+    setattr(TributavelLinha, _nome, _campo_do_perfil(_nome))
+del _nome
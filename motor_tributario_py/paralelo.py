@@ -0,0 +1,161 @@
+"""
+Multi-process batch calculation.
+
+Bulk recalculation (e.g. month-end repricing of millions of invoice lines)
+is CPU-bound in the Decimal/FEEL path, so one process uses one core.
+:class:`ExecutorParalelo` spreads ``calcula_tributacao`` over a
+``ProcessPoolExecutor``: items are shipped in chunks of ``tamanho_lote``
+(``TributavelLinha`` items of one profile pickle it once per chunk), each
+chunk is calculated like :func:`~motor_tributario_py.facade.calcula_tributacao_lote`
+and results come back in input order.
+
+Workers are warmed up before their first chunk: the FEEL functions are
+registered, the engine modes of the parent (compiled/linear/zero rules) are
+applied and every table in ``rules/`` is restored from the snapshot
+(:func:`~motor_tributario_py.engine.load_snapshot`) or, without a usable
+snapshot, indexed and compiled.
+
+An item whose calculation raises does not stop the batch: its position
+holds an :class:`ErroItem` instead of a ``ResultadoTributacao``.  A chunk
+lost with its worker (e.g. a killed process) is reported the same way for
+each of its items.
+
+Example:
+    >>> with ExecutorParalelo(processos=8) as executor:
+    ...     for indice, resultado in enumerate(executor.calcula_tributacao_iter(itens)):
+    ...         if isinstance(resultado, ErroItem):
+    ...             log.warning("item %d: %s", indice, resultado)
+"""
+import os
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from motor_tributario_py.facade import ResultadoTributacao, calcula_tributacao_lote
+from motor_tributario_py.grafo import SAIDAS_PADRAO, ordem_calculo
+from motor_tributario_py.models import Tributavel
+
+
+@dataclass
+class ErroItem:
+    """Failure of one item of a batch."""
+
+    indice: int
+    tipo: str
+    mensagem: str
+    detalhes: str = ""
+
+    def __str__(self):
+        return f"{self.tipo}: {self.mensagem}"
+
+
+def _erro(indice: int, erro: BaseException) -> ErroItem:
+    detalhes = "".join(traceback.format_exception(type(erro), erro, erro.__traceback__))
+    return ErroItem(indice, type(erro).__name__, str(erro), detalhes)
+
+
+def prepara_worker(compiled: bool = False, linear: bool = False, snapshot: Optional[str] = None,
+                   zeros: bool = False, fixed_point: bool = False) -> None:
+    """Warm up the engine of the current process (initializer of the workers)."""
+    from motor_tributario_py import engine
+    from motor_tributario_py.engine.analysis import rule_tables
+    from motor_tributario_py.utils.functions import register_feel_functions
+
+    register_feel_functions()
+    engine.set_compiled_rules(compiled)
+    engine.set_linear_rules(linear)
+    engine.set_zero_rules(zeros)
+    engine.set_fixed_point_rounding(fixed_point)
+    if not engine.load_snapshot(snapshot):
+        for table in rule_tables().values():
+            engine.get_indexed(table)
+            engine.get_compiled(table)
+    if linear:
+        for table in rule_tables().values():
+            engine.get_linear(table)
+
+
+def calcula_lote(inicio: int, itens: Sequence[Tributavel],
+                 saidas: Tuple[str, ...]) -> List[Union[ResultadoTributacao, ErroItem]]:
+    """``calcula_tributacao`` of a chunk starting at position ``inicio``, failures as :class:`ErroItem`."""
+    return calcula_tributacao_lote(itens, saidas, erros=lambda posicao, erro: _erro(inicio + posicao, erro))
+
+
+class ExecutorParalelo:
+    """``calcula_tributacao`` over a pool of warmed-up worker processes.
+
+    Args:
+        processos: Worker processes (default ``os.cpu_count()``)
+        tamanho_lote: Items per chunk sent to a worker
+        snapshot: Snapshot path for the workers (default location when None)
+        mp_context: ``multiprocessing`` context of the pool (e.g. ``get_context("spawn")``)
+    """
+
+    def __init__(self, processos: Optional[int] = None, tamanho_lote: int = 500,
+                 snapshot: Optional[str] = None, mp_context=None):
+        from motor_tributario_py import engine
+
+        if tamanho_lote < 1:
+            raise ValueError("tamanho_lote must be at least 1")
+        self.processos = processos or os.cpu_count() or 1
+        self.tamanho_lote = tamanho_lote
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.processos,
+            mp_context=mp_context,
+            initializer=prepara_worker,
+            initargs=(engine.compiled_rules_enabled(), engine.linear_rules_enabled(),
+                      None if snapshot is None else str(snapshot), engine.zero_rules_enabled(),
+                      engine.fixed_point_rounding_enabled()),
+        )
+
+    def calcula_tributacao_iter(self, itens: Iterable[Tributavel], saidas: Optional[Iterable[str]] = None
+                                ) -> Iterator[Union[ResultadoTributacao, ErroItem]]:
+        """One ``ResultadoTributacao`` (or :class:`ErroItem`) per item, in input order.
+
+        ``itens`` is read lazily: at most two chunks per worker are in flight,
+        so arbitrarily long inputs run in bounded memory.
+        """
+        saidas = ordem_calculo(SAIDAS_PADRAO if saidas is None else saidas)
+        itens = iter(itens)
+        pendentes = deque()
+        inicio = 0
+        while True:
+            while len(pendentes) < 2 * self.processos:
+                lote = list(islice(itens, self.tamanho_lote))
+                if not lote:
+                    break
+                pendentes.append((inicio, len(lote), self._pool.submit(calcula_lote, inicio, lote, saidas)))
+                inicio += len(lote)
+            if not pendentes:
+                return
+            primeiro, tamanho, futuro = pendentes.popleft()
+            try:
+                resultados = futuro.result()
+            except Exception as e:  # the chunk itself failed (worker lost, unpicklable item, ...)
+                resultados = [_erro(indice, e) for indice in range(primeiro, primeiro + tamanho)]
+            yield from resultados
+
+    def calcula_tributacao(self, itens: Iterable[Tributavel], saidas: Optional[Iterable[str]] = None
+                           ) -> List[Union[ResultadoTributacao, ErroItem]]:
+        """List of :meth:`calcula_tributacao_iter`."""
+        return list(self.calcula_tributacao_iter(itens, saidas))
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+    def __enter__(self) -> "ExecutorParalelo":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def calcula_tributacao_paralelo(itens: Iterable[Tributavel], saidas: Optional[Iterable[str]] = None,
+                                processos: Optional[int] = None,
+                                tamanho_lote: int = 500) -> List[Union[ResultadoTributacao, ErroItem]]:
+    """``calcula_tributacao`` for every item on a temporary :class:`ExecutorParalelo`, in input order."""
+    with ExecutorParalelo(processos=processos, tamanho_lote=tamanho_lote) as executor:
+        return executor.calcula_tributacao(itens, saidas)
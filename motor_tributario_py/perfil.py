@@ -0,0 +1,803 @@
+"""
+Calculators specialized for a configuration profile.
+
+Most items share a handful of configurations: the same CST / CSOSN,
+``tipo_desconto``, ``is_ativo_imobilizado_ou_uso_consumo``, ``documento``
+and flags.  :func:`calculadora_perfil` partially evaluates
+``calcula_tributacao`` (and ``CalculadoraCsosn``) for the profile of a
+``Tributavel`` (the fields in :data:`CAMPOS_PERFIL`) and generates a
+straight-line Python function of the remaining, numeric fields:
+
+- the dispatch tables (CST, CSOSN, CST post-processing, Desonerado
+  preprocessing) are decided once, and the branches of ``calcula_icms`` /
+  ``CalculadoraCsosn`` they rule out are not generated;
+- the row of every rule table is chosen once from the profile and its output
+  expressions are inlined (translated as in :mod:`.engine.compiler`);
+- outputs that are constant for the profile (Monofásico outside CST
+  02/15/53/61, Desonerado without ``tipo_calculo_icms_desonerado``) are
+  built without evaluating anything.
+
+Tests on numeric fields (``percentual_icms_st and percentual_mva``,
+``percentual_ipi > 0``, ...) stay in the generated code, and the tables whose
+row depends on numeric facts (CST 51 diferimento, ICMS Efetivo
+preprocessing) are evaluated through ``engine.decide_single_table``.
+Profiles whose dispatch fails (e.g. an unknown CSOSN) use the facade.
+
+Results are the same as ``FacadeCalculadoraTributacao.calcula_tributacao``,
+including the ``valor_ipi`` ICMS ST calculates for the steps that see it (see
+:mod:`.grafo`); like the facade, the generated code never modifies the
+Tributavel.
+
+Example:
+    >>> calcula = calculadora_perfil(produto, saidas=("icms", "pis", "cofins"))
+    >>> resultado = calcula(produto)
+    >>> print(calcula.source)
+"""
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_UP
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from motor_tributario_py import engine
+from motor_tributario_py.engine.compiler import inline_expressions
+from motor_tributario_py.facade import FacadeCalculadoraTributacao, ResultadoTributacao
+from motor_tributario_py.grafo import GRAFO_TRIBUTACAO, SAIDAS_PADRAO, no_valor_ipi, ordem_calculo
+from motor_tributario_py.models import PerfilTributario, Tributavel
+from motor_tributario_py.rules.credito_icms_rules import CREDITO_ICMS_CALC_RULE, CREDITO_ICMS_PREPROCESSING_RULE
+from motor_tributario_py.rules.csosn_rules import CSOSN_DISPATCH_RULE
+from motor_tributario_py.rules.cst_post_processing_rules import CST_51_DIFERIMENTO_RULE, CST_POST_PROCESSING_RULE
+from motor_tributario_py.rules.cst_rules import CST_DISPATCH_RULE
+from motor_tributario_py.rules.difal_rules import DIFAL_CALC_RULE
+from motor_tributario_py.rules.fcp_rules import FCP_CALC_RULE
+from motor_tributario_py.rules.ibpt_rules import IBPT_CALC_RULE
+from motor_tributario_py.rules.ibs_cbs_rules import CBS_CALC_RULE, IBS_CALC_RULE, IBS_CBS_BASE_RULE, IBS_MUNICIPAL_CALC_RULE
+from motor_tributario_py.rules.icms_desonerado_rules import ICMS_DESONERADO_CALC_RULE, ICMS_DESONERADO_PREPROCESSING_RULE
+from motor_tributario_py.rules.icms_efetivo_rules import (
+    ICMS_EFETIVO_BASE_RULE,
+    ICMS_EFETIVO_CALC_RULE,
+    ICMS_EFETIVO_PREPROCESSING_RULE,
+)
+from motor_tributario_py.rules.icms_monofasico_rules import ICMS_MONOFASICO_RULE
+from motor_tributario_py.rules.icms_rules import ICMS_CALC_RULE
+from motor_tributario_py.rules.icms_st_rules import ICMS_ST_CALC_RULE
+from motor_tributario_py.rules.ipi_rules import IPI_CALC_RULE
+from motor_tributario_py.rules.issqn_rules import ISSQN_BASE_RULE, ISSQN_TAX_RULE
+from motor_tributario_py.rules.pis_cofins_rules import PIS_COFINS_CALC_RULE
+from motor_tributario_py.taxes.cofins import ResultadoCalculoCofins
+from motor_tributario_py.taxes.csosn import CalculadoraCsosn, ResultadoCalculoCsosn
+from motor_tributario_py.taxes.difal import ResultadoCalculoDifal
+from motor_tributario_py.taxes.fcp import ResultadoCalculoFcp
+from motor_tributario_py.taxes.ibpt import ResultadoCalculoIbpt
+from motor_tributario_py.taxes.ibs_cbs import ResultadoCalculoCbs, ResultadoCalculoIbs, ResultadoCalculoIbsCbs
+from motor_tributario_py.taxes.icms import ResultadoCalculoIcms
+from motor_tributario_py.taxes.icms_desonerado import ResultadoCalculoIcmsDesonerado
+from motor_tributario_py.taxes.icms_monofasico import ResultadoCalculoIcmsMonofasico
+from motor_tributario_py.taxes.icms_st import ResultadoCalculoIcmsSt
+from motor_tributario_py.taxes.ipi import ResultadoCalculoIpi
+from motor_tributario_py.taxes.issqn import ResultadoCalculoIssqn
+from motor_tributario_py.taxes.pis import ResultadoCalculoPis
+from motor_tributario_py.utils.functions import register_feel_functions, to_decimal
+
+# Configuration fields a specialized calculator is generated for
+CAMPOS_PERFIL = (
+    "crt",
+    "cst",
+    "csosn",
+    "tipo_desconto",
+    "is_ativo_imobilizado_ou_uso_consumo",
+    "documento",
+    "deduz_icms_da_base_de_pis_cofins",
+    "tipo_calculo_icms_desonerado",
+    "somar_pis_na_base_ibs_cbs",
+    "somar_cofins_na_base_ibs_cbs",
+    "somar_icms_na_base_ibs_cbs",
+    "somar_issqn_na_base_ibs_cbs",
+)
+_le_perfil = attrgetter(*CAMPOS_PERFIL)
+
+_CENTAVO = Decimal('0.01')
+_CST_MONOFASICO = ("02", "15", "53", "61")
+
+
+def chave_perfil(tributavel: Tributavel) -> tuple:
+    """Values of :data:`CAMPOS_PERFIL`, the key specialized calculators are cached by.
+
+    Read once per interned profile for a ``TributavelLinha``.
+    """
+    perfil = getattr(tributavel, "perfil", None)
+    if isinstance(perfil, PerfilTributario):
+        return perfil.derivado("chave_perfil", lambda: _le_perfil(perfil))
+    return _le_perfil(tributavel)
+
+
+class _Interrompido(Exception):
+    """A dispatch decision failed while generating: the profile is not specialized."""
+
+
+class _Gerador:
+    """Emits the body of one specialized function of ``t`` (the Tributavel).
+
+    Numeric fields are read once into ``c_<field>`` locals; the methods named
+    after calculations emit their code and return the code of their results
+    (field name -> expression), memoized like ``ContextoCalculo`` does.
+    """
+
+    def __init__(self, perfil: Dict[str, Any]):
+        self.perfil = perfil
+        self.linhas: List[str] = []
+        self.namespace: Dict[str, Any] = {
+            "Decimal": Decimal,
+            "to_decimal": to_decimal,
+            "ROUND_UP": ROUND_UP,
+            "CENTAVO": _CENTAVO,
+            "decide_single_table": engine.decide_single_table,
+        }
+        # Tributavel fields read, in order of first use
+        self.campos: Dict[str, None] = {}
+        self._nivel = 1
+        self._contador = 0
+        self._memo: Dict[tuple, Dict[str, str]] = {}
+        # Fields replaced by a value derived from them (the valor_ipi of a graph
+        # node, CSOSN's calculated valor_ipi), like the copies the calculators make
+        self._derivados: Dict[str, str] = {}
+        # Changed with ``_derivados`` (the memo keys include it)
+        self._versao: Hashable = 0
+
+    # -- code emission ----------------------------------------------------
+
+    def emite(self, linha: str) -> None:
+        self.linhas.append("    " * self._nivel + linha)
+
+    def novo(self, base: str) -> str:
+        self._contador += 1
+        return f"{base}_{self._contador}"
+
+    def atribui(self, base: str, expressao: str) -> str:
+        nome = self.novo(base)
+        self.emite(f"{nome} = {expressao}")
+        return nome
+
+    def constante(self, valor: Any) -> str:
+        if valor is None or type(valor) in (bool, int, str):
+            return repr(valor)
+        nome = self.novo("k")
+        self.namespace[nome] = valor
+        return nome
+
+    def campo(self, nome: str) -> str:
+        if nome in self._derivados:
+            return self._derivados[nome]
+        self.campos[nome] = None
+        return "c_" + nome
+
+    def fatos(self, *nomes: str) -> Dict[str, str]:
+        return {nome: self.campo(nome) for nome in nomes}
+
+    @contextmanager
+    def bloco(self, cabecalho: str):
+        """Indented block; results calculated inside it are not reused outside."""
+        self.emite(cabecalho)
+        memo = dict(self._memo)
+        inicio = len(self.linhas)
+        self._nivel += 1
+        try:
+            yield
+        finally:
+            if len(self.linhas) == inicio:
+                self.emite("pass")
+            self._nivel -= 1
+            self._memo = memo
+
+    def se(self, condicao: str):
+        return self.bloco(f"if {condicao}:")
+
+    def senao(self):
+        return self.bloco("else:")
+
+    def constroi(self, classe: type, campos: Dict[str, str]) -> str:
+        nome = self.constante(classe)
+        argumentos = ", ".join(f"{campo}={codigo}" for campo, codigo in campos.items())
+        return self.atribui("res", f"{nome}({argumentos})")
+
+    def memoriza(self, chave: tuple, calcula: Callable[[], Dict[str, str]]) -> Dict[str, str]:
+        chave = (chave, self._versao)
+        if chave not in self._memo:
+            self._memo[chave] = calcula()
+        return self._memo[chave]
+
+    # -- rule tables --------------------------------------------------------
+
+    def decide(self, tabela: Dict[str, Any], fatos: Dict[str, Any], strict_mode: bool) -> list:
+        """Decision of a table over profile facts only, taken while generating."""
+        try:
+            return engine.decide_single_table(tabela, fatos, strict_mode=strict_mode)
+        except Exception as e:
+            raise _Interrompido(str(e)) from e
+
+    def tabela(self, tabela: Dict[str, Any], fixos: Dict[str, Any], fatos: Dict[str, str],
+               colunas: Iterable[str]) -> Dict[str, str]:
+        """Code of the outputs ``colunas`` of ``tabela`` (strict mode).
+
+        ``fixos`` are the facts known from the profile, ``fatos`` the code of
+        the others.  When ``fixos`` choose the row, its expressions are
+        inlined; otherwise the table is evaluated at run time.
+        """
+        indexed = engine.get_indexed(tabela)
+        if isinstance(indexed, engine.FoldedTable):
+            indexed = indexed.indexed
+        linhas = ()
+        if indexed is not None and all(col in fixos for col in indexed.input_ids):
+            # None: a fact of another type, the run-time evaluation raises
+            linhas = indexed.rows(fixos) or ()
+        if not linhas or (indexed.hit_policy == "Unique" and len(linhas) != 1):
+            todos = {**{col: self.constante(valor) for col, valor in fixos.items()}, **fatos}
+            argumento = "{" + ", ".join(f"{col!r}: {codigo}" for col, codigo in todos.items()) + "}"
+            resultado = self.atribui("r", f"decide_single_table({self.constante(tabela)}, {argumento}, strict_mode=True)")
+            return {col: f"{resultado}[0][{col!r}]" for col in colunas}
+
+        saidas = indexed.outputs[linhas[0]]
+        if isinstance(saidas, dict):
+            return {col: self.constante(saidas[col]) for col in colunas}
+        variaveis, funcoes, atribuicoes, expressoes = inline_expressions(saidas, self.novo("x") + "_")
+        self.namespace.update(funcoes)
+        for nome, local in variaveis.items():
+            if nome in fatos:
+                self.emite(f"{local} = {fatos[nome]}")
+            else:
+                self.emite(f"{local} = {self.constante(fixos.get(nome))}")
+        for atribuicao in atribuicoes:
+            self.emite(atribuicao)
+        por_coluna = dict(zip(indexed.output_ids, expressoes))
+        return {col: por_coluna[col] for col in colunas}
+
+    def decimal(self, base: str, codigo: str, quantiza: bool = False) -> str:
+        expressao = f"to_decimal({codigo})"
+        return self.atribui(base, f"{expressao}.quantize(CENTAVO)" if quantiza else expressao)
+
+    # -- calculations -----------------------------------------------------------
+
+    def _linha_icms(self, is_ativo: Any, percentual_reducao: str) -> Tuple[str, str]:
+        fatos = self.fatos("valor_produto", "quantidade_produto", "frete", "seguro", "outras_despesas",
+                           "valor_ipi", "desconto", "percentual_icms")
+        fatos["percentual_reducao"] = percentual_reducao
+        saidas = self.tabela(
+            ICMS_CALC_RULE, {"is_ativo": is_ativo, "tipo_desconto": self.perfil["tipo_desconto"]},
+            fatos, ("base_calculo", "valor_final")
+        )
+        return self.decimal("base_icms", saidas["base_calculo"]), self.decimal("valor_icms", saidas["valor_final"])
+
+    def icms(self, ignore_ipi: bool = False) -> Dict[str, str]:
+        """``ContextoCalculo.icms``: CalculadoraIcms with the CST post-processing."""
+        ignore_ipi = ignore_ipi or self.perfil["is_ativo_imobilizado_ou_uso_consumo"] is False
+        return self.memoriza(("icms", ignore_ipi), lambda: self._icms(ignore_ipi))
+
+    def _icms(self, ignore_ipi: bool) -> Dict[str, str]:
+        is_ativo = False if ignore_ipi else self.perfil["is_ativo_imobilizado_ou_uso_consumo"]
+        base, valor = self._linha_icms(is_ativo, self.campo("percentual_reducao"))
+        resultado = {
+            "base_calculo": base,
+            "valor": valor,
+            "percentual_icms": self.campo("percentual_icms"),
+            "percentual_reducao": self.campo("percentual_reducao"),
+            "percentual_icms_st": self.campo("percentual_icms_st"),
+            "percentual_mva": self.campo("percentual_mva"),
+            "base_calculo_st": "None",
+            "valor_icms_st": "None",
+            "percentual_reducao_st": self.campo("percentual_reducao_st"),
+            "percentual_diferimento": self.campo("percentual_diferimento"),
+            "valor_bc_st_retido": self.campo("valor_produto"),
+            "valor_icms_operacao": "None",
+            "valor_icms_diferido": "None",
+            "base_calculo_icms_efetivo": "None",
+            "valor_icms_efetivo": "None",
+            "modalidade_determinacao_bc_icms": repr("ValorOperacao"),
+            "modalidade_determinacao_bc_icms_st": f"('MargemValorAgregado' if {self.campo('percentual_mva')} > 0 else None)",
+        }
+        cst = self.perfil["cst"]
+        if not cst:
+            return resultado
+        decisao = self.decide(CST_POST_PROCESSING_RULE, {"cst": str(cst)}, strict_mode=False)
+        if not decisao:
+            return resultado
+
+        if decisao[0].get("calcular_diferimento"):
+            operacao = resultado["valor_icms_operacao"] = self.atribui("operacao", "None")
+            diferido = resultado["valor_icms_diferido"] = self.atribui("diferido", "None")
+            saidas = self.tabela(
+                CST_51_DIFERIMENTO_RULE, {},
+                {"base_calculo": base, **self.fatos("percentual_icms", "percentual_diferimento")},
+                ("should_calculate", "valor_icms_operacao", "valor_icms_diferido"),
+            )
+            with self.se(saidas["should_calculate"]):
+                self.emite(f"{operacao} = to_decimal({saidas['valor_icms_operacao']}).quantize(CENTAVO)")
+                self.emite(f"{diferido} = to_decimal({saidas['valor_icms_diferido']}).quantize(CENTAVO, rounding=ROUND_UP)")
+                self.emite(f"{valor} = {operacao} - {diferido}")
+
+        if decisao[0].get("calcular_efetivo"):
+            base_efetivo = resultado["base_calculo_icms_efetivo"] = self.atribui("base_efetivo", "None")
+            valor_efetivo = resultado["valor_icms_efetivo"] = self.atribui("valor_efetivo", "None")
+            with self.se(f"{self.campo('percentual_icms_efetivo')} > 0"):
+                self.icms_efetivo(base_efetivo, valor_efetivo)
+        return resultado
+
+    def icms_efetivo(self, base: str, valor: str) -> None:
+        """CalculadoraIcmsEfetivo, into the locals ``base`` and ``valor``."""
+        is_ativo = self.perfil["is_ativo_imobilizado_ou_uso_consumo"]
+        preprocessamento = self.tabela(
+            ICMS_EFETIVO_PREPROCESSING_RULE, {"is_ativo": is_ativo}, self.fatos("percentual_icms_efetivo"),
+            ("should_calculate", "ipi_adjustment"),
+        )
+        with self.se(f"not {preprocessamento['should_calculate']}"):
+            self.emite(f"{base} = Decimal('0')")
+            self.emite(f"{valor} = Decimal('0')")
+        with self.senao():
+            outras_despesas = self.atribui("outras_despesas", self.campo("outras_despesas"))
+            with self.se(f"{preprocessamento['ipi_adjustment']} == 'add_to_outras_despesas'"):
+                self.emite(f"{outras_despesas} = {self.campo('outras_despesas')} + {self.campo('valor_ipi')}")
+            fatos = self.fatos("valor_produto", "quantidade_produto", "frete", "seguro", "desconto",
+                               "percentual_reducao_icms_efetivo")
+            fatos["outras_despesas"] = outras_despesas
+            saidas = self.tabela(ICMS_EFETIVO_BASE_RULE, {"tipo_desconto": self.perfil["tipo_desconto"]},
+                                 fatos, ("base_calculo_efetivo",))
+            self.emite(f"{base} = to_decimal({saidas['base_calculo_efetivo']})")
+            saidas = self.tabela(
+                ICMS_EFETIVO_CALC_RULE, {"dummy": 1},
+                {"base_calculo_efetivo": base, **self.fatos("percentual_icms_efetivo")}, ("valor_icms_efetivo",),
+            )
+            self.emite(f"{valor} = to_decimal({saidas['valor_icms_efetivo']})")
+
+    def ipi(self) -> Dict[str, str]:
+        def calcula():
+            saidas = self.tabela(
+                IPI_CALC_RULE, {"tipo_desconto": self.perfil["tipo_desconto"]},
+                self.fatos("valor_produto", "quantidade_produto", "frete", "seguro", "outras_despesas",
+                           "desconto", "percentual_ipi"),
+                ("base_calculo", "valor_final"),
+            )
+            return {
+                "base_calculo": self.decimal("base_ipi", saidas["base_calculo"]),
+                "valor": self.decimal("valor_ipi", saidas["valor_final"]),
+            }
+        return self.memoriza(("ipi",), calcula)
+
+    def valor_ipi_calculado(self) -> str:
+        """IPI rounded to cents, the ``valor_ipi`` ICMS ST and CSOSN calculate with."""
+        return self.atribui("valor_ipi", f"{self.ipi()['valor']}.quantize(CENTAVO)")
+
+    def icms_st(self) -> Dict[str, str]:
+        """``ContextoCalculo.icms_st`` (calculates IPI for its base like CalculadoraIcmsSt)."""
+        return self.memoriza(("icms_st",), self._icms_st)
+
+    def _icms_st(self) -> Dict[str, str]:
+        proprio = self.icms(ignore_ipi=True)
+        valor_ipi = self.atribui("valor_ipi", self.campo("valor_ipi"))
+        with self.se(f"{self.campo('percentual_ipi')} > 0 and {valor_ipi} == 0"):
+            self.emite(f"{valor_ipi} = {self.ipi()['valor']}.quantize(CENTAVO)")
+
+        fatos = self.fatos("valor_produto", "quantidade_produto", "frete", "seguro", "outras_despesas",
+                           "desconto", "percentual_reducao_st", "percentual_mva", "percentual_icms_st")
+        fatos["valor_ipi"] = valor_ipi
+        fatos["valor_icms_proprio"] = proprio["valor"]
+        saidas = self.tabela(ICMS_ST_CALC_RULE, {"tipo_desconto": self.perfil["tipo_desconto"]},
+                             fatos, ("base_calculo_st", "valor_icms_st"))
+        return {
+            "base_calculo_operacao_propria": proprio["base_calculo"],
+            "valor_icms_proprio": proprio["valor"],
+            "base_calculo_icms_st": self.decimal("base_st", saidas["base_calculo_st"]),
+            "valor_icms_st": self.decimal("valor_st", saidas["valor_icms_st"]),
+        }
+
+    def icms_calcula_st(self) -> Optional[str]:
+        """Condition under which ``calcula_icms`` calculates ICMS ST, None when the CST rules it out."""
+        cst = self.perfil["cst"]
+        decisao = self.decide(CST_DISPATCH_RULE, {"cst": str(cst)}, strict_mode=False) if cst else None
+        if not decisao:
+            return None
+        calcular_st = decisao[0].get("calcular_icms_st")
+        if calcular_st == 'true' or calcular_st is True:
+            return f"{self.campo('percentual_icms_st')} and {self.campo('percentual_mva')}"
+        return None
+
+    # -- valor_ipi of the graph nodes (see grafo) ---------------------------
+
+    def calcula_valor_ipi_st(self) -> str:
+        """Code of ``FacadeCalculadoraTributacao.calcula_valor_ipi_st``."""
+        def calcula():
+            valor = self.atribui("valor_ipi_st", "None")
+            with self.se(f"{self.campo('percentual_ipi')} > 0 and {self.campo('valor_ipi')} == 0"):
+                self.emite(f"{valor} = {self.ipi()['valor']}.quantize(CENTAVO)")
+            return {"valor": valor}
+        return self.memoriza(("valor_ipi_st",), calcula)["valor"]
+
+    def calcula_valor_ipi_icms(self) -> str:
+        """Code of ``FacadeCalculadoraTributacao.calcula_valor_ipi_icms``."""
+        def calcula():
+            condicao = self.icms_calcula_st()
+            if condicao is None:
+                return {"valor": "None"}
+            valor_st = self.calcula_valor_ipi_st()
+            return {"valor": self.atribui("valor_ipi_icms", f"{valor_st} if {condicao} else None")}
+        return self.memoriza(("valor_ipi_icms",), calcula)["valor"]
+
+    @contextmanager
+    def visao(self, no: Optional[str]):
+        """Code generated inside sees the ``valor_ipi`` of the internal graph node ``no``."""
+        valor = "None" if no is None else getattr(self, GRAFO_TRIBUTACAO[no].metodo)()
+        if valor == "None":
+            yield
+            return
+        chave = (("visao", no), self._versao)
+        if chave not in self._memo:
+            self._memo[chave] = {"valor_ipi": self.atribui(
+                "valor_ipi", f"{self.campo('valor_ipi')} if {valor} is None else {valor}")}
+        anterior = self._versao
+        ipi = self._memo.get((("ipi",), anterior))
+        self._derivados["valor_ipi"] = self._memo[chave]["valor_ipi"]
+        self._versao = ("visao", no)
+        if ipi is not None:  # IPI does not read valor_ipi
+            self._memo.setdefault((("ipi",), self._versao), ipi)
+        try:
+            yield
+        finally:
+            del self._derivados["valor_ipi"]
+            self._versao = anterior
+
+    def credito_icms(self, base_calculo: str) -> str:
+        saidas = self.tabela(
+            CREDITO_ICMS_CALC_RULE, {"dummy": 1},
+            {"base_calculo_credito": base_calculo, **self.fatos("percentual_credito")}, ("valor_credito_icms",),
+        )
+        return self.decimal("valor_credito", saidas["valor_credito_icms"])
+
+    def pis_cofins(self, nome: str) -> Dict[str, str]:
+        """CalculadoraPis / CalculadoraCofins (``nome`` is "pis" or "cofins")."""
+        def calcula():
+            if self.perfil["deduz_icms_da_base_de_pis_cofins"]:
+                valor_icms = self.atribui("valor_icms", f"{self.icms()['valor']}.quantize(CENTAVO)")
+            else:
+                valor_icms = "Decimal('0')"
+            fatos = self.fatos("valor_produto", "quantidade_produto", "frete", "seguro", "outras_despesas",
+                               "valor_ipi", "desconto")
+            fatos.update(
+                valor_icms=valor_icms,
+                percentual_reducao=self.campo(f"percentual_reducao_{nome}"),
+                percentual_tax=self.campo(f"percentual_{nome}"),
+            )
+            fixos = {
+                "is_ativo": self.perfil["is_ativo_imobilizado_ou_uso_consumo"],
+                "deduz_icms": self.perfil["deduz_icms_da_base_de_pis_cofins"],
+                "tipo_desconto": self.perfil["tipo_desconto"],
+            }
+            saidas = self.tabela(PIS_COFINS_CALC_RULE, fixos, fatos, ("base_calculo", "valor_final"))
+            return {
+                "base_calculo": self.decimal(f"base_{nome}", saidas["base_calculo"]),
+                "valor": self.decimal(f"valor_{nome}", saidas["valor_final"], quantiza=True),
+            }
+        return self.memoriza((nome,), calcula)
+
+    def issqn(self, calcular_retencoes: bool) -> Dict[str, str]:
+        def calcula():
+            saidas = self.tabela(
+                ISSQN_BASE_RULE, {"tipo_desconto": self.perfil["tipo_desconto"]},
+                self.fatos("valor_produto", "quantidade_produto", "frete", "seguro", "outras_despesas", "desconto"),
+                ("base_calculo",),
+            )
+            base = self.decimal("base_issqn", saidas["base_calculo"])
+            colunas = ("valor_issqn", "valor_ret_pis", "valor_ret_cofins", "valor_ret_csll", "valor_ret_irrf",
+                       "valor_ret_inss")
+            saidas = self.tabela(
+                ISSQN_TAX_RULE, {"calcular_retencoes": calcular_retencoes},
+                {"base_calculo": base, **self.fatos("percentual_issqn", "percentual_ret_pis", "percentual_ret_cofins",
+                                                    "percentual_ret_csll", "percentual_ret_irrf",
+                                                    "percentual_ret_inss")},
+                colunas,
+            )
+            resultado = {"base_calculo": base}
+            for coluna in colunas:
+                resultado["valor" if coluna == "valor_issqn" else coluna] = self.decimal(coluna, saidas[coluna])
+            for retencao in ("inss", "irrf", "pis", "cofins", "csll"):
+                resultado[f"base_calculo_{retencao}"] = base
+            return resultado
+        return self.memoriza(("issqn", calcular_retencoes), calcula)
+
+    # -- facade steps (code of the result object) -----------------------------------
+
+    def calcula_icms(self) -> str:
+        campos = dict(self.icms())
+        cst = self.perfil["cst"]
+        decisao = self.decide(CST_DISPATCH_RULE, {"cst": str(cst)}, strict_mode=False) if cst else None
+        if decisao:
+            condicao_st = self.icms_calcula_st()
+            if condicao_st is not None:
+                base_st = campos["base_calculo_st"] = self.atribui("base_calculo_st", "None")
+                valor_st = campos["valor_icms_st"] = self.atribui("valor_icms_st", "None")
+                with self.se(condicao_st):
+                    st = self.icms_st()
+                    self.emite(f"{base_st} = {st['base_calculo_icms_st']}")
+                    self.emite(f"{valor_st} = {st['valor_icms_st']}")
+
+            calcular_credito = decisao[0].get("calcular_credito")
+            if calcular_credito == 'true' or calcular_credito is True:
+                percentual = campos["percentual_credito"] = self.atribui("percentual_credito", "Decimal('0')")
+                valor = campos["valor_credito"] = self.atribui("valor_credito", "Decimal('0')")
+                with self.se(self.campo("percentual_credito")):
+                    if self.perfil["documento"] == "CTe":
+                        base = self.icms_st()["valor_icms_st"]
+                    else:
+                        base = campos["base_calculo"]
+                    self.emite(f"{valor} = {self.credito_icms(base)}")
+                    self.emite(f"{percentual} = {self.campo('percentual_credito')}")
+        return self.constroi(ResultadoCalculoIcms, campos)
+
+    def calcula_ipi(self) -> str:
+        return self.constroi(ResultadoCalculoIpi, self.ipi())
+
+    def calcula_pis(self) -> str:
+        return self.constroi(ResultadoCalculoPis, self.pis_cofins("pis"))
+
+    def calcula_cofins(self) -> str:
+        return self.constroi(ResultadoCalculoCofins, self.pis_cofins("cofins"))
+
+    def calcula_issqn(self, calcular_retencoes: bool = False) -> str:
+        return self.constroi(ResultadoCalculoIssqn, self.issqn(calcular_retencoes))
+
+    def calcula_fcp(self) -> str:
+        base = self.icms()["base_calculo"]
+        saidas = self.tabela(FCP_CALC_RULE, {"dummy": 1},
+                             {"base_calculo_icms": base, **self.fatos("percentual_fcp")}, ("valor_fcp",))
+        return self.constroi(ResultadoCalculoFcp, {
+            "base_calculo": base,
+            "valor_fcp": self.decimal("valor_fcp", saidas["valor_fcp"]),
+        })
+
+    def calcula_difal(self) -> str:
+        colunas = ("base_calculo", "valor_fcp", "valor_difal", "valor_icms_destino", "valor_icms_origem")
+        saidas = self.tabela(
+            DIFAL_CALC_RULE,
+            {"is_ativo": self.perfil["is_ativo_imobilizado_ou_uso_consumo"], "tipo_desconto": self.perfil["tipo_desconto"]},
+            self.fatos("valor_produto", "quantidade_produto", "frete", "seguro", "outras_despesas", "valor_ipi",
+                       "desconto", "percentual_fcp", "percentual_difal_interna", "percentual_difal_interestadual"),
+            colunas,
+        )
+        valores = [self.decimal(coluna, saidas[coluna]) for coluna in colunas]
+        return self.constroi(ResultadoCalculoDifal, dict(zip(
+            ("base_calculo", "fcp", "difal", "valor_icms_destino", "valor_icms_origem"), valores
+        )))
+
+    def calcula_icms_st(self) -> str:
+        return self.constroi(ResultadoCalculoIcmsSt, self.icms_st())
+
+    def calcula_ibpt(self) -> str:
+        colunas = ("base_calculo", "valor_federal", "valor_estadual", "valor_municipal", "valor_federal_importados")
+        saidas = self.tabela(
+            IBPT_CALC_RULE, {"dummy": 1},
+            self.fatos("valor_produto", "quantidade_produto", "desconto", "percentual_federal",
+                       "percentual_estadual", "percentual_municipal", "percentual_federal_importados"),
+            colunas,
+        )
+        valores = [self.decimal(coluna, saidas[coluna]) for coluna in colunas]
+        return self.constroi(ResultadoCalculoIbpt, dict(zip(
+            ("base_calculo", "tributacao_federal", "tributacao_estadual", "tributacao_municipal",
+             "tributacao_federal_importados"), valores
+        )))
+
+    def calcula_icms_desonerado(self) -> str:
+        zero = {"valor_icms_desonerado": "Decimal('0')"}
+        tipo_calculo = self.perfil["tipo_calculo_icms_desonerado"]
+        if not tipo_calculo:
+            return self.constroi(ResultadoCalculoIcmsDesonerado, zero)
+        cst = self.perfil["cst"]
+        decisao = self.decide(
+            ICMS_DESONERADO_PREPROCESSING_RULE,
+            {"tipo_calculo": tipo_calculo, "cst": str(cst) if cst else ""}, strict_mode=False,
+        )
+        if not decisao or not decisao[0]["should_calculate"]:
+            return self.constroi(ResultadoCalculoIcmsDesonerado, zero)
+
+        base = self.icms()["base_calculo"]
+        subtotal = self.atribui("subtotal_produto", f"{self.campo('valor_produto')} * {self.campo('quantidade_produto')}")
+        saidas = self.tabela(
+            ICMS_DESONERADO_CALC_RULE, {"tipo_calculo": tipo_calculo, "cst_group": decisao[0]["cst_group"]},
+            {"base_calculo": base, "subtotal_produto": subtotal, **self.fatos("percentual_icms", "percentual_reducao")},
+            ("valor_icms_desonerado",),
+        )
+        return self.constroi(ResultadoCalculoIcmsDesonerado, {
+            "valor_icms_desonerado": self.decimal("valor_desonerado", saidas["valor_icms_desonerado"], quantiza=True),
+        })
+
+    def calcula_icms_monofasico(self) -> str:
+        cst = self.perfil["cst"]
+        if cst not in _CST_MONOFASICO:
+            return self.constroi(ResultadoCalculoIcmsMonofasico, {})
+        colunas = ("valor_icms_monofasico", "valor_icms_monofasico_retencao", "valor_icms_monofasico_operacao",
+                   "valor_icms_monofasico_diferido", "valor_icms_monofasico_retido_anteriormente")
+        saidas = self.tabela(
+            ICMS_MONOFASICO_RULE, {"cst": cst},
+            self.fatos("quantidade_base_calculo_icms_monofasico", "aliquota_ad_rem_icms",
+                       "percentual_reducao_aliquota_ad_rem_icms", "percentual_biodiesel", "percentual_originario_uf",
+                       "quantidade_base_calculo_icms_monofasico_retido_anteriormente",
+                       "aliquota_ad_rem_icms_retido_anteriormente"),
+            colunas,
+        )
+        return self.constroi(ResultadoCalculoIcmsMonofasico,
+                             {coluna: self.decimal(coluna, saidas[coluna]) for coluna in colunas})
+
+    def calcula_ibs_cbs(self) -> str:
+        def base_ibs_cbs():
+            ajustes = {}
+            for nome, valor in (
+                ("pis", self.pis_cofins("pis")["valor"]),
+                ("cofins", self.pis_cofins("cofins")["valor"]),
+                ("icms", self.icms()["valor"]),
+                ("issqn", self.issqn(False)["valor"]),
+            ):
+                sinal = "" if self.perfil[f"somar_{nome}_na_base_ibs_cbs"] else "-"
+                ajustes[f"ajuste_{nome}"] = self.atribui(f"ajuste_{nome}", f"{sinal}{valor}.quantize(CENTAVO)")
+            saidas = self.tabela(
+                IBS_CBS_BASE_RULE, {"dummy": 1},
+                {**self.fatos("valor_produto", "quantidade_produto", "frete", "seguro", "outras_despesas", "desconto"),
+                 **ajustes},
+                ("base_calculo_ibs_cbs",),
+            )
+            return {"base": self.decimal("base_ibs_cbs", saidas["base_calculo_ibs_cbs"])}
+
+        base = self.memoriza(("base_ibs_cbs",), base_ibs_cbs)["base"]
+        partes = {}
+        for parte, tabela, coluna, percentuais, classe in (
+            ("ibs", IBS_CALC_RULE, "valor_ibs", ("percentual_ibs_uf", "percentual_reducao_ibs_uf"), ResultadoCalculoIbs),
+            ("ibs_municipal", IBS_MUNICIPAL_CALC_RULE, "valor_ibs_municipal",
+             ("percentual_ibs_municipal", "percentual_reducao_ibs_municipal"), ResultadoCalculoIbs),
+            ("cbs", CBS_CALC_RULE, "valor_cbs", ("percentual_cbs", "percentual_reducao_cbs"), ResultadoCalculoCbs),
+        ):
+            saidas = self.tabela(tabela, {"dummy": 1}, {"base_calculo_ibs_cbs": base, **self.fatos(*percentuais)},
+                                 (coluna,))
+            partes[parte] = self.constroi(classe, {
+                "base_calculo": base,
+                "valor": self.decimal(coluna, saidas[coluna], quantiza=True),
+            })
+        return self.constroi(ResultadoCalculoIbsCbs, {"base_calculo": base, **partes})
+
+    def calcula_csosn(self) -> str:
+        """CalculadoraCsosn (every module sees the calculated ``valor_ipi`` for ST, like it does)."""
+        csosn = self.perfil["csosn"]
+        decisao = self.decide(CSOSN_DISPATCH_RULE, {"csosn": csosn}, strict_mode=True)
+        campos = {"csosn": self.constante(csosn), "modo_calculo": self.constante(str(decisao[0]["modo_calculo"]))}
+        flags = {
+            coluna: decisao[0][coluna] == 'true' or decisao[0][coluna] is True
+            for coluna in ("calcular_icms_proprio", "calcular_icms_st", "calcular_credito", "calcular_efetivo")
+        }
+
+        if flags["calcular_icms_st"]:
+            self._derivados["valor_ipi"] = self.valor_ipi_calculado()
+            self._versao = ("csosn",)
+
+        if flags["calcular_icms_proprio"]:
+            icms = self.icms()
+            campos.update(
+                percentual_reducao_icms=self.campo("percentual_reducao"),
+                percentual_icms=self.campo("percentual_icms"),
+                base_calculo_icms=icms["base_calculo"],
+                valor_icms=icms["valor"],
+            )
+
+        if flags["calcular_icms_st"]:
+            st = self.icms_st()
+            campos.update(
+                percentual_mva=self.campo("percentual_mva"),
+                percentual_reducao_st=self.campo("percentual_reducao_st"),
+                percentual_icms_st=self.campo("percentual_icms_st"),
+                base_calculo_icms_st=st["base_calculo_icms_st"],
+                valor_icms_st=st["valor_icms_st"],
+            )
+
+        if flags["calcular_credito"]:
+            # The credit base uses the reduction chosen by the preprocessing table
+            reducao = self.decide(CREDITO_ICMS_PREPROCESSING_RULE, {"dummy": 1}, strict_mode=True)
+            reducao = to_decimal(reducao[0]["percentual_reducao_override"])
+            base, _ = self._linha_icms(self.perfil["is_ativo_imobilizado_ou_uso_consumo"], self.constante(reducao))
+            campos.update(
+                valor_credito=self.credito_icms(base),
+                percentual_credito=self.campo("percentual_credito"),
+            )
+
+        if flags["calcular_efetivo"]:
+            base = self.atribui("base_efetivo", "None")
+            valor = self.atribui("valor_efetivo", "None")
+            self.icms_efetivo(base, valor)
+            campos.update(
+                base_calculo_icms_efetivo=base,
+                valor_icms_efetivo=valor,
+                percentual_icms_efetivo=self.campo("percentual_icms_efetivo"),
+                percentual_reducao_icms_efetivo=self.campo("percentual_reducao_icms_efetivo"),
+            )
+        return self.constroi(ResultadoCalculoCsosn, campos)
+
+
+def _gera(perfil: Dict[str, Any], nome: str,
+          corpo: Callable[[_Gerador], str]) -> Tuple[Optional[str], Optional[Callable], Optional[Tuple[str, ...]]]:
+    """Source, function ``nome(t)`` returning ``corpo``'s result and the fields it reads.
+
+    (None, None, None) if not specializable.
+    """
+    gerador = _Gerador(perfil)
+    try:
+        gerador.emite(f"return {corpo(gerador)}")
+    except _Interrompido:
+        return None, None, None
+    linhas = [f"def {nome}(t):"]
+    linhas += [f"    c_{campo} = t.{campo}" for campo in gerador.campos]
+    source = "\n".join(linhas + gerador.linhas) + "\n"
+    exec(compile(source, f"<perfil {nome}>", "exec"), gerador.namespace)
+    return source, gerador.namespace[nome], tuple(gerador.campos)
+
+
+class CalculadoraPerfil:
+    """``calcula_tributacao`` specialized for one profile, see :func:`calculadora_perfil`.
+
+    Calling it with a Tributavel of another profile raises ValueError.
+    """
+
+    def __init__(self, chave: tuple, saidas: Tuple[str, ...]):
+        self.chave = chave
+        # Steps in evaluation order (grafo.ordem_calculo)
+        self.saidas = saidas
+        perfil = dict(zip(CAMPOS_PERFIL, chave))
+
+        def corpo(gerador):
+            resultados = {}
+            for nome in saidas:
+                no = GRAFO_TRIBUTACAO[nome]
+                if no.interno:
+                    getattr(gerador, no.metodo)()
+                    continue
+                with gerador.visao(no_valor_ipi(nome)):
+                    resultados[f"res_{nome}"] = getattr(gerador, no.metodo)(**dict(no.argumentos))
+            return gerador.constroi(ResultadoTributacao, resultados)
+
+        # Generated source and the fields it reads besides CAMPOS_PERFIL
+        # (None when the profile falls back to the facade)
+        self.source, self._calcula, self.campos = _gera(perfil, "calcula_tributacao", corpo)
+        self.source_csosn, self._calcula_csosn, self.campos_csosn = _gera(perfil, "calcula_csosn", _Gerador.calcula_csosn)
+
+    def _verifica(self, tributavel: Tributavel) -> None:
+        if chave_perfil(tributavel) != self.chave:
+            raise ValueError("Tributavel does not match the profile of this calculator")
+
+    def __call__(self, tributavel: Tributavel) -> ResultadoTributacao:
+        self._verifica(tributavel)
+        if self._calcula is None:
+            return FacadeCalculadoraTributacao(tributavel).calcula_tributacao(self.saidas)
+        return self._calcula(tributavel)
+
+    def calcula_csosn(self, tributavel: Tributavel) -> ResultadoCalculoCsosn:
+        """``CalculadoraCsosn(tributavel).calcula()`` for this profile."""
+        self._verifica(tributavel)
+        if self._calcula_csosn is None:
+            return CalculadoraCsosn(tributavel).calcula()
+        return self._calcula_csosn(tributavel)
+
+    def __repr__(self):
+        return f"<CalculadoraPerfil {dict(zip(CAMPOS_PERFIL, self.chave))!r}>"
+
+
+
+@lru_cache(maxsize=256)
+def _calculadora(chave: tuple, ordem: Tuple[str, ...]) -> CalculadoraPerfil:
+    register_feel_functions()
+    return CalculadoraPerfil(chave, ordem)
+
+
+def calculadora_perfil(tributavel: Tributavel, saidas: Optional[Iterable[str]] = None) -> CalculadoraPerfil:
+    """Specialized calculator for the profile of ``tributavel``, cached per profile and outputs.
+
+    Args:
+        tributavel: Any item of the profile (only :data:`CAMPOS_PERFIL` are read)
+        saidas: Outputs to calculate, see ``FacadeCalculadoraTributacao.calcula_tributacao``
+    """
+    return _calculadora(chave_perfil(tributavel), ordem_calculo(SAIDAS_PADRAO if saidas is None else saidas))
+
+
+def calcula_tributacao_perfil(tributavel: Tributavel, saidas: Optional[Iterable[str]] = None) -> ResultadoTributacao:
+    """``FacadeCalculadoraTributacao(tributavel).calcula_tributacao(saidas)`` through :func:`calculadora_perfil`."""
+    return calculadora_perfil(tributavel, saidas)(tributavel)
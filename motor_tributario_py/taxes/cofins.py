@@ -1,9 +1,12 @@
 from decimal import Decimal
 from dataclasses import dataclass
+from typing import Optional
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.pis_cofins_rules import PIS_COFINS_CALC_RULE 
 from motor_tributario_py.taxes.icms import CalculadoraIcms
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.fixo import arredonda
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoCofins:
@@ -14,13 +17,15 @@ class CalculadoraCofins:
     def __init__(self, tributavel: Tributavel):
         self.tributavel = tributavel
 
-    def calcula(self) -> ResultadoCalculoCofins:
+    def calcula(self, valor_icms: Optional[Decimal] = None) -> ResultadoCalculoCofins:
         # Dependency: Calculate ICMS if needed
-        valor_icms = Decimal('0')
-        if self.tributavel.deduz_icms_da_base_de_pis_cofins:
+        # valor_icms: ICMS value already calculated by the caller (e.g. facade context)
+        if not self.tributavel.deduz_icms_da_base_de_pis_cofins:
+             valor_icms = Decimal('0')
+        elif valor_icms is None:
              # This is a dependency, but logic of subtraction is in Rule
              icms_result = CalculadoraIcms(self.tributavel).calcula()
-             valor_icms = icms_result.valor.quantize(Decimal('0.01'))
+             valor_icms = arredonda(icms_result.valor)
 
         facts = {
             "valor_produto": self.tributavel.valor_produto,
@@ -43,7 +48,7 @@ class CalculadoraCofins:
         if not results:
              raise ValueError("No matching COFINS rule found for inputs.")
 
-        base_calculo = Decimal(str(results[0]["base_calculo"]))
-        valor = Decimal(str(results[0]["valor_final"]))
+        base_calculo = to_decimal(results[0]["base_calculo"])
+        valor = to_decimal(results[0]["valor_final"])
         
-        return ResultadoCalculoCofins(base_calculo, valor.quantize(Decimal('0.01')))
+        return ResultadoCalculoCofins(base_calculo, arredonda(valor))
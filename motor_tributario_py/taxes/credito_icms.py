@@ -2,7 +2,8 @@ from dataclasses import dataclass
 from decimal import Decimal
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.credito_icms_rules import CREDITO_ICMS_CALC_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoCreditoIcms:
@@ -26,5 +27,5 @@ class CalculadoraCreditoIcms:
              
         return ResultadoCalculoCreditoIcms(
             base_calculo=base_calculo,
-            valor=Decimal(str(results[0]["valor_credito_icms"]))
+            valor=to_decimal(results[0]["valor_credito_icms"])
         )
@@ -9,7 +9,9 @@ from motor_tributario_py.taxes.icms_efetivo import CalculadoraIcmsEfetivo
 from motor_tributario_py.taxes.ipi import CalculadoraIpi
 
 from motor_tributario_py.rules.csosn_rules import CSOSN_DISPATCH_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.fixo import arredonda
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoCsosn:
@@ -65,41 +67,41 @@ class CalculadoraCsosn:
         run_efetivo = d["calcular_efetivo"] == 'true' or d["calcular_efetivo"] is True
         
         # Pre-requisite: IPI for ST (201, 202, 203, 900 etc usually need IPI)
-        # If running ST, ensure IPI
-        if run_st:
-             self._ensure_valor_ipi()
+        # If running ST, every module sees the calculated IPI
+        tributavel = self._com_valor_ipi() if run_st else self.tributavel
 
         # Execute modules
         if run_proprio:
-             self._calc_proprio(result)
+             self._calc_proprio(result, tributavel)
              
         if run_st:
-             self._calc_st_logic(result)
+             self._calc_st_logic(result, tributavel)
              
         if run_credito:
-             self._calc_credito(result)
+             self._calc_credito(result, tributavel)
              
         if run_efetivo:
-             self._calc_efetivo(result)
+             self._calc_efetivo(result, tributavel)
             
         return result
 
-    def _ensure_valor_ipi(self):
+    def _com_valor_ipi(self) -> Tributavel:
          calc_ipi = CalculadoraIpi(self.tributavel)
          res_ipi = calc_ipi.calcula()
          # Round IPI to 2 decimal places to match C# behavior before using in ST Base
-         self.tributavel.valor_ipi = res_ipi.valor.quantize(Decimal('0.01'))
+         # (on a copy: the caller's Tributavel is not modified)
+         return self.tributavel.substitui(valor_ipi=arredonda(res_ipi.valor))
 
-    def _calc_proprio(self, res: ResultadoCalculoCsosn):
-        res.percentual_reducao_icms = self.tributavel.percentual_reducao
-        res.percentual_icms = self.tributavel.percentual_icms
+    def _calc_proprio(self, res: ResultadoCalculoCsosn, tributavel: Tributavel):
+        res.percentual_reducao_icms = tributavel.percentual_reducao
+        res.percentual_icms = tributavel.percentual_icms
         
-        calc_icms = CalculadoraIcms(self.tributavel)
+        calc_icms = CalculadoraIcms(tributavel)
         icms_res = calc_icms.calcula()
         res.base_calculo_icms = icms_res.base_calculo
         res.valor_icms = icms_res.valor
 
-    def _calc_credito(self, res: ResultadoCalculoCsosn):
+    def _calc_credito(self, res: ResultadoCalculoCsosn, tributavel: Tributavel):
         # Use DMN to determine credito calculation strategy
         from motor_tributario_py.rules.credito_icms_rules import CREDITO_ICMS_PREPROCESSING_RULE
         
@@ -111,44 +113,37 @@ class CalculadoraCsosn:
         )
         
         # DMN tells us to override percentual_reducao for credito base calculation
-        original_reduction = self.tributavel.percentual_reducao
-        percentual_reducao_override = Decimal(str(preprocessing_result[0]["percentual_reducao_override"]))
-        
-        # Temporarily apply DMN-specified override
-        self.tributavel.percentual_reducao = percentual_reducao_override
+        percentual_reducao_override = to_decimal(preprocessing_result[0]["percentual_reducao_override"])
         
         # Calculate base using standard ICMS calculator with DMN-modified reduction
-        calc_icms_base = CalculadoraIcms(self.tributavel)
+        calc_icms_base = CalculadoraIcms(tributavel.substitui(percentual_reducao=percentual_reducao_override))
         res_icms_base = calc_icms_base.calcula()
         base_for_credito = res_icms_base.base_calculo
         
-        # Restore original value
-        self.tributavel.percentual_reducao = original_reduction
-        
         # Calculate credito value
-        calc_cred = CalculadoraCreditoIcms(self.tributavel)
+        calc_cred = CalculadoraCreditoIcms(tributavel)
         res_cred = calc_cred.calcula(base_calculo=base_for_credito)
         
         res.valor_credito = res_cred.valor
-        res.percentual_credito = self.tributavel.percentual_credito
+        res.percentual_credito = tributavel.percentual_credito
 
-    def _calc_st_logic(self, res: ResultadoCalculoCsosn):
-        res.percentual_mva = self.tributavel.percentual_mva
-        res.percentual_reducao_st = self.tributavel.percentual_reducao_st
-        res.percentual_icms_st = self.tributavel.percentual_icms_st
+    def _calc_st_logic(self, res: ResultadoCalculoCsosn, tributavel: Tributavel):
+        res.percentual_mva = tributavel.percentual_mva
+        res.percentual_reducao_st = tributavel.percentual_reducao_st
+        res.percentual_icms_st = tributavel.percentual_icms_st
         
-        calc_st = CalculadoraIcmsSt(self.tributavel)
+        calc_st = CalculadoraIcmsSt(tributavel)
         st_res = calc_st.calcula()
         
         res.base_calculo_icms_st = st_res.base_calculo_icms_st
         res.valor_icms_st = st_res.valor_icms_st
 
-    def _calc_efetivo(self, res: ResultadoCalculoCsosn):
-        calc_efetivo = CalculadoraIcmsEfetivo(self.tributavel)
+    def _calc_efetivo(self, res: ResultadoCalculoCsosn, tributavel: Tributavel):
+        calc_efetivo = CalculadoraIcmsEfetivo(tributavel)
         ef_res = calc_efetivo.calcula()
         
         res.base_calculo_icms_efetivo = ef_res.base_calculo
         res.valor_icms_efetivo = ef_res.valor_icms_efetivo
-        res.percentual_icms_efetivo = self.tributavel.percentual_icms_efetivo
-        res.percentual_reducao_icms_efetivo = self.tributavel.percentual_reducao_icms_efetivo
+        res.percentual_icms_efetivo = tributavel.percentual_icms_efetivo
+        res.percentual_reducao_icms_efetivo = tributavel.percentual_reducao_icms_efetivo
 
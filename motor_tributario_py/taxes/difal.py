@@ -2,7 +2,8 @@ from decimal import Decimal
 from dataclasses import dataclass
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.difal_rules import DIFAL_CALC_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoDifal:
@@ -37,11 +38,11 @@ class CalculadoraDifal:
         if not results:
              raise ValueError("No matching DIFAL rule found for inputs.")
 
-        base_calculo = Decimal(str(results[0]["base_calculo"]))
-        valor_fcp = Decimal(str(results[0]["valor_fcp"]))
-        valor_difal = Decimal(str(results[0]["valor_difal"]))
-        valor_icms_destino = Decimal(str(results[0]["valor_icms_destino"]))
-        valor_icms_origem = Decimal(str(results[0]["valor_icms_origem"]))
+        base_calculo = to_decimal(results[0]["base_calculo"])
+        valor_fcp = to_decimal(results[0]["valor_fcp"])
+        valor_difal = to_decimal(results[0]["valor_difal"])
+        valor_icms_destino = to_decimal(results[0]["valor_icms_destino"])
+        valor_icms_origem = to_decimal(results[0]["valor_icms_origem"])
         
         return ResultadoCalculoDifal(
             base_calculo,
@@ -2,7 +2,8 @@ from dataclasses import dataclass
 from decimal import Decimal
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.fcp_rules import FCP_CALC_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoFcp:
@@ -26,5 +27,5 @@ class CalculadoraFcp:
              
         return ResultadoCalculoFcp(
             base_calculo=base_calculo_icms,
-            valor_fcp=Decimal(str(results[0]["valor_fcp"]))
+            valor_fcp=to_decimal(results[0]["valor_fcp"])
         )
@@ -2,7 +2,8 @@ from dataclasses import dataclass
 from decimal import Decimal
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.fcp_st_rules import FCP_ST_CALC_RULE, FCP_ST_RETIDO_CALC_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoFcpSt:
@@ -38,8 +39,8 @@ class CalculadoraFcpSt:
              raise ValueError("No matching FCP ST rule found.")
         
         return ResultadoCalculoFcpSt(
-            base_calculo_fcp_st=Decimal(str(results[0]["base_calculo_fcp_st"])),
-            valor_fcp_st=Decimal(str(results[0]["valor_fcp_st"]))
+            base_calculo_fcp_st=to_decimal(results[0]["base_calculo_fcp_st"]),
+            valor_fcp_st=to_decimal(results[0]["valor_fcp_st"])
         )
 
 class CalculadoraFcpStRetido:
@@ -60,6 +61,6 @@ class CalculadoraFcpStRetido:
              raise ValueError("No matching FCP ST Retido rule found.")
              
         return ResultadoCalculoFcpStRetido(
-            base_calculo=Decimal(str(results[0]["base_calculo"])),
-            valor_fcp_st_retido=Decimal(str(results[0]["valor_fcp_st_retido"]))
+            base_calculo=to_decimal(results[0]["base_calculo"]),
+            valor_fcp_st_retido=to_decimal(results[0]["valor_fcp_st_retido"])
         )
@@ -2,7 +2,8 @@ from dataclasses import dataclass
 from decimal import Decimal
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.ibpt_rules import IBPT_CALC_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoIbpt:
@@ -34,11 +35,11 @@ class CalculadoraIbpt:
              raise ValueError("No matching IBPT rule found.")
              
         # Extract values
-        base_calculo = Decimal(str(results[0]["base_calculo"]))
-        val_fed = Decimal(str(results[0]["valor_federal"]))
-        val_est = Decimal(str(results[0]["valor_estadual"]))
-        val_mun = Decimal(str(results[0]["valor_municipal"]))
-        val_imp = Decimal(str(results[0]["valor_federal_importados"]))
+        base_calculo = to_decimal(results[0]["base_calculo"])
+        val_fed = to_decimal(results[0]["valor_federal"])
+        val_est = to_decimal(results[0]["valor_estadual"])
+        val_mun = to_decimal(results[0]["valor_municipal"])
+        val_imp = to_decimal(results[0]["valor_federal_importados"])
         
         return ResultadoCalculoIbpt(
             base_calculo=base_calculo,
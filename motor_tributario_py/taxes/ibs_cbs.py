@@ -2,7 +2,9 @@ from dataclasses import dataclass
 from decimal import Decimal
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.ibs_cbs_rules import IBS_CBS_BASE_RULE, IBS_CALC_RULE, CBS_CALC_RULE, IBS_MUNICIPAL_CALC_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.fixo import arredonda
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoIbs:
@@ -14,6 +16,13 @@ class ResultadoCalculoCbs:
     base_calculo: Decimal
     valor: Decimal
 
+@dataclass
+class ResultadoCalculoIbsCbs:
+    base_calculo: Decimal
+    ibs: ResultadoCalculoIbs
+    ibs_municipal: ResultadoCalculoIbs
+    cbs: ResultadoCalculoCbs
+
 class CalculadoraBaseIbsCbs:
     """Helper to calculate the common base for IBS and CBS"""
     def __init__(self, tributavel: Tributavel):
@@ -39,7 +48,7 @@ class CalculadoraBaseIbsCbs:
         if not results:
              raise ValueError("No matching IBS/CBS Base rule found.")
              
-        return Decimal(str(results[0]["base_calculo_ibs_cbs"]))
+        return to_decimal(results[0]["base_calculo_ibs_cbs"])
 
 class CalculadoraIbs:
     def __init__(self, tributavel: Tributavel):
@@ -57,10 +66,10 @@ class CalculadoraIbs:
         if not results:
              raise ValueError("No matching IBS rule found.")
              
-        val = Decimal(str(results[0]["valor_ibs"]))
+        val = to_decimal(results[0]["valor_ibs"])
         return ResultadoCalculoIbs(
             base_calculo=base_calculo,
-            valor=val.quantize(Decimal('0.01'))
+            valor=arredonda(val)
         )
 
 class CalculadoraIbsMunicipal:
@@ -79,10 +88,10 @@ class CalculadoraIbsMunicipal:
         if not results:
             raise ValueError("No matching IBS Municipal rule found.")
             
-        val = Decimal(str(results[0]["valor_ibs_municipal"]))
+        val = to_decimal(results[0]["valor_ibs_municipal"])
         return ResultadoCalculoIbs(
             base_calculo=base_calculo,
-            valor=val.quantize(Decimal('0.01'))
+            valor=arredonda(val)
         )
 
 class CalculadoraCbs:
@@ -101,8 +110,22 @@ class CalculadoraCbs:
         if not results:
              raise ValueError("No matching CBS rule found.")
              
-        val = Decimal(str(results[0]["valor_cbs"]))
+        val = to_decimal(results[0]["valor_cbs"])
         return ResultadoCalculoCbs(
             base_calculo=base_calculo,
-            valor=val.quantize(Decimal('0.01'))
+            valor=arredonda(val)
+        )
+
+
+class CalculadoraIbsCbs:
+    """IBS UF, IBS Municipal and CBS over one shared base"""
+    def __init__(self, tributavel: Tributavel):
+        self.tributavel = tributavel
+
+    def calcula(self, base_calculo: Decimal) -> ResultadoCalculoIbsCbs:
+        return ResultadoCalculoIbsCbs(
+            base_calculo=base_calculo,
+            ibs=CalculadoraIbs(self.tributavel).calcula(base_calculo),
+            ibs_municipal=CalculadoraIbsMunicipal(self.tributavel).calcula(base_calculo),
+            cbs=CalculadoraCbs(self.tributavel).calcula(base_calculo)
         )
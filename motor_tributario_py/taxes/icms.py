@@ -3,7 +3,9 @@ from dataclasses import dataclass, field
 from typing import Dict, Any, Optional
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.icms_rules import ICMS_CALC_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.fixo import arredonda
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoIcms:
@@ -65,8 +67,8 @@ class CalculadoraIcms:
              # Fallback or error?
              raise ValueError("No matching ICMS rule found for inputs.")
 
-        base_calculo = Decimal(str(results[0]["base_calculo"]))
-        valor = Decimal(str(results[0]["valor_final"]))
+        base_calculo = to_decimal(results[0]["base_calculo"])
+        valor = to_decimal(results[0]["valor_final"])
         
         # CST-specific post-processing using DMN rules
         valor_icms_operacao = None
@@ -103,9 +105,9 @@ class CalculadoraIcms:
                     if diferimento_result and diferimento_result[0]["should_calculate"]:
                         from decimal import ROUND_UP
                         # Get operation and deferred values from DMN
-                        valor_icms_operacao = Decimal(str(diferimento_result[0]["valor_icms_operacao"])).quantize(Decimal('0.01'))
+                        valor_icms_operacao = arredonda(to_decimal(diferimento_result[0]["valor_icms_operacao"]))
                         # Apply ROUND_UP to diferido to match C# MidpointRounding.AwayFromZero
-                        valor_icms_diferido = Decimal(str(diferimento_result[0]["valor_icms_diferido"])).quantize(Decimal('0.01'), rounding=ROUND_UP)
+                        valor_icms_diferido = arredonda(to_decimal(diferimento_result[0]["valor_icms_diferido"]), arredondamento=ROUND_UP)
                         # Recalculate final value with rounded diferido
                         valor = valor_icms_operacao - valor_icms_diferido
                 
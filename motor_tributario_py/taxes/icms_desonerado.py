@@ -5,7 +5,9 @@ from motor_tributario_py.rules.icms_desonerado_rules import (
     ICMS_DESONERADO_PREPROCESSING_RULE,
     ICMS_DESONERADO_CALC_RULE
 )
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.fixo import arredonda
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoIcmsDesonerado:
@@ -53,7 +55,7 @@ class CalculadoraIcmsDesonerado:
         if not results:
              return ResultadoCalculoIcmsDesonerado(Decimal('0'))
              
-        val = Decimal(str(results[0]["valor_icms_desonerado"]))
+        val = to_decimal(results[0]["valor_icms_desonerado"])
         return ResultadoCalculoIcmsDesonerado(
-            valor_icms_desonerado=val.quantize(Decimal('0.01'))
+            valor_icms_desonerado=arredonda(val)
         )
@@ -6,7 +6,8 @@ from motor_tributario_py.rules.icms_efetivo_rules import (
     ICMS_EFETIVO_BASE_RULE,
     ICMS_EFETIVO_CALC_RULE
 )
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoIcmsEfetivo:
@@ -54,7 +55,7 @@ class CalculadoraIcmsEfetivo:
         if not base_results:
              raise ValueError("No matching ICMS Efetivo Base rule.")
              
-        base_calculo = Decimal(str(base_results[0]["base_calculo_efetivo"]))
+        base_calculo = to_decimal(base_results[0]["base_calculo_efetivo"])
         
         # Calculate value using DMN
         calc_facts = {
@@ -69,5 +70,5 @@ class CalculadoraIcmsEfetivo:
              
         return ResultadoCalculoIcmsEfetivo(
             base_calculo=base_calculo,
-            valor_icms_efetivo=Decimal(str(val_results[0]["valor_icms_efetivo"]))
+            valor_icms_efetivo=to_decimal(val_results[0]["valor_icms_efetivo"])
         )
@@ -2,7 +2,8 @@ from dataclasses import dataclass
 from decimal import Decimal
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.icms_monofasico_rules import ICMS_MONOFASICO_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoIcmsMonofasico:
@@ -38,9 +39,9 @@ class CalculadoraIcmsMonofasico:
         
         r = results[0]
         return ResultadoCalculoIcmsMonofasico(
-            valor_icms_monofasico=Decimal(str(r["valor_icms_monofasico"])),
-            valor_icms_monofasico_retencao=Decimal(str(r["valor_icms_monofasico_retencao"])),
-            valor_icms_monofasico_operacao=Decimal(str(r["valor_icms_monofasico_operacao"])),
-            valor_icms_monofasico_diferido=Decimal(str(r["valor_icms_monofasico_diferido"])),
-            valor_icms_monofasico_retido_anteriormente=Decimal(str(r["valor_icms_monofasico_retido_anteriormente"]))
+            valor_icms_monofasico=to_decimal(r["valor_icms_monofasico"]),
+            valor_icms_monofasico_retencao=to_decimal(r["valor_icms_monofasico_retencao"]),
+            valor_icms_monofasico_operacao=to_decimal(r["valor_icms_monofasico_operacao"]),
+            valor_icms_monofasico_diferido=to_decimal(r["valor_icms_monofasico_diferido"]),
+            valor_icms_monofasico_retido_anteriormente=to_decimal(r["valor_icms_monofasico_retido_anteriormente"])
         )
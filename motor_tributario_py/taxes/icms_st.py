@@ -1,9 +1,13 @@
 from decimal import Decimal
 from dataclasses import dataclass
+from typing import Optional
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.icms_st_rules import ICMS_ST_CALC_RULE
-from motor_tributario_py.taxes.icms import CalculadoraIcms
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.taxes.icms import CalculadoraIcms, ResultadoCalculoIcms
+from motor_tributario_py.taxes.ipi import ResultadoCalculoIpi
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.fixo import arredonda
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoIcmsSt:
@@ -12,25 +16,42 @@ class ResultadoCalculoIcmsSt:
     base_calculo_icms_st: Decimal
     valor_icms_st: Decimal
 
+def valor_ipi_st(tributavel: Tributavel, res_ipi: Optional[ResultadoCalculoIpi] = None) -> Decimal:
+    """``valor_ipi`` of the ST base: the informed one, or the IPI rounded to cents when missing."""
+    if tributavel.percentual_ipi > 0 and tributavel.valor_ipi == 0:
+        if res_ipi is None:
+            from motor_tributario_py.taxes.ipi import CalculadoraIpi
+            res_ipi = CalculadoraIpi(tributavel).calcula()
+        # Round IPI to 2 decimal places before using in ST Base
+        return arredonda(res_ipi.valor)
+    return tributavel.valor_ipi
+
+
 class CalculadoraIcmsSt:
     def __init__(self, tributavel: Tributavel):
         self.tributavel = tributavel
 
-    def calcula(self) -> ResultadoCalculoIcmsSt:
+    def calcula(
+        self,
+        res_ipi: Optional[ResultadoCalculoIpi] = None,
+        res_icms_proprio: Optional[ResultadoCalculoIcms] = None
+    ) -> ResultadoCalculoIcmsSt:
+        # res_ipi / res_icms_proprio: dependencies already calculated by the caller
+        # (ICMS Proprio must have been calculated with ignore_ipi=True)
+
         # 0. Ensure IPI is calculated if needed
         # ICMS ST base includes IPI, so we need to calculate it first
-        if self.tributavel.percentual_ipi > 0 and self.tributavel.valor_ipi == 0:
-            from motor_tributario_py.taxes.ipi import CalculadoraIpi
-            calc_ipi = CalculadoraIpi(self.tributavel)
-            res_ipi = calc_ipi.calcula()
-            # Round IPI to 2 decimal places before using in ST Base
-            self.tributavel.valor_ipi = res_ipi.valor.quantize(Decimal('0.01'))
+        # (the Tributavel is not modified: the calculation graph declares
+        # which calculations see the value, see grafo.py)
+        valor_ipi = valor_ipi_st(self.tributavel, res_ipi)
         
         # 1. Calculate ICMS Proprio (Dependency)
         # We need both Base and Value of ICMS Proprio
         # C# logic uses CalculoBaseIcmsSemIpi, so we must exclude IPI explicitly
-        calc_icms = CalculadoraIcms(self.tributavel)
-        res_icms = calc_icms.calcula(ignore_ipi=True)
+        res_icms = res_icms_proprio
+        if res_icms is None:
+            calc_icms = CalculadoraIcms(self.tributavel)
+            res_icms = calc_icms.calcula(ignore_ipi=True)
         
         base_calculo_operacao_propria = res_icms.base_calculo
         valor_icms_proprio = res_icms.valor
@@ -42,7 +63,7 @@ class CalculadoraIcmsSt:
             "frete": self.tributavel.frete,
             "seguro": self.tributavel.seguro,
             "outras_despesas": self.tributavel.outras_despesas,
-            "valor_ipi": self.tributavel.valor_ipi,
+            "valor_ipi": valor_ipi,
             "tipo_desconto": self.tributavel.tipo_desconto,
             "desconto": self.tributavel.desconto,
             "percentual_reducao_st": self.tributavel.percentual_reducao_st,
@@ -56,8 +77,8 @@ class CalculadoraIcmsSt:
         if not results:
              raise ValueError("No matching ICMS ST rule found for inputs.")
 
-        base_calculo_st = Decimal(str(results[0]["base_calculo_st"]))
-        valor_icms_st = Decimal(str(results[0]["valor_icms_st"]))
+        base_calculo_st = to_decimal(results[0]["base_calculo_st"])
+        valor_icms_st = to_decimal(results[0]["valor_icms_st"])
         
         return ResultadoCalculoIcmsSt(
             base_calculo_operacao_propria,
@@ -2,7 +2,8 @@ from decimal import Decimal
 from dataclasses import dataclass
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.ipi_rules import IPI_CALC_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoIpi:
@@ -31,7 +32,7 @@ class CalculadoraIpi:
         if not results:
              raise ValueError("No matching IPI rule found for inputs.")
 
-        base_calculo = Decimal(str(results[0]["base_calculo"]))
-        valor = Decimal(str(results[0]["valor_final"]))
+        base_calculo = to_decimal(results[0]["base_calculo"])
+        valor = to_decimal(results[0]["valor_final"])
         
         return ResultadoCalculoIpi(base_calculo, valor)
@@ -2,7 +2,8 @@ from decimal import Decimal
 from dataclasses import dataclass
 from motor_tributario_py.models import Tributavel
 from motor_tributario_py.rules.issqn_rules import ISSQN_BASE_RULE, ISSQN_TAX_RULE
-from bkflow_dmn.api import decide_single_table
+from motor_tributario_py.engine import decide_single_table
+from motor_tributario_py.utils.functions import to_decimal
 
 @dataclass
 class ResultadoCalculoIssqn:
@@ -39,7 +40,7 @@ class CalculadoraIssqn:
         if not base_results:
              raise ValueError("No matching ISSQN Base rule found.")
         
-        base_calculo = Decimal(str(base_results[0]["base_calculo"]))
+        base_calculo = to_decimal(base_results[0]["base_calculo"])
         
         # Step 2: Calculate Taxes using Rule with Base
         tax_facts = {
@@ -59,12 +60,12 @@ class CalculadoraIssqn:
              
         return ResultadoCalculoIssqn(
             base_calculo=base_calculo,
-            valor=Decimal(str(final_results[0]["valor_issqn"])),
-            valor_ret_pis=Decimal(str(final_results[0]["valor_ret_pis"])),
-            valor_ret_cofins=Decimal(str(final_results[0]["valor_ret_cofins"])),
-            valor_ret_csll=Decimal(str(final_results[0]["valor_ret_csll"])),
-            valor_ret_irrf=Decimal(str(final_results[0]["valor_ret_irrf"])),
-            valor_ret_inss=Decimal(str(final_results[0]["valor_ret_inss"])),
+            valor=to_decimal(final_results[0]["valor_issqn"]),
+            valor_ret_pis=to_decimal(final_results[0]["valor_ret_pis"]),
+            valor_ret_cofins=to_decimal(final_results[0]["valor_ret_cofins"]),
+            valor_ret_csll=to_decimal(final_results[0]["valor_ret_csll"]),
+            valor_ret_irrf=to_decimal(final_results[0]["valor_ret_irrf"]),
+            valor_ret_inss=to_decimal(final_results[0]["valor_ret_inss"]),
             # C# Test expects BaseCalculoInss, which mirrors BaseCalculo in this context
             base_calculo_inss=base_calculo,
             base_calculo_irrf=base_calculo,
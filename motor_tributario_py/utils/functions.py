@@ -1,29 +1,69 @@
+import threading
 from decimal import Decimal
 from bkflow_feel.utils import FEELFunctionsManager
 
 def to_decimal(val):
+    # Rule outputs and facts are already Decimals; only other values
+    # (FEEL int/float literals) go through str, as floats must.
+    if type(val) is Decimal:
+        return val
+    if type(val) is int:
+        return Decimal(val)
     return Decimal(str(val))
 
 def apply_threshold(val, limit):
-    v = Decimal(str(val))
-    l = Decimal(str(limit))
+    v = to_decimal(val)
+    l = to_decimal(limit)
     return v if v > l else Decimal('0')
 
 def check_threshold(test_val, limit, return_val):
-    t = Decimal(str(test_val))
-    l = Decimal(str(limit))
-    r = Decimal(str(return_val))
+    t = to_decimal(test_val)
+    l = to_decimal(limit)
+    r = to_decimal(return_val)
     return r if t > l else Decimal('0')
 
+# FEEL name -> dotted path, as FEELFunctionsManager expects
+FEEL_FUNCTIONS = {
+    "decimal": "motor_tributario_py.utils.functions.to_decimal",
+    "apply_threshold": "motor_tributario_py.utils.functions.apply_threshold",
+    "check_threshold": "motor_tributario_py.utils.functions.check_threshold"
+}
+
+class FeelBootstrap:
+    """Registers :data:`FEEL_FUNCTIONS` once per process, thread-safely.
+
+    ``ensure()`` is a flag check once the functions are registered, so it
+    can be called on every evaluation.  Names already registered (by another
+    caller of ``FEELFunctionsManager``) are left as they are.
+    """
+
+    def __init__(self, functions=None):
+        self.functions = dict(FEEL_FUNCTIONS if functions is None else functions)
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def ensure(self) -> None:
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            registered = FEELFunctionsManager.all_funcs()
+            missing = {name: path for name, path in self.functions.items() if name not in registered}
+            if missing:
+                FEELFunctionsManager.register_funcs(missing)
+            self._ready = True
+
+    def reset(self) -> None:
+        """Forget the registration (after ``FEELFunctionsManager.clear()``)."""
+        with self._lock:
+            self._ready = False
+
+FEEL_BOOTSTRAP = FeelBootstrap()
+
 def register_feel_functions():
-    # FEELFunctionsManager expects dotted path string.
-    REGISTER_FUNCS = {
-        "decimal": "motor_tributario_py.utils.functions.to_decimal",
-        "apply_threshold": "motor_tributario_py.utils.functions.apply_threshold",
-        "check_threshold": "motor_tributario_py.utils.functions.check_threshold"
-    }
-    try:
-        FEELFunctionsManager.register_funcs(REGISTER_FUNCS)
-    except ValueError:
-        # Already registered or partial registration error
-        pass
+    FEEL_BOOTSTRAP.ensure()
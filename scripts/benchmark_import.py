@@ -0,0 +1,73 @@
+"""
+Import-time benchmark with a budget.
+
+Each measurement imports a module in a fresh interpreter (a cold start as
+seen by a serverless function or a per-request worker) and reports the
+median wall time over ``--repeat`` runs.  The script exits with status 1
+when a module exceeds its budget, so it can gate CI.
+
+Usage:
+    python scripts/benchmark_import.py
+    python scripts/benchmark_import.py --repeat 9 --budget motor_tributario_py.facade=100
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+# Source checkout the modules are imported from
+ROOT = Path(__file__).resolve().parent.parent
+
+# Module -> budget in milliseconds.  The package and the facade must not load
+# the calculators; the engine pays for bkflow_feel/bkflow_dmn (not budgeted).
+BUDGETS = {
+    "motor_tributario_py": 50.0,
+    "motor_tributario_py.facade": 150.0,
+    "motor_tributario_py.engine": None,
+}
+
+_MEASURE = (
+    "import time; inicio = time.perf_counter(); import {modulo}; "
+    "print((time.perf_counter() - inicio) * 1000)"
+)
+
+
+def mede(modulo: str, repeticoes: int) -> float:
+    """Median import time of ``modulo`` in milliseconds, each run in a fresh interpreter."""
+    tempos = []
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", _MEASURE.format(modulo=modulo)],
+            check=True, capture_output=True, text=True, cwd=ROOT,
+        ).stdout
+        tempos.append(float(saida.strip().splitlines()[-1]))
+    return statistics.median(tempos)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="override or add a budget (repeatable)")
+    args = parser.parse_args(argv)
+
+    budgets = dict(BUDGETS)
+    for item in args.budget:
+        modulo, _, limite = item.partition("=")
+        budgets[modulo] = float(limite) if limite else None
+
+    excedidos = 0
+    for modulo, limite in budgets.items():
+        tempo = mede(modulo, args.repeat)
+        if limite is None:
+            print(f"{modulo:40s} {tempo:9.1f} ms")
+            continue
+        ok = tempo <= limite
+        excedidos += not ok
+        print(f"{modulo:40s} {tempo:9.1f} ms  budget {limite:7.1f} ms  {'ok' if ok else 'OVER'}")
+    return 1 if excedidos else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
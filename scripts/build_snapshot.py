@@ -0,0 +1,28 @@
+"""
+Prebuild the snapshot of the prepared rule tables.
+
+Run it before building the wheel so the snapshot ships as package data
+(``motor_tributario_py/engine/rules.snapshot``); workers then restore it with
+``engine.load_snapshot()``.
+
+Usage:
+    python scripts/build_snapshot.py [path]
+"""
+import sys
+from pathlib import Path
+
+# Run from a source checkout
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from motor_tributario_py.engine import rules_hash, write_snapshot  # noqa: E402
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    path = write_snapshot(argv[0] if argv else None)
+    print(f"{path} ({rules_hash()[:12]})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import unittest
+from decimal import Decimal
+
+from bkflow_dmn.api import decide_single_table as reference_decide
+from bkflow_dmn.exception import HitPolicyMatchError
+
+from motor_tributario_py.engine import analyze_rules, analyze_table, compile_table
+from motor_tributario_py.engine.analysis import OTHER
+from motor_tributario_py.engine.interpreter import interpret
+from motor_tributario_py.rules.cst_rules import CST_DISPATCH_RULE
+from motor_tributario_py.rules.icms_efetivo_rules import ICMS_EFETIVO_PREPROCESSING_RULE
+from motor_tributario_py.rules.icms_rules import ICMS_CALC_RULE
+from motor_tributario_py.utils.functions import register_feel_functions
+
+OVERLAPPING_RULE = {
+    "title": "Overlapping",
+    "hit_policy": "Unique",
+    "inputs": {"cols": [{"id": "valor"}], "rows": [["valor > decimal(0)"], ["valor >= decimal(10)"]]},
+    "outputs": {"cols": [{"id": "faixa"}], "rows": [['"positivo"'], ['"alto"']]},
+}
+
+SHADOWED_RULE = {
+    "title": "Shadowed",
+    "hit_policy": "First",
+    "inputs": {"cols": [{"id": "cst"}], "rows": [['"00", "10"'], ['"10"'], ['']]},
+    "outputs": {"cols": [{"id": "grupo"}], "rows": [['"A"'], ['"B"'], ['"C"']]},
+}
+
+
+class TestAnalysis(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        register_feel_functions()
+
+    def test_unique_rules_are_certified(self):
+        for name, analysis in analyze_rules().items():
+            if analysis.hit_policy == "Unique":
+                self.assertTrue(analysis.certified, f"{name}: {analysis}")
+            self.assertEqual(analysis.unreachable, [], name)
+
+    def test_completeness(self):
+        self.assertTrue(analyze_table(ICMS_CALC_RULE).complete)
+        self.assertEqual(analyze_table(CST_DISPATCH_RULE).gaps, [{"cst": OTHER}])
+        # Negative rates match no row
+        gaps = analyze_table(ICMS_EFETIVO_PREPROCESSING_RULE).gaps
+        self.assertEqual({gap["is_ativo"] for gap in gaps}, {True, False})
+        self.assertTrue(all(gap["percentual_icms_efetivo"] < 0 for gap in gaps))
+
+    def test_overlap_is_not_certified(self):
+        analysis = analyze_table(OVERLAPPING_RULE)
+        self.assertEqual(analysis.overlaps, [(0, 1)])
+        self.assertFalse(analysis.certified)
+        # Evaluation keeps the uniqueness check
+        with self.assertRaises(HitPolicyMatchError):
+            interpret(OVERLAPPING_RULE, {"valor": Decimal("20")})
+        with self.assertRaises(HitPolicyMatchError):
+            compile_table(OVERLAPPING_RULE, certified=analysis.certified)({"valor": Decimal("20")})
+
+    def test_unreachable_rows(self):
+        analysis = analyze_table(SHADOWED_RULE)
+        self.assertEqual(analysis.unreachable, [1])
+        self.assertTrue(analysis.complete)
+
+    def test_certified_first_match(self):
+        compiled = compile_table(CST_DISPATCH_RULE, certified=True)
+        for cst in ("00", "51", "90"):
+            expected = reference_decide(CST_DISPATCH_RULE, {"cst": cst})
+            self.assertEqual(compiled({"cst": cst}), expected)
+            self.assertEqual(interpret(CST_DISPATCH_RULE, {"cst": cst}), expected)
+        self.assertEqual(compiled({"cst": "99"}, strict_mode=False), [])
+        with self.assertRaises(HitPolicyMatchError):
+            interpret(CST_DISPATCH_RULE, {"cst": "99"})
+
+
+if __name__ == "__main__":
+    unittest.main()
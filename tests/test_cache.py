@@ -0,0 +1,187 @@
+import copy
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from decimal import Decimal
+
+from motor_tributario_py.cache import PersistentResultCache, ResultCache, fingerprint, results_version
+from motor_tributario_py.facade import FacadeCalculadoraTributacao
+from motor_tributario_py.models import Tributavel, TributavelLinha
+from test_perfil import itens_aleatorios, resultado_ou_erro
+
+
+def produto_padrao(**kwargs):
+    valores = dict(
+        valor_produto=Decimal("1000"),
+        percentual_icms=Decimal("18"),
+        percentual_pis=Decimal("1.65"),
+        percentual_cofins=Decimal("7.6"),
+    )
+    valores.update(kwargs)
+    return Tributavel(**valores)
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+class TestFingerprint(unittest.TestCase):
+
+    def test_only_fields_read(self):
+        # IBS/CBS rates are not read for ICMS + PIS + COFINS
+        saidas = ("icms", "pis", "cofins")
+        self.assertEqual(fingerprint(produto_padrao(), saidas),
+                         fingerprint(produto_padrao(percentual_cbs=Decimal("0.9")), saidas))
+        self.assertNotEqual(fingerprint(produto_padrao(), ("ibs_cbs",)),
+                            fingerprint(produto_padrao(percentual_cbs=Decimal("0.9")), ("ibs_cbs",)))
+        self.assertNotEqual(fingerprint(produto_padrao(), saidas),
+                            fingerprint(produto_padrao(percentual_icms=Decimal("12")), saidas))
+
+    def test_decimal_exponent(self):
+        self.assertNotEqual(fingerprint(produto_padrao(valor_produto=Decimal("1000")), ("icms",)),
+                            fingerprint(produto_padrao(valor_produto=Decimal("1000.00")), ("icms",)))
+
+    def test_variants(self):
+        produto = produto_padrao(cst="00")
+        self.assertEqual(fingerprint(produto, ("icms",)),
+                         fingerprint(TributavelLinha.de_tributavel(produto), ("icms",)))
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_same_results(self):
+        cache = ResultCache()
+        for item in itens_aleatorios(100, semente=3):
+            esperado = resultado_ou_erro(lambda: FacadeCalculadoraTributacao(copy.deepcopy(item)).calcula_tributacao())
+            for _ in range(2):
+                self.assertEqual(resultado_ou_erro(lambda: cache.calcula_tributacao(item)), esperado)
+        self.assertGreater(cache.info().hits, 0)
+
+    def test_methods(self):
+        cache = ResultCache()
+        produto = produto_padrao()
+        for metodo, argumentos in (("calcula_icms", {}), ("calcula_issqn", {"calcular_retencoes": True}),
+                                   ("calcula_cbs", {})):
+            esperado = getattr(FacadeCalculadoraTributacao(produto), metodo)(**argumentos)
+            self.assertEqual(cache.calcula(produto, metodo, **argumentos), esperado)
+            self.assertEqual(cache.calcula(copy.deepcopy(produto), metodo, **argumentos), esperado)
+        self.assertEqual(cache.info().hits, 3)
+
+    def test_results_are_copies(self):
+        cache = ResultCache()
+        produto = produto_padrao()
+        cache.calcula_tributacao(produto).res_icms.valor = Decimal("0")
+        cache.calcula_tributacao(produto).res_icms.valor = Decimal("0")
+        self.assertEqual(cache.calcula_tributacao(produto).res_icms.valor, Decimal("180.00"))
+
+    def test_lru_eviction(self):
+        cache = ResultCache(maxsize=2)
+        produtos = [produto_padrao(valor_produto=Decimal(valor)) for valor in (1, 2, 3)]
+        for produto in produtos:
+            cache.calcula(produto, "calcula_icms")
+        self.assertEqual(len(cache), 2)
+        cache.calcula(produtos[0], "calcula_icms")
+        self.assertEqual(cache.info().hits, 0)
+        cache.calcula(produtos[2], "calcula_icms")
+        self.assertEqual(cache.info().hits, 1)
+
+    def test_ttl(self):
+        relogio = Relogio()
+        cache = ResultCache(ttl=10, clock=relogio)
+        produto = produto_padrao()
+        cache.calcula(produto, "calcula_icms")
+        relogio.agora = 5
+        cache.calcula(produto, "calcula_icms")
+        relogio.agora = 20
+        cache.calcula(produto, "calcula_icms")
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses, info.expired), (1, 2, 1))
+        self.assertAlmostEqual(info.hit_rate, 1 / 3)
+
+    def test_thread_safe(self):
+        cache = ResultCache(maxsize=8)
+        produtos = [produto_padrao(valor_produto=Decimal(valor)) for valor in range(16)]
+        erros = []
+
+        def trabalho():
+            try:
+                for produto in produtos * 3:
+                    cache.calcula(produto, "calcula_icms")
+            except Exception as e:  # pragma: no cover
+                erros.append(e)
+
+        threads = [threading.Thread(target=trabalho) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(erros, [])
+        info = cache.info()
+        self.assertEqual(info.hits + info.misses, 4 * 48)
+        self.assertLessEqual(info.currsize, 8)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ResultCache(maxsize=0)
+        with self.assertRaises(ValueError):
+            ResultCache(ttl=0)
+
+
+class TestPersistentResultCache(unittest.TestCase):
+
+    def setUp(self):
+        diretorio = tempfile.TemporaryDirectory()
+        self.addCleanup(diretorio.cleanup)
+        self.path = Path(diretorio.name) / "resultados.sqlite"
+        # Items whose calculation raises are not cached: keep the others
+        self.itens, self.esperado = [], []
+        for item in itens_aleatorios(60, semente=4):
+            esperado = resultado_ou_erro(lambda: FacadeCalculadoraTributacao(copy.deepcopy(item)).calcula_tributacao())
+            if not isinstance(esperado, type):
+                self.itens.append(item)
+                self.esperado.append(esperado)
+
+    def abre(self, version="v1"):
+        cache = PersistentResultCache(self.path, version=version)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_only_changed_items_are_calculated(self):
+        self.assertEqual(self.abre().calcula_tributacao_lote(self.itens), self.esperado)
+
+        cache = self.abre()
+        self.itens[0] = self.itens[0].substitui(valor_produto=self.itens[0].valor_produto + 1)
+        resultados = cache.calcula_tributacao_lote(self.itens)
+        self.assertEqual(resultados[1:], self.esperado[1:])
+        self.assertEqual(resultados[0], FacadeCalculadoraTributacao(self.itens[0]).calcula_tributacao())
+        self.assertEqual((cache.info().hits, cache.info().misses), (len(self.itens) - 1, 1))
+
+    def test_single_item_and_outputs(self):
+        cache = self.abre()
+        item = self.itens[0]
+        esperado = FacadeCalculadoraTributacao(copy.deepcopy(item)).calcula_tributacao(("icms",))
+        self.assertEqual(cache.calcula_tributacao(item, ("icms",)), esperado)
+        self.assertEqual(cache.calcula_tributacao(item, ("icms",)), esperado)
+        self.assertEqual(cache.calcula_tributacao(item), self.esperado[0])
+        self.assertEqual((cache.info().hits, cache.info().misses), (1, 2))
+
+    def test_other_version_is_not_read(self):
+        self.abre("v1").calcula_tributacao_lote(self.itens)
+        cache = self.abre("v2")
+        cache.calcula_tributacao_lote(self.itens)
+        self.assertEqual(cache.info().hits, 0)
+        self.assertEqual(cache.prune(), cache.info().currsize)
+        self.assertEqual(self.abre("v1").info().currsize, 0)
+
+    def test_results_version(self):
+        self.assertEqual(results_version(), results_version())
+        self.assertEqual(len(results_version()), 64)
+
+
+if __name__ == "__main__":
+    unittest.main()
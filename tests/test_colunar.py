@@ -0,0 +1,128 @@
+"""
+The columnar engine must be bit-exact with the Decimal calculators after
+rounding to cents.
+"""
+import random
+import unittest
+from decimal import Decimal
+
+from motor_tributario_py.models import Tributavel
+from motor_tributario_py.taxes.cofins import CalculadoraCofins
+from motor_tributario_py.taxes.difal import CalculadoraDifal
+from motor_tributario_py.taxes.fcp import CalculadoraFcp
+from motor_tributario_py.taxes.icms import CalculadoraIcms
+from motor_tributario_py.taxes.ipi import CalculadoraIpi
+from motor_tributario_py.taxes.pis import CalculadoraPis
+from motor_tributario_py.utils.functions import register_feel_functions
+
+try:
+    import numpy
+    from motor_tributario_py.colunar import CAMPOS_COLUNARES, calcula_colunar
+except ImportError:  # numpy is an optional dependency
+    numpy = None
+
+CENTAVO = Decimal("0.01")
+
+
+def calcula_decimal(tributavel):
+    res_icms = CalculadoraIcms(tributavel).calcula()
+    res_ipi = CalculadoraIpi(tributavel).calcula()
+    res_pis = CalculadoraPis(tributavel).calcula()
+    res_cofins = CalculadoraCofins(tributavel).calcula()
+    res_fcp = CalculadoraFcp(tributavel).calcula(base_calculo_icms=res_icms.base_calculo)
+    res_difal = CalculadoraDifal(tributavel).calcula()
+    valores = {
+        "base_calculo_icms": res_icms.base_calculo,
+        "valor_icms": res_icms.valor,
+        "base_calculo_ipi": res_ipi.base_calculo,
+        "valor_ipi": res_ipi.valor,
+        "base_calculo_pis": res_pis.base_calculo,
+        "valor_pis": res_pis.valor,
+        "base_calculo_cofins": res_cofins.base_calculo,
+        "valor_cofins": res_cofins.valor,
+        "valor_fcp": res_fcp.valor_fcp,
+        "base_calculo_difal": res_difal.base_calculo,
+        "fcp_difal": res_difal.fcp,
+        "valor_difal": res_difal.difal,
+        "valor_icms_destino": res_difal.valor_icms_destino,
+        "valor_icms_origem": res_difal.valor_icms_origem,
+    }
+    return {nome: valor.quantize(CENTAVO) for nome, valor in valores.items()}
+
+
+def item_aleatorio(rng):
+    def valor(maximo, casas):
+        return Decimal(rng.randint(0, maximo * 10 ** casas)).scaleb(-casas)
+
+    return Tributavel(
+        valor_produto=valor(5000, rng.choice([2, 4, 10])),
+        quantidade_produto=valor(50, rng.choice([0, 3, 4])) + 1,
+        frete=valor(100, 2),
+        seguro=valor(20, 2),
+        outras_despesas=valor(30, 2),
+        desconto=valor(50, 2),
+        valor_ipi=valor(200, 2),
+        percentual_icms=rng.choice([Decimal("0"), Decimal("7"), Decimal("12"), Decimal("18"), Decimal("17.5")]),
+        percentual_reducao=rng.choice([Decimal("0"), Decimal("33.33"), Decimal("41.667"), Decimal("61.11")]),
+        percentual_ipi=valor(15, 2),
+        percentual_pis=rng.choice([Decimal("0.65"), Decimal("1.65")]),
+        percentual_reducao_pis=rng.choice([Decimal("0"), Decimal("10")]),
+        percentual_cofins=rng.choice([Decimal("3"), Decimal("7.6")]),
+        percentual_reducao_cofins=rng.choice([Decimal("0"), Decimal("12.5")]),
+        percentual_fcp=rng.choice([Decimal("0"), Decimal("2")]),
+        percentual_difal_interna=Decimal("18"),
+        percentual_difal_interestadual=rng.choice([Decimal("4"), Decimal("7"), Decimal("12")]),
+        is_ativo_imobilizado_ou_uso_consumo=rng.random() < 0.3,
+        deduz_icms_da_base_de_pis_cofins=rng.random() < 0.5,
+        tipo_desconto=rng.choice(["Condicional", "Incondicional"]),
+    )
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class TestCalculaColunar(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        register_feel_functions()
+
+    def assert_igual_decimal(self, itens):
+        colunas = {campo: [getattr(item, campo) for item in itens] for campo in CAMPOS_COLUNARES}
+        resultado = calcula_colunar(colunas)
+        for indice, item in enumerate(itens):
+            esperado = calcula_decimal(item)
+            for nome, valor in esperado.items():
+                obtido = getattr(resultado, nome).decimais()[indice]
+                self.assertEqual(obtido, valor, f"{nome} item {indice}")
+
+    def test_bit_exact_with_decimal_path(self):
+        rng = random.Random(2024)
+        self.assert_igual_decimal([item_aleatorio(rng) for _ in range(300)])
+
+    def test_items_beyond_decimal_precision(self):
+        # Intermediates over 28 digits: Decimal rounds, the item is recalculated with it
+        rng = random.Random(7)
+        grande = item_aleatorio(rng)
+        grande.valor_produto = Decimal("123456789012345.1234567891")
+        grande.quantidade_produto = Decimal("98765.4321")
+        grande.percentual_reducao = Decimal("33.3333333")
+        self.assert_igual_decimal([item_aleatorio(rng), grande, item_aleatorio(rng)])
+
+    def test_scalar_columns_and_defaults(self):
+        resultado = calcula_colunar({
+            "valor_produto": [Decimal("100.00"), Decimal("59.90")],
+            "percentual_icms": Decimal("18"),
+        })
+        self.assertEqual(resultado.valor_icms.decimais(), [Decimal("18.00"), Decimal("10.78")])
+        self.assertEqual(resultado.valor_pis.decimais(), [Decimal("0.00"), Decimal("0.00")])
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            calcula_colunar({"valor_produto": [Decimal("1")], "tipo_desconto": ["Outro"]})
+        with self.assertRaises(ValueError):
+            calcula_colunar({"valor_produt": [Decimal("1")]})
+        with self.assertRaises(TypeError):
+            calcula_colunar({"valor_produto": [1.5]})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Tests for the ahead-of-time rule compiler.
+
+Every decision-table evaluation performed while running the fixtures corpus
+is recorded and replayed against the compiled tables, which must return
+exactly what ``bkflow_dmn`` returns.
+"""
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from bkflow_dmn.api import decide_single_table as reference_decide
+
+import test_data_driven
+from motor_tributario_py import engine
+from motor_tributario_py.engine import compile_table
+
+
+def run_fixtures():
+    suite = unittest.defaultTestLoader.loadTestsFromTestCase(test_data_driven.TestDataDriven)
+    result = unittest.TestResult()
+    suite.run(result)
+    return result
+
+
+class TestCompiledRules(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.calls = []
+
+        def recorder(table, facts, strict_mode=True):
+            cls.calls.append((table, dict(facts), strict_mode))
+            return reference_decide(table, facts, strict_mode=strict_mode)
+
+        # Without the hash index every evaluation reaches the interpreter
+        with mock.patch.object(engine, "_interpret", recorder), \
+                mock.patch.object(engine, "get_indexed", return_value=None):
+            run_fixtures()
+
+    def test_corpus_was_recorded(self):
+        self.assertGreater(len(self.calls), 100)
+
+    def test_compiled_matches_interpreter(self):
+        """Compiled tables reproduce decide_single_table on every recorded call."""
+        for table, facts, strict_mode in self.calls:
+            compiled = engine.get_compiled(table)
+            self.assertIsNotNone(compiled, table["title"])
+            try:
+                expected = reference_decide(table, facts, strict_mode=strict_mode)
+            except Exception as e:
+                with self.assertRaises(type(e), msg=table["title"]):
+                    compiled(facts, strict_mode)
+                continue
+            self.assertEqual(compiled(facts, strict_mode), expected, f"{table['title']}: {facts}")
+
+    def test_fixtures_pass_with_compiled_rules(self):
+        engine.set_compiled_rules(True)
+        try:
+            result = run_fixtures()
+        finally:
+            engine.set_compiled_rules(False)
+        self.assertTrue(result.wasSuccessful(), result.failures[:1] + result.errors[:1])
+
+    def test_strict_unique_without_match_raises(self):
+        from bkflow_dmn.exception import HitPolicyMatchError
+        from motor_tributario_py.rules.cst_rules import CST_DISPATCH_RULE
+
+        compiled = compile_table(CST_DISPATCH_RULE)
+        self.assertEqual(compiled({"cst": "99"}, strict_mode=False), [])
+        with self.assertRaises(HitPolicyMatchError):
+            compiled({"cst": "99"}, strict_mode=True)
+
+    def test_reference_interpreter_bypasses_compiled_rules(self):
+        engine.set_compiled_rules(True)
+        try:
+            with mock.patch.object(engine, "_reference", wraps=reference_decide) as reference, \
+                    mock.patch.object(engine, "get_indexed", return_value=None):
+                from motor_tributario_py.rules.fcp_rules import FCP_CALC_RULE
+                facts = {"dummy": 1, "base_calculo_icms": Decimal("100"), "percentual_fcp": Decimal("2")}
+                engine.decide_single_table(FCP_CALC_RULE, facts)
+                self.assertFalse(reference.called)
+                with engine.reference_interpreter():
+                    engine.decide_single_table(FCP_CALC_RULE, facts)
+                self.assertTrue(reference.called)
+        finally:
+            engine.set_compiled_rules(False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import copy
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from motor_tributario_py import engine
+from motor_tributario_py.facade import FacadeCalculadoraTributacao
+from motor_tributario_py.models import Tributavel
+from motor_tributario_py.perfil import calcula_tributacao_perfil
+from motor_tributario_py.rules.icms_rules import ICMS_CALC_RULE
+from motor_tributario_py.taxes.csosn import CalculadoraCsosn
+
+
+def produto_padrao(**kwargs):
+    valores = dict(
+        valor_produto=Decimal("1000"),
+        quantidade_produto=Decimal("1"),
+        percentual_icms=Decimal("18"),
+        percentual_ipi=Decimal("10"),
+        percentual_pis=Decimal("1.65"),
+        percentual_cofins=Decimal("7.6"),
+        percentual_fcp=Decimal("2"),
+        deduz_icms_da_base_de_pis_cofins=True,
+    )
+    valores.update(kwargs)
+    return Tributavel(**valores)
+
+
+class TestContextoCalculo(unittest.TestCase):
+
+    def count_icms_evaluations(self, calcula):
+        with mock.patch.object(engine, "_interpret", wraps=engine._interpret) as interpret, \
+                mock.patch.object(engine, "get_indexed", return_value=None):
+            calcula()
+        return sum(1 for call in interpret.call_args_list if call.args[0] is ICMS_CALC_RULE)
+
+    def test_icms_evaluated_once_per_state(self):
+        # valor_ipi informed: ICMS ST does not need IPI
+        facade = FacadeCalculadoraTributacao(produto_padrao(valor_ipi=Decimal("100")))
+        self.assertEqual(self.count_icms_evaluations(facade.calcula_tributacao), 1)
+        # Nothing changed: everything comes from the memo
+        self.assertEqual(self.count_icms_evaluations(facade.calcula_tributacao), 0)
+
+    def test_field_change_invalidates(self):
+        produto = produto_padrao()
+        facade = FacadeCalculadoraTributacao(produto)
+        self.assertEqual(facade.calcula_icms().valor, Decimal("180.00"))
+        self.assertEqual(facade.calcula_pis().valor.quantize(Decimal("0.01")), Decimal("13.53"))
+
+        produto.valor_produto = Decimal("2000")
+        self.assertEqual(facade.calcula_icms().valor, Decimal("360.00"))
+        self.assertEqual(facade.calcula_pis().valor.quantize(Decimal("0.01")), Decimal("27.06"))
+
+    def test_results_are_not_shared(self):
+        facade = FacadeCalculadoraTributacao(produto_padrao())
+        facade.calcula_icms().valor = Decimal("0")
+        self.assertEqual(facade.calcula_icms().valor, Decimal("180.00"))
+
+    def test_ibs_cbs_single_pass(self):
+        produto = produto_padrao(
+            percentual_ibs_uf=Decimal("0.1"),
+            percentual_ibs_municipal=Decimal("0.05"),
+            percentual_cbs=Decimal("0.9"),
+        )
+        facade = FacadeCalculadoraTributacao(produto)
+        with mock.patch.object(facade, "_monta_base_ibs_cbs", wraps=facade._monta_base_ibs_cbs) as monta:
+            resultado = facade.calcula_ibs_cbs()
+            self.assertEqual(resultado.ibs, facade.calcula_ibs())
+            self.assertEqual(resultado.ibs_municipal, facade.calcula_ibs_municipal())
+            self.assertEqual(resultado.cbs, facade.calcula_cbs())
+        self.assertEqual(monta.call_count, 1)
+
+
+class TestTributavelNaoModificado(unittest.TestCase):
+
+    def produto_st(self, **kwargs):
+        return produto_padrao(percentual_icms_st=Decimal("18"), percentual_mva=Decimal("40"), **kwargs)
+
+    def test_icms_st_calculates_ipi_without_writing_it(self):
+        produto = self.produto_st()
+        facade = FacadeCalculadoraTributacao(produto)
+        st = facade.calcula_icms_st()
+        self.assertEqual(produto.valor_ipi, Decimal("0"))
+        # Same base as with valor_ipi informed
+        informado = FacadeCalculadoraTributacao(self.produto_st(valor_ipi=Decimal("100.00")))
+        self.assertEqual(st.base_calculo_icms_st, informado.calcula_icms_st().base_calculo_icms_st)
+
+    def test_calcula_tributacao(self):
+        produto = self.produto_st()
+        original = copy.deepcopy(produto)
+        FacadeCalculadoraTributacao(produto).calcula_tributacao()
+        self.assertEqual(produto, original)
+
+    def test_later_steps_see_ipi_calculated_by_icms_st(self):
+        produto = self.produto_st(cst="10", valor_produto=Decimal("100"), deduz_icms_da_base_de_pis_cofins=False,
+                                  is_ativo_imobilizado_ou_uso_consumo=True,
+                                  percentual_difal_interna=Decimal("18"), percentual_difal_interestadual=Decimal("12"))
+        original = copy.deepcopy(produto)
+        for calcula in (lambda: FacadeCalculadoraTributacao(produto).calcula_tributacao(),
+                        lambda: calcula_tributacao_perfil(produto)):
+            resultado = calcula()
+            self.assertEqual(resultado.res_icms_st.base_calculo_icms_st, Decimal("154.00000"))
+            self.assertEqual(resultado.res_pis.base_calculo, Decimal("110.00"))
+            self.assertEqual(resultado.res_pis.valor, Decimal("1.82"))
+            self.assertEqual(resultado.res_cofins.valor, Decimal("8.36"))
+            self.assertEqual(resultado.res_fcp.valor_fcp, Decimal("2.20"))
+            self.assertEqual(resultado.res_difal.difal, Decimal("6.60"))
+            self.assertEqual(produto, original)
+
+    def test_csosn(self):
+        for csosn in (101, 201, 202, 900):
+            produto = self.produto_st(csosn=csosn, percentual_credito=Decimal("2"), percentual_reducao=Decimal("10"))
+            original = copy.deepcopy(produto)
+            CalculadoraCsosn(produto).calcula()
+            self.assertEqual(produto, original)
+
+    def test_kwargs_apply_to_a_copy(self):
+        produto = produto_padrao()
+        facade = FacadeCalculadoraTributacao(produto, percentual_icms=Decimal("12"))
+        self.assertEqual(facade.calcula_icms().valor, Decimal("120.00"))
+        self.assertEqual(produto.percentual_icms, Decimal("18"))
+
+
+if __name__ == "__main__":
+    unittest.main()
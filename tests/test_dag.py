@@ -0,0 +1,57 @@
+import unittest
+from decimal import Decimal
+
+from bkflow_feel.api import parse_expression
+
+from motor_tributario_py.engine import compile_table
+from motor_tributario_py.engine.compiler import parse_feel
+from motor_tributario_py.engine.dag import RowDag, node_key, repeated_subexpressions
+from motor_tributario_py.rules.difal_rules import DIFAL_CALC_RULE
+from motor_tributario_py.utils.functions import register_feel_functions
+
+FACTS = {
+    "valor_produto": Decimal("250.00"),
+    "quantidade_produto": Decimal("3"),
+    "frete": Decimal("10"),
+    "seguro": Decimal("2.5"),
+    "outras_despesas": Decimal("1"),
+    "valor_ipi": Decimal("30"),
+    "desconto": Decimal("5"),
+    "percentual_fcp": Decimal("2"),
+    "percentual_difal_interna": Decimal("18"),
+    "percentual_difal_interestadual": Decimal("7"),
+}
+
+
+class TestRowDag(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        register_feel_functions()
+
+    def test_structural_key(self):
+        self.assertEqual(node_key(parse_feel("(a + b) * 2")), node_key(parse_feel("((a + b)) * 2")))
+        self.assertNotEqual(node_key(parse_feel("a + b")), node_key(parse_feel("b + a")))
+        self.assertNotEqual(node_key(parse_feel("a + 1")), node_key(parse_feel("a + 1.0")))
+
+    def test_only_largest_repeated_subtree_is_shared(self):
+        trees = [parse_feel("(a * b + c) * x"), parse_feel("(a * b + c) * y")]
+        self.assertEqual(repeated_subexpressions(trees), {node_key(parse_feel("a * b + c"))})
+
+    def test_difal_rows_match_interpreter(self):
+        col_ids = [col["id"] for col in DIFAL_CALC_RULE["outputs"]["cols"]]
+        for row in DIFAL_CALC_RULE["outputs"]["rows"]:
+            dag = RowDag(col_ids, [parse_feel(source) for source in row])
+            # Base, decimal(100) and the DIFAL value are computed once
+            self.assertEqual(len(dag.shared), 3)
+            expected = {col: parse_expression(source, FACTS) for col, source in zip(col_ids, row)}
+            self.assertEqual(dag(FACTS), expected)
+
+    def test_compiled_row_computes_base_once(self):
+        source = compile_table(DIFAL_CALC_RULE).source
+        for block in source.split("if matches[")[1:]:
+            self.assertEqual(block.count("v_valor_produto * v_quantidade_produto"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -111,6 +111,8 @@ def create_test_method(test_data):
                  facade_args["tipo_desconto"] = "Incondicional"
 
         facade = FacadeCalculadoraTributacao(produto, **facade_args)
+        # facade_args are applied to a copy of the product
+        produto = facade.tributavel
         
         # Pre-calculation for ICMS ST if IPI is missing but PercentualIPI exists
         # C# Facade might do this automatically or test setup implies it.
@@ -0,0 +1,128 @@
+import copy
+import random
+import unittest
+from decimal import (
+    Decimal,
+    ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, ROUND_HALF_DOWN, ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_UP,
+)
+
+from unittest import mock
+
+from motor_tributario_py import engine, fixo
+from motor_tributario_py.facade import FacadeCalculadoraTributacao
+from motor_tributario_py.fixo import divide_arredondando, quantiza
+from motor_tributario_py.grafo import SAIDAS_PADRAO
+from motor_tributario_py.models import Tributavel
+from motor_tributario_py.taxes.icms import CalculadoraIcms
+from motor_tributario_py.utils.functions import register_feel_functions
+from test_perfil import itens_aleatorios, resultado_ou_erro
+
+MODOS = (ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_HALF_DOWN, ROUND_UP, ROUND_DOWN, ROUND_CEILING, ROUND_FLOOR)
+CENTAVO = Decimal("0.01")
+SAIDAS = SAIDAS_PADRAO + ("ibs_cbs",)
+
+
+def inteiros_aleatorios(rng, quantidade):
+    valores = [5, -5, 15, -26750, 10 ** 7]
+    valores += [rng.randint(-10 ** 9, 10 ** 9) for _ in range(quantidade)]
+    return valores
+
+
+class TestDivideArredondando(unittest.TestCase):
+
+    def test_matches_decimal_quantize_in_every_mode(self):
+        for inteiro in inteiros_aleatorios(random.Random(51), 2000):
+            valor = Decimal(inteiro).scaleb(-4)
+            for modo in MODOS:
+                self.assertEqual(
+                    Decimal(divide_arredondando(inteiro, 100, modo)).scaleb(-2),
+                    valor.quantize(CENTAVO, rounding=modo),
+                    f"{valor} {modo}"
+                )
+
+    def test_divide_arredondando_numpy(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest("numpy is not installed")
+        inteiros = list(range(-2000, 2000, 7))
+        for modo in MODOS:
+            esperado = [divide_arredondando(n, 100, modo) for n in inteiros]
+            self.assertEqual(divide_arredondando(numpy.array(inteiros), 100, modo).tolist(), esperado)
+
+    def test_icms_diferido_round_up(self):
+        """CST 51: valor_icms_diferido is rounded up, the operation value half-even."""
+        register_feel_functions()
+        produto = Tributavel(
+            valor_produto=Decimal("1.13"),
+            quantidade_produto=Decimal("7"),
+            percentual_icms=Decimal("18"),
+            percentual_diferimento=Decimal("33.33"),
+            cst="51",
+        )
+        resultado = CalculadoraIcms(produto).calcula()
+
+        # Scaled integers: base 7.91 (10**2), operation 1.4238 (10**4), deferred (10**8)
+        operacao = 113 * 7 * 18
+        diferido = operacao * 3333
+        self.assertEqual(Decimal(divide_arredondando(diferido, 10 ** 6, ROUND_UP)).scaleb(-2),
+                         resultado.valor_icms_diferido)
+        self.assertEqual(Decimal(divide_arredondando(operacao, 10 ** 2)).scaleb(-2), resultado.valor_icms_operacao)
+
+    def test_unsupported_mode(self):
+        with self.assertRaises(ValueError):
+            divide_arredondando(1, 2, "ROUND_05UP")
+
+
+class TestQuantiza(unittest.TestCase):
+
+    def test_matches_decimal_quantize(self):
+        rng = random.Random(7)
+        valores = [Decimal("-0.001"), Decimal("0"), Decimal("12.345E+3"), Decimal("0.005"), Decimal("-2.675")]
+        valores += [Decimal(inteiro).scaleb(-rng.randint(0, 8)) for inteiro in inteiros_aleatorios(rng, 500)]
+        for valor in valores:
+            for expoente in (Decimal("1"), CENTAVO, Decimal("0.0001")):
+                for modo in MODOS:
+                    # str: same value, sign and exponent
+                    self.assertEqual(str(quantiza(valor, expoente, modo)),
+                                     str(valor.quantize(expoente, rounding=modo)), f"{valor} {expoente} {modo}")
+
+
+class TestArredondamentoFixo(unittest.TestCase):
+    """``engine.set_fixed_point_rounding``: the calculators round with scaled integers."""
+
+    def tearDown(self):
+        engine.set_fixed_point_rounding(False)
+
+    def calcula(self, item):
+        facade = FacadeCalculadoraTributacao(copy.deepcopy(item))
+        return (resultado_ou_erro(lambda: repr(facade.calcula_tributacao(SAIDAS))),
+                resultado_ou_erro(lambda: repr(facade.calcula_csosn())))
+
+    def test_off_by_default(self):
+        self.assertFalse(engine.fixed_point_rounding_enabled())
+
+    def test_same_results(self):
+        itens = list(itens_aleatorios(200, semente=51))
+        esperado = [self.calcula(item) for item in itens]
+        engine.set_fixed_point_rounding(True)
+        self.assertEqual([self.calcula(item) for item in itens], esperado)
+
+    def test_icms_diferido_rounds_through_fixo(self):
+        produto = Tributavel(
+            valor_produto=Decimal("1.13"),
+            quantidade_produto=Decimal("7"),
+            percentual_icms=Decimal("18"),
+            percentual_diferimento=Decimal("33.33"),
+            cst="51",
+        )
+        esperado = CalculadoraIcms(produto).calcula()
+        engine.set_fixed_point_rounding(True)
+        with mock.patch.object(fixo, "quantiza", wraps=quantiza) as quantiza_fixo:
+            resultado = CalculadoraIcms(produto).calcula()
+        self.assertIn(ROUND_UP, [chamada.args[2] for chamada in quantiza_fixo.call_args_list])
+        self.assertEqual(repr(resultado), repr(esperado))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import threading
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from bkflow_feel.utils import FEELFunctionsManager
+
+from motor_tributario_py import engine
+from motor_tributario_py.rules.fcp_rules import FCP_CALC_RULE
+from motor_tributario_py.utils.functions import FeelBootstrap, apply_threshold, check_threshold, to_decimal
+
+
+class TestFeelFunctions(unittest.TestCase):
+
+    def test_to_decimal_keeps_decimals(self):
+        valor = Decimal("12.3400")
+        self.assertIs(to_decimal(valor), valor)
+
+    def test_to_decimal_converts_literals(self):
+        self.assertEqual(str(to_decimal(100)), "100")
+        # Floats go through str, so 0.1 stays 0.1
+        self.assertEqual(to_decimal(0.1), Decimal("0.1"))
+        self.assertEqual(to_decimal("7.5"), Decimal("7.5"))
+
+    def test_thresholds(self):
+        self.assertEqual(apply_threshold(Decimal("10.01"), 10), Decimal("10.01"))
+        self.assertEqual(apply_threshold(Decimal("10"), 10), Decimal("0"))
+        self.assertEqual(check_threshold(Decimal("11"), 10, Decimal("3.3")), Decimal("3.3"))
+        self.assertEqual(check_threshold(Decimal("9"), 10, Decimal("3.3")), Decimal("0"))
+
+
+class TestFeelBootstrap(unittest.TestCase):
+
+    def test_registers_once_across_threads(self):
+        bootstrap = FeelBootstrap({"teste_bootstrap_decimal": "motor_tributario_py.utils.functions.to_decimal"})
+        self.assertFalse(bootstrap.ready)
+        with mock.patch.object(FEELFunctionsManager, "register_funcs",
+                               wraps=FEELFunctionsManager.register_funcs) as register:
+            threads = [threading.Thread(target=bootstrap.ensure) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            bootstrap.ensure()
+        self.assertTrue(bootstrap.ready)
+        self.assertEqual(register.call_count, 1)
+        self.assertEqual(FEELFunctionsManager.func_call("teste_bootstrap_decimal", 5), Decimal("5"))
+
+    def test_keeps_functions_registered_elsewhere(self):
+        bootstrap = FeelBootstrap({"decimal": "outro.modulo.decimal"})
+        bootstrap.ensure()
+        self.assertTrue(bootstrap.ready)
+        self.assertEqual(FEELFunctionsManager.func_call("decimal", 1), Decimal("1"))
+
+    def test_engine_bootstraps_on_first_evaluation(self):
+        facts = {"dummy": 1, "base_calculo_icms": Decimal("100"), "percentual_fcp": Decimal("2")}
+        result = engine.decide_single_table(FCP_CALC_RULE, facts)
+        self.assertTrue(engine.engine_ready())
+        self.assertEqual(result[0]["valor_fcp"], Decimal("2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
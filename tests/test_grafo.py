@@ -0,0 +1,124 @@
+import copy
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from motor_tributario_py.facade import FacadeCalculadoraTributacao
+from motor_tributario_py.grafo import GRAFO_TRIBUTACAO, SAIDAS_PADRAO, ordem_calculo
+from motor_tributario_py.models import Tributavel
+from motor_tributario_py.perfil import calcula_tributacao_perfil
+from test_perfil import itens_aleatorios, resultado_ou_erro
+
+
+class TestGrafoTributacao(unittest.TestCase):
+
+    def test_default_order_is_historical_sequence(self):
+        ordem = ordem_calculo(SAIDAS_PADRAO)
+        self.assertEqual(tuple(nome for nome in ordem if not GRAFO_TRIBUTACAO[nome].interno), SAIDAS_PADRAO)
+
+    def test_dependencies_come_first(self):
+        self.assertEqual(ordem_calculo(["icms_st"]), ("icms", "ipi", "icms_st"))
+        self.assertEqual(ordem_calculo(["icms_desonerado"]), ("icms", "ipi", "valor_ipi_st", "icms_desonerado"))
+        self.assertEqual(
+            ordem_calculo(["ibs_cbs"]),
+            ("icms", "ipi", "valor_ipi_st", "valor_ipi_icms", "pis", "cofins", "ibs_cbs"),
+        )
+
+    def test_nodes_are_hashable(self):
+        nos = set(GRAFO_TRIBUTACAO.values())
+        self.assertEqual(len(nos), len(GRAFO_TRIBUTACAO))
+        self.assertEqual(dict(GRAFO_TRIBUTACAO["issqn"].argumentos), {"calcular_retencoes": True})
+
+    def test_unknown_output(self):
+        with self.assertRaises(ValueError):
+            ordem_calculo(["icms", "iof"])
+
+    def test_only_requested_subgraph_is_evaluated(self):
+        produto = Tributavel(
+            valor_produto=Decimal("100"),
+            percentual_icms=Decimal("18"),
+            percentual_pis=Decimal("1.65"),
+            percentual_cofins=Decimal("7.6"),
+        )
+        facade = FacadeCalculadoraTributacao(produto)
+        with mock.patch.object(facade, "calcula_difal") as difal, \
+                mock.patch.object(facade, "calcula_issqn") as issqn:
+            resultado = facade.calcula_tributacao(saidas=("icms", "pis", "cofins"))
+        difal.assert_not_called()
+        issqn.assert_not_called()
+
+        self.assertEqual(resultado.valor_icms, Decimal("18.00"))
+        self.assertEqual(resultado.valor_pis.quantize(Decimal("0.01")), Decimal("1.65"))
+        self.assertEqual(resultado.valor_cofins.quantize(Decimal("0.01")), Decimal("7.60"))
+        self.assertIsNone(resultado.res_difal)
+
+    def test_ibs_cbs_does_not_calculate_issqn_retentions(self):
+        produto = Tributavel(
+            valor_produto=Decimal("100"),
+            percentual_issqn=Decimal("5"),
+            percentual_ret_irrf=Decimal("1.5"),
+            percentual_ibs_uf=Decimal("0.1"),
+            percentual_cbs=Decimal("0.9"),
+            somar_issqn_na_base_ibs_cbs=True,
+        )
+        facade = FacadeCalculadoraTributacao(produto)
+        with mock.patch.object(facade, "calcula_issqn", wraps=facade.calcula_issqn) as issqn:
+            resultado = facade.calcula_tributacao(saidas=("ibs_cbs",))
+        self.assertTrue(issqn.called)
+        for chamada in issqn.call_args_list:
+            self.assertFalse(chamada.kwargs.get("calcular_retencoes", False))
+        self.assertIsNone(resultado.res_issqn)
+        self.assertIsNotNone(resultado.res_ibs_cbs)
+
+
+class TestSaidasIndependentes(unittest.TestCase):
+    """An output has the same value whatever the other requested outputs are."""
+
+    SUBCONJUNTOS = (("icms_desonerado",), ("icms_st", "icms_desonerado"), ("pis",), ("icms_st", "pis"),
+                    ("ibs_cbs",), ("icms_st", "ibs_cbs"), ("difal", "fcp"), ("icms_st", "difal", "fcp"))
+
+    def itens(self):
+        yield Tributavel(
+            valor_produto=Decimal("100"), cst="20", percentual_reducao=Decimal("10"),
+            percentual_icms=Decimal("18"), percentual_ipi=Decimal("10"), valor_ipi=Decimal("0"),
+            percentual_icms_st=Decimal("18"), percentual_mva=Decimal("40"),
+            percentual_pis=Decimal("1.65"), percentual_cofins=Decimal("7.6"),
+            tipo_calculo_icms_desonerado="BaseSimples", is_ativo_imobilizado_ou_uso_consumo=True,
+        )
+        yield from itens_aleatorios(100, semente=7)
+
+    def assert_saidas_independentes(self, calcula):
+        todas = SAIDAS_PADRAO + ("ibs_cbs",)
+        for item in self.itens():
+            completo = resultado_ou_erro(lambda: calcula(copy.deepcopy(item), todas))
+            for saidas in self.SUBCONJUNTOS:
+                parcial = resultado_ou_erro(lambda: calcula(copy.deepcopy(item), saidas))
+                if isinstance(completo, type) or isinstance(parcial, type):
+                    continue  # the error belongs to an output left out of the subset
+                for nome in saidas:
+                    self.assertEqual(getattr(parcial, f"res_{nome}"), getattr(completo, f"res_{nome}"),
+                                     (nome, saidas, item))
+
+    def test_facade(self):
+        self.assert_saidas_independentes(
+            lambda item, saidas: FacadeCalculadoraTributacao(item).calcula_tributacao(saidas=saidas))
+
+    def test_perfil(self):
+        self.assert_saidas_independentes(
+            lambda item, saidas: calcula_tributacao_perfil(item, saidas=saidas))
+
+    def test_desonerado_sees_ipi_calculated_for_st(self):
+        item = next(self.itens())
+        for saidas in (("icms_desonerado",), ("icms_st", "icms_desonerado")):
+            resultado = FacadeCalculadoraTributacao(copy.deepcopy(item)).calcula_tributacao(saidas=saidas)
+            self.assertEqual(resultado.valor_icms_desonerado, Decimal("17.82"))
+
+    def test_pis_sees_informed_ipi_when_icms_does_not_calculate_st(self):
+        item = next(self.itens())
+        for saidas in (None, ("icms_st", "ibs_cbs")):
+            resultado = FacadeCalculadoraTributacao(copy.deepcopy(item)).calcula_tributacao(saidas=saidas)
+            self.assertEqual(resultado.res_pis.base_calculo, Decimal("100"))
+
+
+if __name__ == "__main__":
+    unittest.main()
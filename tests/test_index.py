@@ -0,0 +1,147 @@
+"""
+Tests for hash-indexed dispatch of equality-only decision tables.
+
+Every evaluation performed while running the fixtures corpus is replayed
+against the indexed tables, which must return what ``bkflow_dmn`` returns.
+"""
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from bkflow_dmn.api import decide_single_table as reference_decide
+from bkflow_dmn.exception import HitPolicyMatchError
+
+from motor_tributario_py import engine
+from motor_tributario_py.engine import FoldedTable, index_table
+from motor_tributario_py.rules.credito_icms_rules import CREDITO_ICMS_PREPROCESSING_RULE
+from motor_tributario_py.rules.cst_post_processing_rules import CST_51_DIFERIMENTO_RULE, CST_POST_PROCESSING_RULE
+from motor_tributario_py.rules.cst_rules import CST_DISPATCH_RULE
+from motor_tributario_py.rules.csosn_rules import CSOSN_DISPATCH_RULE
+from motor_tributario_py.rules.ibpt_rules import IBPT_CALC_RULE
+from motor_tributario_py.rules.icms_monofasico_rules import ICMS_MONOFASICO_RULE
+from motor_tributario_py.rules.icms_rules import ICMS_CALC_RULE
+from motor_tributario_py.rules.issqn_rules import ISSQN_TAX_RULE
+from test_compiler import run_fixtures
+
+
+class TestIndexedTables(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.calls = []
+
+        def recorder(table, facts, strict_mode=True):
+            cls.calls.append((table, dict(facts), strict_mode))
+            return reference_decide(table, facts, strict_mode=strict_mode)
+
+        with mock.patch.object(engine, "_interpret", recorder), \
+                mock.patch.object(engine, "get_indexed", return_value=None):
+            run_fixtures()
+
+    def test_dispatch_tables_are_indexed(self):
+        for table in (CST_DISPATCH_RULE, CSOSN_DISPATCH_RULE, CST_POST_PROCESSING_RULE, ICMS_MONOFASICO_RULE):
+            self.assertIsNotNone(engine.get_indexed(table), table["title"])
+        # Range tests are not equalities
+        self.assertIsNone(engine.get_indexed(CST_51_DIFERIMENTO_RULE))
+
+    def test_indexed_matches_interpreter(self):
+        for compiled in (False, True):
+            for table, facts, strict_mode in self.calls:
+                indexed = engine.get_indexed(table)
+                if indexed is None:
+                    continue
+                try:
+                    expected = reference_decide(table, facts, strict_mode=strict_mode)
+                except HitPolicyMatchError:
+                    with self.assertRaises(HitPolicyMatchError, msg=table["title"]):
+                        indexed(facts, strict_mode, compiled)
+                    continue
+                self.assertEqual(indexed(facts, strict_mode, compiled), expected, f"{table['title']}: {facts}")
+
+    def test_hit_policies(self):
+        indexed = index_table(CST_DISPATCH_RULE)
+        self.assertEqual(indexed({"cst": "99"}, strict_mode=False), [])
+        with self.assertRaises(HitPolicyMatchError):
+            indexed({"cst": "99"}, strict_mode=True)
+        # Not a string: left to the interpreter, which raises a type error
+        self.assertIsNone(indexed({"cst": ["00"]}, strict_mode=True))
+        self.assertEqual(indexed({"cst": "00"}), reference_decide(CST_DISPATCH_RULE, {"cst": "00"}))
+
+    def test_results_are_not_shared(self):
+        indexed = index_table(CSOSN_DISPATCH_RULE)
+        indexed({"csosn": 101})[0].clear()
+        self.assertEqual(indexed({"csosn": 101}), reference_decide(CSOSN_DISPATCH_RULE, {"csosn": 101}))
+
+    def test_dummy_tables_are_folded(self):
+        preprocessing = engine.get_indexed(CREDITO_ICMS_PREPROCESSING_RULE)
+        self.assertIsInstance(preprocessing, FoldedTable)
+        self.assertEqual(preprocessing.constant, reference_decide(CREDITO_ICMS_PREPROCESSING_RULE, {"dummy": 1})[0])
+        preprocessing({"dummy": 1})[0].clear()
+        self.assertEqual(preprocessing({"dummy": 1}), reference_decide(CREDITO_ICMS_PREPROCESSING_RULE, {"dummy": 1}))
+
+        ibpt = engine.get_indexed(IBPT_CALC_RULE)
+        self.assertIsInstance(ibpt, FoldedTable)
+        self.assertIsNone(ibpt.constant)
+        # Other gate values still follow the hit policy
+        self.assertEqual(ibpt({"dummy": 2}, strict_mode=False), [])
+        with self.assertRaises(HitPolicyMatchError):
+            ibpt({"dummy": 2})
+
+
+def resultado_ou_erro(table, facts, strict_mode):
+    try:
+        return engine.decide_single_table(table, facts, strict_mode)
+    except Exception as e:
+        return type(e)
+
+
+class TestMistypedFacts(unittest.TestCase):
+    """Facts equal to a literal but of another type are rejected like the interpreter does."""
+
+    CASES = (
+        (CSOSN_DISPATCH_RULE, {"csosn": Decimal("101")}),
+        (CSOSN_DISPATCH_RULE, {"csosn": 101.0}),
+        (CSOSN_DISPATCH_RULE, {"csosn": "101"}),
+        (CSOSN_DISPATCH_RULE, {"csosn": True}),
+        (CSOSN_DISPATCH_RULE, {"csosn": None}),
+        (CST_DISPATCH_RULE, {"cst": 0}),
+        (CST_DISPATCH_RULE, {}),
+        (ISSQN_TAX_RULE, {"calcular_retencoes": 1}),
+        (ISSQN_TAX_RULE, {"calcular_retencoes": 0}),
+        (ICMS_CALC_RULE, {"is_ativo": 1, "tipo_desconto": "Condicional"}),
+        (ICMS_CALC_RULE, {"is_ativo": Decimal("0"), "tipo_desconto": "Incondicional"}),
+        (IBPT_CALC_RULE, {"dummy": Decimal("1")}),
+        (IBPT_CALC_RULE, {"dummy": 1.0}),
+        (CREDITO_ICMS_PREPROCESSING_RULE, {"dummy": Decimal("1")}),
+        (CREDITO_ICMS_PREPROCESSING_RULE, {"dummy": True}),
+    )
+
+    def tearDown(self):
+        engine.set_compiled_rules(False)
+        engine.set_linear_rules(False)
+        engine.set_zero_rules(False)
+
+    def test_index_agrees_with_reference_interpreter(self):
+        for compiled in (False, True):
+            for linear in (False, True):
+                for zeros in (False, True):
+                    engine.set_compiled_rules(compiled)
+                    engine.set_linear_rules(linear)
+                    engine.set_zero_rules(zeros)
+                    for table, facts in self.CASES:
+                        for strict_mode in (True, False):
+                            with engine.reference_interpreter():
+                                expected = resultado_ou_erro(table, facts, strict_mode)
+                            self.assertEqual(resultado_ou_erro(table, facts, strict_mode), expected,
+                                             f"{table['title']}: {facts} {compiled, linear, zeros}")
+
+    def test_mistyped_fact_is_not_looked_up(self):
+        indexed = index_table(CSOSN_DISPATCH_RULE)
+        self.assertEqual(indexed.literal_types, (int,))
+        self.assertIsNone(indexed({"csosn": Decimal("101")}))
+        self.assertIsNone(indexed({"csosn": 101.0}))
+        self.assertEqual(indexed({"csosn": 101}), reference_decide(CSOSN_DISPATCH_RULE, {"csosn": 101}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+import unittest
+
+import motor_tributario_py
+from motor_tributario_py import facade
+
+
+def modulos_carregados(codigo):
+    """Modules loaded by ``codigo`` in a fresh interpreter."""
+    saida = subprocess.run(
+        [sys.executable, "-c", codigo + "; import sys; print('\\n'.join(sys.modules))"],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return set(saida.split())
+
+
+class TestLazyImports(unittest.TestCase):
+
+    def test_facade_import_does_not_load_calculators(self):
+        carregados = modulos_carregados("import motor_tributario_py.facade")
+        self.assertFalse({m for m in carregados if m.startswith(("bkflow", "motor_tributario_py.taxes",
+                                                                 "motor_tributario_py.rules"))})
+
+    def test_calculators_load_on_first_use(self):
+        carregados = modulos_carregados(
+            "from decimal import Decimal; from motor_tributario_py import FacadeCalculadoraTributacao, Tributavel; "
+            "FacadeCalculadoraTributacao(Tributavel(valor_produto=Decimal('10'), percentual_icms=Decimal('18'))).calcula_icms()"
+        )
+        self.assertIn("motor_tributario_py.taxes.icms", carregados)
+        self.assertNotIn("motor_tributario_py.taxes.difal", carregados)
+
+    def test_names_stay_importable(self):
+        from motor_tributario_py.facade import CalculadoraDifal, ResultadoCalculoIcms
+        from motor_tributario_py.taxes.difal import CalculadoraDifal as original
+        self.assertIs(CalculadoraDifal, original)
+        self.assertEqual(ResultadoCalculoIcms.__name__, "ResultadoCalculoIcms")
+        self.assertIs(motor_tributario_py.FacadeCalculadoraTributacao, facade.FacadeCalculadoraTributacao)
+        self.assertIn("calcula_tributacao_lote", dir(motor_tributario_py))
+        with self.assertRaises(AttributeError):
+            facade.CalculadoraInexistente
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Tests for the per-profile affine forms of the calculation tables.
+
+Every evaluation performed while running the fixtures corpus is replayed
+against the linear tables, whose values must equal what ``bkflow_dmn``
+returns whenever they do not defer to the general path.
+"""
+import copy
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from bkflow_dmn.api import decide_single_table as reference_decide
+
+from motor_tributario_py import engine
+from motor_tributario_py.engine.compiler import parse_feel
+from motor_tributario_py.engine.linear import AffineForm, NonLinear, affine_form, degree
+from motor_tributario_py.facade import FacadeCalculadoraTributacao
+from motor_tributario_py.rules.ipi_rules import IPI_CALC_RULE
+from motor_tributario_py.rules.issqn_rules import ISSQN_TAX_RULE
+from test_compiler import run_fixtures
+from test_perfil import itens_aleatorios, resultado_ou_erro
+
+LINHA = {
+    "valor_produto": Decimal("250.00"),
+    "quantidade_produto": Decimal("3"),
+    "frete": Decimal("10"),
+    "seguro": Decimal("2.5"),
+    "outras_despesas": Decimal("1"),
+    "desconto": Decimal("5"),
+}
+
+
+class TestAffineForm(unittest.TestCase):
+
+    def test_ipi_coefficients(self):
+        fonte = IPI_CALC_RULE["outputs"]["rows"][1][1]
+        forma = affine_form(parse_feel(fonte), {"percentual_ipi": Decimal("10")})
+        um_decimo = Decimal("0.1")
+        self.assertEqual(forma, AffineForm(Decimal("0"), (
+            (("quantidade_produto", "valor_produto"), um_decimo), (("frete",), um_decimo),
+            (("seguro",), um_decimo), (("outras_despesas",), um_decimo), (("desconto",), -um_decimo),
+        )))
+        self.assertEqual(forma.evaluate(LINHA), Decimal("75.85"))
+
+    def test_threshold_is_not_linear(self):
+        self.assertIsNone(degree(parse_feel("apply_threshold((base_calculo * percentual_ret_irrf) / 100, 10)")))
+        self.assertIsNone(engine.get_linear(ISSQN_TAX_RULE))
+
+    def test_degree(self):
+        self.assertEqual(degree(parse_feel("(percentual_icms * 2) / decimal(100)")), 0)
+        self.assertEqual(degree(parse_feel("valor_produto * quantidade_produto")), 2)
+        self.assertIsNone(degree(parse_feel("(valor_produto + frete) * (seguro + desconto)")))
+        self.assertIsNone(degree(parse_feel("percentual_icms / valor_produto")))
+
+    def test_inexact_coefficient(self):
+        with self.assertRaises(NonLinear):
+            affine_form(parse_feel("(valor_produto * percentual_icms) / decimal(3)"),
+                        {"percentual_icms": Decimal("10")})
+        self.assertIsNotNone(affine_form(parse_feel("(valor_produto * percentual_icms) / decimal(3)"),
+                                         {"percentual_icms": Decimal("12")}))
+
+
+class TestLinearTables(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.calls = []
+
+        def recorder(table, facts, strict_mode=True):
+            cls.calls.append((table, dict(facts), strict_mode))
+            return reference_decide(table, facts, strict_mode=strict_mode)
+
+        with mock.patch.object(engine, "_interpret", recorder), \
+                mock.patch.object(engine, "get_indexed", return_value=None):
+            run_fixtures()
+
+    def test_ipi_is_linear(self):
+        linear = engine.get_linear(IPI_CALC_RULE)
+        self.assertEqual(linear.profile_ids, ("percentual_ipi", "tipo_desconto"))
+        fatos = dict(LINHA, percentual_ipi=Decimal("10"), tipo_desconto="Incondicional")
+        self.assertEqual(linear(fatos), [{"base_calculo": Decimal("758.5"), "valor_final": Decimal("75.85")}])
+        # One derivation per profile
+        self.assertIs(linear.forms(dict(fatos, valor_produto=Decimal("1"))), linear.forms(fatos))
+
+    def test_linear_matches_interpreter(self):
+        avaliados = 0
+        for table, facts, strict_mode in self.calls:
+            linear = engine.get_linear(table)
+            resultado = linear(facts) if linear is not None else None
+            if resultado is None:
+                continue
+            avaliados += 1
+            self.assertEqual(resultado, reference_decide(table, facts, strict_mode=strict_mode), table["title"])
+        self.assertGreater(avaliados, 100)
+
+    def test_facade_matches(self):
+        for item in itens_aleatorios(150, semente=5):
+            esperado = resultado_ou_erro(lambda: FacadeCalculadoraTributacao(copy.deepcopy(item)).calcula_tributacao())
+            engine.set_linear_rules(True)
+            try:
+                resultado = resultado_ou_erro(lambda: FacadeCalculadoraTributacao(copy.deepcopy(item)).calcula_tributacao())
+            finally:
+                engine.set_linear_rules(False)
+            self.assertEqual(resultado, esperado)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import copy
+import unittest
+from decimal import Decimal
+from unittest import mock
+
+from bkflow_feel.utils import FEELFunctionsManager
+
+from motor_tributario_py.facade import FacadeCalculadoraTributacao, calcula_tributacao_lote
+from motor_tributario_py.models import Tributavel
+
+
+def itens_nota():
+    return [
+        Tributavel(valor_produto=Decimal("100"), percentual_icms=Decimal("18"), cst="00",
+                   percentual_pis=Decimal("1.65"), percentual_cofins=Decimal("7.6")),
+        Tributavel(valor_produto=Decimal("59.90"), quantidade_produto=Decimal("3"), cst="10",
+                   percentual_icms=Decimal("12"), percentual_icms_st=Decimal("18"),
+                   percentual_mva=Decimal("40"), percentual_ipi=Decimal("5")),
+        Tributavel(valor_produto=Decimal("250"), percentual_icms=Decimal("18"), cst="00",
+                   frete=Decimal("10"), desconto=Decimal("5")),
+    ]
+
+
+class TestCalculaTributacaoLote(unittest.TestCase):
+
+    def test_matches_one_facade_per_item(self):
+        itens = itens_nota()
+        esperado = [FacadeCalculadoraTributacao(copy.deepcopy(item)).calcula_tributacao() for item in itens]
+        self.assertEqual(calcula_tributacao_lote(itens), esperado)
+
+    def test_selected_outputs(self):
+        resultados = calcula_tributacao_lote(itens_nota(), saidas=("icms", "pis", "cofins"))
+        self.assertEqual(len(resultados), 3)
+        self.assertEqual(resultados[0].valor_icms, Decimal("18.00"))
+        self.assertIsNone(resultados[0].res_difal)
+
+    def test_failures(self):
+        itens = itens_nota()
+        itens.insert(1, Tributavel(valor_produto="cem"))
+        with self.assertRaises(Exception):
+            calcula_tributacao_lote(itens)
+        resultados = calcula_tributacao_lote(itens, erros=lambda posicao, erro: (posicao, type(erro)))
+        self.assertEqual(resultados[1][0], 1)
+        self.assertTrue(issubclass(resultados[1][1], Exception))
+        self.assertEqual(resultados[:1] + resultados[2:], calcula_tributacao_lote(itens_nota()))
+
+    def test_setup_is_amortized(self):
+        # FEEL functions are registered once per process, not per item
+        with mock.patch.object(FEELFunctionsManager, "register_funcs",
+                               wraps=FEELFunctionsManager.register_funcs) as register:
+            calcula_tributacao_lote(itens_nota())
+            calcula_tributacao_lote(itens_nota())
+        self.assertLessEqual(register.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
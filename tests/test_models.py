@@ -0,0 +1,155 @@
+import copy
+import pickle
+import sys
+import unittest
+from decimal import Decimal
+
+from motor_tributario_py.facade import FacadeCalculadoraTributacao
+from motor_tributario_py.grafo import SAIDAS_PADRAO
+from motor_tributario_py.models import (
+    CAMPOS_RAROS, CAMPOS_TRIBUTAVEL, REGISTRO_PERFIS, PerfilTributario, Tributavel, TributavelCompacto,
+    TributavelEsparso, TributavelLinha, dados_tributavel,
+)
+from motor_tributario_py.perfil import calcula_tributacao_perfil, chave_perfil
+from motor_tributario_py.taxes.csosn import CalculadoraCsosn
+from test_perfil import itens_aleatorios, resultado_ou_erro
+
+VARIANTES = (TributavelCompacto, TributavelEsparso, TributavelLinha)
+
+
+class TestTributavel(unittest.TestCase):
+
+    def test_fields_declared_once(self):
+        self.assertEqual(len(CAMPOS_TRIBUTAVEL), len(set(CAMPOS_TRIBUTAVEL)))
+        self.assertLessEqual(CAMPOS_RAROS, set(CAMPOS_TRIBUTAVEL))
+
+    def test_substitui(self):
+        produto = Tributavel(valor_produto=Decimal("10"))
+        copia = produto.substitui(frete=Decimal("1"))
+        self.assertEqual((copia.valor_produto, copia.frete), (Decimal("10"), Decimal("1")))
+        self.assertEqual(produto.frete, Decimal("0"))
+
+
+class TestVariantesCompactas(unittest.TestCase):
+
+    def test_same_fields_and_defaults(self):
+        for variante in VARIANTES:
+            self.assertEqual(dados_tributavel(variante()), dados_tributavel(Tributavel()))
+
+    def test_no_instance_dict(self):
+        for variante in VARIANTES:
+            self.assertFalse(hasattr(variante(), "__dict__"))
+            with self.assertRaises(AttributeError):
+                variante().campo_inexistente = 1
+
+    def test_set_field(self):
+        for variante in VARIANTES:
+            produto = variante()
+            for campo in ("valor_produto", "percentual_icms", "percentual_cbs"):
+                setattr(produto, campo, Decimal("7"))
+                self.assertEqual(getattr(produto, campo), Decimal("7"))
+
+    def test_constructor_matches_dataclass(self):
+        for variante in VARIANTES:
+            self.assertEqual(variante(Decimal("5"), frete=Decimal("1")),
+                             Tributavel(Decimal("5"), frete=Decimal("1")))
+            with self.assertRaises(TypeError):
+                variante(campo_inexistente=1)
+            with self.assertRaises(TypeError):
+                variante(Decimal("5"), valor_produto=Decimal("5"))
+
+    def test_sparse_groups(self):
+        produto = TributavelEsparso(percentual_icms=Decimal("18"))
+        self.assertEqual(produto.campos_preenchidos(), frozenset())
+        produto.percentual_cbs = Decimal("0.9")
+        self.assertEqual(produto.campos_preenchidos(), {"percentual_cbs"})
+        self.assertEqual(produto.percentual_cbs, Decimal("0.9"))
+        produto.percentual_cbs = Decimal("0.00")
+        self.assertEqual(produto.campos_preenchidos(), frozenset())
+        # A zero with another exponent is kept as given
+        produto.aliquota_ad_rem_icms = Decimal("0")
+        self.assertEqual(str(produto.aliquota_ad_rem_icms), "0")
+
+    def test_copies(self):
+        for variante in VARIANTES:
+            produto = variante(valor_produto=Decimal("10"), percentual_ret_irrf=Decimal("1.5"))
+            for copia in (copy.copy(produto), copy.deepcopy(produto), pickle.loads(pickle.dumps(produto))):
+                self.assertIs(type(copia), variante)
+                self.assertEqual(copia, produto)
+            alterado = produto.substitui(percentual_ret_irrf=Decimal("0"))
+            self.assertEqual(alterado.percentual_ret_irrf, Decimal("0"))
+            self.assertEqual(produto.percentual_ret_irrf, Decimal("1.5"))
+            self.assertEqual(variante.de_tributavel(produto.como_tributavel()), produto)
+
+    def test_smaller_than_dataclass(self):
+        produto = Tributavel()
+        tamanho = sys.getsizeof(produto) + sys.getsizeof(produto.__dict__)
+        self.assertLess(sys.getsizeof(TributavelCompacto()), tamanho)
+        self.assertLess(sys.getsizeof(TributavelEsparso()), sys.getsizeof(TributavelCompacto()))
+
+    def test_same_results(self):
+        for item in itens_aleatorios(100, semente=2):
+            esperado = resultado_ou_erro(lambda: FacadeCalculadoraTributacao(copy.deepcopy(item))
+                                         .calcula_tributacao(SAIDAS_PADRAO + ("ibs_cbs",)))
+            esperado_csosn = resultado_ou_erro(lambda: CalculadoraCsosn(copy.deepcopy(item)).calcula())
+            for variante in VARIANTES:
+                compacto = variante.de_tributavel(item)
+                self.assertEqual(resultado_ou_erro(lambda: FacadeCalculadoraTributacao(compacto)
+                                                   .calcula_tributacao(SAIDAS_PADRAO + ("ibs_cbs",))), esperado)
+                self.assertEqual(resultado_ou_erro(lambda: calcula_tributacao_perfil(
+                    compacto, SAIDAS_PADRAO + ("ibs_cbs",))), esperado)
+                self.assertEqual(resultado_ou_erro(lambda: CalculadoraCsosn(compacto).calcula()), esperado_csosn)
+                self.assertEqual(compacto, item)
+
+
+class TestPerfilTributario(unittest.TestCase):
+
+    def test_interned(self):
+        a = TributavelLinha(valor_produto=Decimal("10"), cst="00", percentual_icms=Decimal("18"))
+        b = TributavelLinha.de_tributavel(Tributavel(valor_produto=Decimal("20"), cst="00",
+                                                     percentual_icms=Decimal("18")))
+        self.assertIs(a.perfil, b.perfil)
+        self.assertIs(REGISTRO_PERFIS.perfil(cst="00", percentual_icms=Decimal("18")), a.perfil)
+        self.assertEqual(hash(a.perfil), hash(PerfilTributario(cst="00", percentual_icms=Decimal("18"))))
+
+    def test_exponent_and_type_are_part_of_the_profile(self):
+        curto = TributavelLinha(percentual_icms=Decimal("18"), is_ativo_imobilizado_ou_uso_consumo=True)
+        longo = TributavelLinha(percentual_icms=Decimal("18.00"), is_ativo_imobilizado_ou_uso_consumo=1)
+        self.assertIsNot(curto.perfil, longo.perfil)
+        self.assertEqual(str(longo.percentual_icms), "18.00")
+        self.assertIs(type(longo.is_ativo_imobilizado_ou_uso_consumo), int)
+        self.assertIs(type(curto.substitui(valor_produto=Decimal("1")).is_ativo_imobilizado_ou_uso_consumo), bool)
+        self.assertNotEqual(PerfilTributario(percentual_icms=Decimal("18")),
+                            PerfilTributario(percentual_icms=Decimal("18.0000")))
+
+    def test_immutable(self):
+        perfil = REGISTRO_PERFIS.perfil(cst="00")
+        with self.assertRaises(AttributeError):
+            perfil.cst = "10"
+        self.assertEqual(perfil.substitui(cst="10").cst, "10")
+        self.assertEqual(perfil.cst, "00")
+        with self.assertRaises(TypeError):
+            PerfilTributario(valor_produto=Decimal("1"))
+
+    def test_line_field_change_repoints_profile(self):
+        perfil = REGISTRO_PERFIS.perfil(percentual_icms=Decimal("18"))
+        a, b = perfil.linha(valor_produto=Decimal("1")), perfil.linha(valor_produto=Decimal("2"))
+        b.percentual_icms = Decimal("12")
+        self.assertIs(a.perfil, perfil)
+        self.assertIs(b.perfil, REGISTRO_PERFIS.perfil(percentual_icms=Decimal("12")))
+        self.assertIs(a.substitui(valor_produto=Decimal("3")).perfil, perfil)
+
+    def test_pickle_shares_and_interns_profile(self):
+        perfil = REGISTRO_PERFIS.perfil(cst="20", percentual_reducao=Decimal("10"))
+        linhas = pickle.loads(pickle.dumps([perfil.linha(valor_produto=Decimal(i)) for i in range(3)]))
+        self.assertTrue(all(linha.perfil is perfil for linha in linhas))
+
+    def test_profile_key_once_per_profile(self):
+        perfil = REGISTRO_PERFIS.perfil(cst="00", tipo_desconto="Condicional")
+        linha = perfil.linha(valor_produto=Decimal("1"))
+        self.assertEqual(chave_perfil(linha), chave_perfil(linha.como_tributavel()))
+        self.assertIs(chave_perfil(perfil.linha()), chave_perfil(linha))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import copy
+import unittest
+from decimal import Decimal
+
+from motor_tributario_py.facade import FacadeCalculadoraTributacao
+from motor_tributario_py.models import Tributavel, TributavelLinha
+from motor_tributario_py.paralelo import ErroItem, ExecutorParalelo, calcula_lote, calcula_tributacao_paralelo
+from test_perfil import itens_aleatorios, resultado_ou_erro
+
+
+def esperado(item, saidas=None):
+    return resultado_ou_erro(lambda: FacadeCalculadoraTributacao(copy.deepcopy(item)).calcula_tributacao(saidas))
+
+
+def comparavel(resultado):
+    # Failures are compared by exception type name
+    if isinstance(resultado, ErroItem):
+        return resultado.tipo
+    return resultado.__name__ if isinstance(resultado, type) else resultado
+
+
+class TestCalculaLote(unittest.TestCase):
+
+    def test_failures_are_reported_per_item(self):
+        itens = [Tributavel(valor_produto=Decimal("100"), percentual_icms=Decimal("18")),
+                 Tributavel(valor_produto="cem"),
+                 Tributavel(valor_produto=Decimal("50"))]
+        resultados = calcula_lote(10, itens, ("icms",))
+        self.assertEqual(resultados[0], esperado(itens[0], ("icms",)))
+        self.assertIsInstance(resultados[1], ErroItem)
+        self.assertEqual(resultados[1].indice, 11)
+        self.assertEqual(resultados[1].tipo, esperado(itens[1], ("icms",)).__name__)
+        self.assertIn("Traceback", resultados[1].detalhes)
+        self.assertEqual(resultados[2], esperado(itens[2], ("icms",)))
+
+
+class TestExecutorParalelo(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.executor = ExecutorParalelo(processos=2, tamanho_lote=7)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.executor.close()
+
+    def test_results_in_input_order(self):
+        itens = list(itens_aleatorios(60, semente=6))
+        resultados = self.executor.calcula_tributacao(itens)
+        self.assertEqual(len(resultados), len(itens))
+        for indice, (item, resultado) in enumerate(zip(itens, resultados)):
+            if isinstance(resultado, ErroItem):
+                self.assertEqual(resultado.indice, indice)
+            self.assertEqual(comparavel(resultado), comparavel(esperado(item)))
+
+    def test_lazy_input_and_outputs(self):
+        itens = [TributavelLinha(valor_produto=Decimal(valor), percentual_icms=Decimal("18"))
+                 for valor in range(1, 40)]
+        resultados = list(self.executor.calcula_tributacao_iter(iter(itens), ("icms",)))
+        self.assertEqual(resultados, [esperado(item, ("icms",)) for item in itens])
+        self.assertEqual(self.executor.calcula_tributacao([]), [])
+
+    def test_function(self):
+        itens = list(itens_aleatorios(10, semente=7))
+        self.assertEqual([comparavel(resultado) for resultado in calcula_tributacao_paralelo(itens, processos=2)],
+                         [comparavel(esperado(item)) for item in itens])
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaises(ValueError):
+            ExecutorParalelo(tamanho_lote=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
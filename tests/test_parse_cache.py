@@ -0,0 +1,61 @@
+import unittest
+from unittest import mock
+
+from bkflow_dmn.api import decide_single_table as reference_decide
+
+from motor_tributario_py import engine
+from motor_tributario_py.engine import PARSE_CACHE, ParseCache, parse_cache_info
+from motor_tributario_py.engine.interpreter import interpret
+from test_compiler import run_fixtures
+
+
+class TestParseCache(unittest.TestCase):
+
+    def test_hits_misses_and_eviction(self):
+        cache = ParseCache(maxsize=2)
+        first = cache.get("a + 1")
+        self.assertIs(cache.get("a + 1"), first)
+        cache.get("b + 1")
+        cache.get("a + 1")
+        cache.get("c + 1")  # evicts "b + 1", the least recently used
+        self.assertEqual(cache.info(), (2, 3, 2, 2))
+        cache.get("b + 1")
+        self.assertEqual(cache.info().misses, 4)
+        cache.clear()
+        self.assertEqual(cache.info(), (0, 0, 2, 0))
+
+    def test_calculators_parse_each_string_once(self):
+        with mock.patch.object(engine, "get_indexed", return_value=None):
+            run_fixtures()
+            misses = parse_cache_info().misses
+            result = run_fixtures()
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(parse_cache_info().misses, misses)
+        self.assertGreater(parse_cache_info().hits, 0)
+
+    def test_interpreter_matches_bkflow(self):
+        calls = []
+
+        def recorder(table, facts, strict_mode=True):
+            calls.append((table, dict(facts), strict_mode))
+            return interpret(table, facts, strict_mode)
+
+        with mock.patch.object(engine, "_interpret", recorder), \
+                mock.patch.object(engine, "get_indexed", return_value=None):
+            run_fixtures()
+        self.assertGreater(len(calls), 100)
+        for table, facts, strict_mode in calls:
+            try:
+                expected = reference_decide(table, facts, strict_mode=strict_mode)
+            except Exception as e:
+                with self.assertRaises(type(e), msg=table["title"]):
+                    interpret(table, facts, strict_mode)
+                continue
+            self.assertEqual(interpret(table, facts, strict_mode), expected, f"{table['title']}: {facts}")
+
+    def test_shared_by_the_engine(self):
+        self.assertIs(engine.compiler.PARSE_CACHE, PARSE_CACHE)
+
+
+if __name__ == "__main__":
+    unittest.main()
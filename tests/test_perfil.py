@@ -0,0 +1,100 @@
+import copy
+import random
+import unittest
+from decimal import Decimal
+
+from motor_tributario_py.facade import FacadeCalculadoraTributacao
+from motor_tributario_py.grafo import SAIDAS_PADRAO
+from motor_tributario_py.models import Tributavel
+from motor_tributario_py.perfil import calcula_tributacao_perfil, calculadora_perfil
+from motor_tributario_py.taxes.csosn import CalculadoraCsosn
+
+PERCENTUAIS = (
+    "percentual_icms", "percentual_reducao", "percentual_ipi", "percentual_pis", "percentual_cofins",
+    "percentual_icms_st", "percentual_mva", "percentual_reducao_st", "percentual_fcp", "percentual_credito",
+    "percentual_difal_interna", "percentual_difal_interestadual", "percentual_issqn", "percentual_ret_irrf",
+    "percentual_federal", "percentual_ibs_uf", "percentual_cbs", "percentual_icms_efetivo",
+    "percentual_diferimento", "aliquota_ad_rem_icms", "quantidade_base_calculo_icms_monofasico",
+)
+
+
+def itens_aleatorios(quantidade, semente=0):
+    rnd = random.Random(semente)
+
+    def valor():
+        return rnd.choice([Decimal("0"), Decimal(rnd.randint(1, 50000)) / 100])
+
+    for _ in range(quantidade):
+        tributavel = Tributavel(
+            valor_produto=valor(), quantidade_produto=rnd.choice([Decimal("1"), Decimal("2.5")]),
+            frete=valor(), desconto=valor(), valor_ipi=rnd.choice([Decimal("0"), valor()]),
+            is_ativo_imobilizado_ou_uso_consumo=rnd.choice([True, False]),
+            tipo_desconto=rnd.choice(["Condicional", "Incondicional"]),
+            cst=rnd.choice(["", "00", "10", "20", "51", "60", "70", "90", "02", "61"]),
+            csosn=rnd.choice([101, 102, 201, 202, 500, 900]),
+            documento=rnd.choice(["NFe", "CTe"]),
+            deduz_icms_da_base_de_pis_cofins=rnd.choice([True, False]),
+            tipo_calculo_icms_desonerado=rnd.choice(["", "BaseSimples", "BasePorDentro"]),
+            somar_icms_na_base_ibs_cbs=rnd.choice([True, False]),
+        )
+        for campo in PERCENTUAIS:
+            setattr(tributavel, campo, rnd.choice([Decimal("0"), Decimal(rnd.randint(1, 3000)) / 100]))
+        yield tributavel
+
+
+def resultado_ou_erro(calcula):
+    try:
+        return calcula()
+    except Exception as e:  # e.g. BasePorDentro for a CST without a Desonerado row
+        return type(e)
+
+
+class TestCalculadoraPerfil(unittest.TestCase):
+
+    def test_matches_facade(self):
+        for saidas in (None, ("icms", "pis", "cofins"), SAIDAS_PADRAO + ("ibs_cbs",)):
+            for item in itens_aleatorios(150):
+                esperado_item, item_perfil = copy.deepcopy(item), copy.deepcopy(item)
+                esperado = resultado_ou_erro(lambda: FacadeCalculadoraTributacao(esperado_item).calcula_tributacao(saidas))
+                self.assertEqual(resultado_ou_erro(lambda: calcula_tributacao_perfil(item_perfil, saidas)), esperado)
+                # Neither modifies the item
+                self.assertEqual(item_perfil, esperado_item)
+
+    def test_csosn_matches_calculator(self):
+        for item in itens_aleatorios(150, semente=1):
+            esperado_item, item_perfil = copy.deepcopy(item), copy.deepcopy(item)
+            esperado = resultado_ou_erro(lambda: CalculadoraCsosn(esperado_item).calcula())
+            self.assertEqual(resultado_ou_erro(lambda: calculadora_perfil(item_perfil).calcula_csosn(item_perfil)), esperado)
+            self.assertEqual(item_perfil, esperado_item)
+
+    def test_cached_per_profile(self):
+        item = Tributavel(valor_produto=Decimal("10"), cst="00", percentual_icms=Decimal("18"))
+        outro = Tributavel(valor_produto=Decimal("99.90"), cst="00", percentual_icms=Decimal("12"))
+        calculadora = calculadora_perfil(item, ("icms",))
+        self.assertIs(calculadora_perfil(outro, ("icms",)), calculadora)
+        self.assertIsNot(calculadora_perfil(Tributavel(cst="20"), ("icms",)), calculadora)
+        self.assertEqual(calculadora(outro).valor_icms, Decimal("11.988"))
+
+    def test_dispatch_is_resolved_when_generating(self):
+        item = Tributavel(cst="00", tipo_desconto="Condicional")
+        source = calculadora_perfil(item).source
+        self.assertNotIn("decide_single_table", source)
+        # Monofásico and Desonerado are constant for this profile
+        self.assertNotIn("c_aliquota_ad_rem_icms", source)
+        self.assertIn("valor_icms_desonerado=Decimal('0')", source)
+
+    def test_rejects_other_profile(self):
+        calculadora = calculadora_perfil(Tributavel(cst="00"))
+        with self.assertRaises(ValueError):
+            calculadora(Tributavel(cst="20"))
+
+    def test_unknown_csosn_uses_calculator(self):
+        item = Tributavel(csosn=999)
+        calculadora = calculadora_perfil(item)
+        self.assertIsNone(calculadora.source_csosn)
+        with self.assertRaises(Exception):
+            calculadora.calcula_csosn(item)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import pickle
+import tempfile
+import unittest
+from decimal import Decimal
+from pathlib import Path
+
+from bkflow_dmn.api import decide_single_table as reference
+
+from motor_tributario_py import engine
+from motor_tributario_py.engine import snapshot
+from motor_tributario_py.rules.difal_rules import DIFAL_CALC_RULE
+from motor_tributario_py.rules.icms_rules import ICMS_CALC_RULE
+from motor_tributario_py.utils.functions import register_feel_functions
+
+FACTS = {
+    "valor_produto": Decimal("250.00"), "quantidade_produto": Decimal("3"), "frete": Decimal("10"),
+    "seguro": Decimal("2.5"), "outras_despesas": Decimal("1"), "valor_ipi": Decimal("30"),
+    "desconto": Decimal("5"), "percentual_fcp": Decimal("2"), "percentual_difal_interna": Decimal("18"),
+    "percentual_difal_interestadual": Decimal("7"), "is_ativo": False, "tipo_desconto": "Incondicional",
+}
+
+
+class TestSnapshot(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        register_feel_functions()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "rules.snapshot"
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        engine.write_snapshot(self.path)
+        self.assertTrue(engine.load_snapshot(self.path))
+        # Restored from the snapshot: compiled rows are rebuilt on first use
+        self.assertEqual(engine.get_indexed(DIFAL_CALC_RULE)._compiled, {})
+        for compiled in (False, True):
+            engine.set_compiled_rules(compiled)
+            try:
+                result = engine.decide_single_table(DIFAL_CALC_RULE, FACTS)
+            finally:
+                engine.set_compiled_rules(False)
+            self.assertEqual(result, reference(DIFAL_CALC_RULE, FACTS, strict_mode=True))
+
+    def test_stale_or_missing_snapshot_is_ignored(self):
+        self.assertFalse(engine.load_snapshot(self.path))
+        with open(self.path, "wb") as file:
+            pickle.dump({"format": snapshot.SNAPSHOT_FORMAT, "hash": "outro"}, file)
+            file.write(b"not a pickle")
+        self.assertFalse(engine.load_snapshot(self.path))
+
+    def test_rebuild_writes_fresh_snapshot(self):
+        self.assertFalse(engine.load_snapshot(self.path, rebuild=True))
+        self.assertTrue(engine.load_snapshot(self.path))
+
+    def test_hash_follows_rule_contents(self):
+        tables = {"icms_rules.ICMS_CALC_RULE": ICMS_CALC_RULE}
+        changed = {"icms_rules.ICMS_CALC_RULE": dict(ICMS_CALC_RULE, hit_policy="First")}
+        self.assertEqual(engine.rules_hash(tables), engine.rules_hash(dict(tables)))
+        self.assertNotEqual(engine.rules_hash(tables), engine.rules_hash(changed))
+
+    def test_compiled_table_pickles_as_source(self):
+        compiled = engine.get_compiled(ICMS_CALC_RULE)
+        restored = pickle.loads(pickle.dumps(compiled))
+        self.assertEqual(restored.source, compiled.source)
+        facts = dict(FACTS, percentual_reducao=Decimal("0"), percentual_icms=Decimal("18"))
+        self.assertEqual(restored(facts, False), compiled(facts, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
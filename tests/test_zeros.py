@@ -0,0 +1,107 @@
+import unittest
+from decimal import Decimal
+
+from bkflow_dmn.api import decide_single_table as reference
+
+from motor_tributario_py import engine
+from motor_tributario_py.engine.compiler import parse_feel
+from motor_tributario_py.engine.zeros import ZERO, zero_columns, zero_factors, zero_guards
+from motor_tributario_py.rules.difal_rules import DIFAL_CALC_RULE
+from motor_tributario_py.rules.issqn_rules import ISSQN_TAX_RULE
+from motor_tributario_py.utils.functions import register_feel_functions
+
+FACTS = {
+    "valor_produto": Decimal("250.00"),
+    "quantidade_produto": Decimal("3"),
+    "frete": Decimal("10"),
+    "seguro": Decimal("2.5"),
+    "outras_despesas": Decimal("1"),
+    "valor_ipi": Decimal("30"),
+    "desconto": Decimal("5"),
+    "percentual_fcp": Decimal("0"),
+    "percentual_difal_interna": Decimal("18"),
+    "percentual_difal_interestadual": Decimal("7"),
+    "is_ativo": True,
+    "tipo_desconto": "Condicional",
+}
+
+ISSQN_FACTS = {"base_calculo": Decimal("100"), "calcular_retencoes": True,
+               "percentual_issqn": Decimal("0"), "percentual_ret_pis": Decimal("0"),
+               "percentual_ret_cofins": Decimal("0"), "percentual_ret_csll": Decimal("0"),
+               "percentual_ret_irrf": Decimal("0"), "percentual_ret_inss": Decimal("0")}
+
+
+class TestZeroFactors(unittest.TestCase):
+
+    def test_product_and_constant_division(self):
+        self.assertEqual(zero_factors(parse_feel("(base_calculo * percentual_fcp) / decimal(100)")),
+                         {"base_calculo", "percentual_fcp"})
+
+    def test_sum_needs_both_sides(self):
+        self.assertEqual(zero_factors(parse_feel("a * b + a * c")), {"a"})
+        self.assertEqual(zero_factors(parse_feel("a * b - c")), set())
+        self.assertEqual(zero_factors(parse_feel("0 + a * b")), {"a", "b"})
+
+    def test_division_by_fact_is_kept(self):
+        # Short-circuiting would hide the division by zero
+        self.assertEqual(zero_factors(parse_feel("a / b")), set())
+        self.assertEqual(zero_factors(parse_feel("a / decimal(0)")), set())
+        # Nor is a product or sum holding one
+        self.assertEqual(zero_factors(parse_feel("(a / b) * p")), set())
+        self.assertEqual(zero_factors(parse_feel("p * decimal(a / b) + p * c")), set())
+
+    def test_zero_preserving_functions(self):
+        self.assertEqual(zero_factors(parse_feel("apply_threshold(a * b, limite)")), {"a", "b"})
+        self.assertEqual(zero_factors(parse_feel("check_threshold(a, limite, b * c)")), {"b", "c"})
+        self.assertEqual(zero_factors(parse_feel("max(a, b)")), set())
+
+    def test_zero_columns(self):
+        guards = zero_guards(["valor", "base"], ["(base * percentual) / 100", "base"])
+        self.assertEqual(zero_columns(guards, {"base": Decimal("10"), "percentual": Decimal("0")}), {"valor"})
+        # Booleans and missing facts are not zero rates
+        self.assertEqual(zero_columns(guards, {"base": False, "percentual": None}), set())
+
+
+class TestIndexedZeros(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        register_feel_functions()
+
+    def setUp(self):
+        engine.set_zero_rules(True)
+
+    def tearDown(self):
+        engine.set_zero_rules(False)
+
+    def test_difal_matches_interpreter(self):
+        for compiled in (False, True):
+            engine.set_compiled_rules(compiled)
+            try:
+                result = engine.decide_single_table(DIFAL_CALC_RULE, FACTS)
+            finally:
+                engine.set_compiled_rules(False)
+            self.assertEqual(result, reference(DIFAL_CALC_RULE, FACTS, strict_mode=True))
+            self.assertIs(result[0]["valor_fcp"], ZERO)
+
+    def test_all_zero_row_is_not_evaluated(self):
+        indexed = engine.get_indexed(ISSQN_TAX_RULE)
+        indexed = getattr(indexed, "indexed", indexed)
+        before = len(indexed._dags)
+        self.assertEqual(engine.decide_single_table(ISSQN_TAX_RULE, ISSQN_FACTS),
+                         reference(ISSQN_TAX_RULE, ISSQN_FACTS, strict_mode=True))
+        self.assertEqual(len(indexed._dags), before)
+
+    def test_off_by_default(self):
+        engine.set_zero_rules(False)
+        self.assertFalse(engine.zero_rules_enabled())
+        # The exponent of the evaluated expression is kept
+        for table, facts in ((DIFAL_CALC_RULE, FACTS), (ISSQN_TAX_RULE, ISSQN_FACTS)):
+            result = engine.decide_single_table(table, facts)
+            expected = reference(table, facts, strict_mode=True)
+            self.assertEqual([{col: str(value) for col, value in row.items()} for row in result],
+                             [{col: str(value) for col, value in row.items()} for row in expected])
+
+
+if __name__ == "__main__":
+    unittest.main()